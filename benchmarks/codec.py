@@ -0,0 +1,58 @@
+"""
+Measures encoding and decoding of event payloads with every codec that can be used here,
+along with the size of the encoded frames. Decoding is measured twice: reading the id and the subject only,
+which is what the router needs to drop a message, and reading the whole body.
+
+    python -m benchmarks.codec --number 100000
+"""
+
+import argparse
+import timeit
+from typing import Any, Callable, List
+
+from eventual.model import EventPayload
+from eventual.model.codec import JsonCodec, MsgpackCodec, PayloadCodec
+
+from .model import order_placed, order_shipped
+
+
+def measure(fn: Callable[[], Any], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def available_codecs() -> List[PayloadCodec]:
+    codec_seq: List[PayloadCodec] = [JsonCodec()]
+    try:
+        codec_seq.append(MsgpackCodec())
+    except RuntimeError:
+        print("msgpack is not installed, skipping it")
+    return codec_seq
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for payload_codec in available_codecs():
+        codec_name = type(payload_codec).__name__
+        for name, event in [("flat", order_placed()), ("nested", order_shipped())]:
+            event_payload = EventPayload.from_event(event)
+            data = payload_codec.encode(event_payload)
+            encode_time = measure(
+                lambda: payload_codec.encode(event_payload), args.number
+            )
+            header_time = measure(
+                lambda: payload_codec.decode(data).subject, args.number
+            )
+            body_time = measure(lambda: payload_codec.decode(data).body, args.number)
+            print(
+                f"{codec_name:>12} {name:>8}: {len(data)} bytes, "
+                f"encode {encode_time * 1e6:.2f} us, "
+                f"decode headers {header_time * 1e6:.2f} us, "
+                f"decode body {body_time * 1e6:.2f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
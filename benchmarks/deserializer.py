@@ -0,0 +1,45 @@
+"""
+Compares `EventPayload.as_event` with creating an empty instance by `object.__new__`,
+which is the lower bound for rebuilding an event, for bodies as they are and bodies that went through JSON.
+
+    python -m benchmarks.deserializer --number 100000
+"""
+
+import argparse
+import timeit
+from typing import Any, Callable
+
+import orjson
+
+from eventual.model import EventPayload
+
+from .model import order_placed, order_shipped
+
+
+def measure(fn: Callable[[], Any], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for name, event in [("flat", order_placed()), ("nested", order_shipped())]:
+        event_class = type(event)
+        event_payload = EventPayload.from_event(event)
+        json_event_payload = EventPayload.from_event_body(
+            orjson.loads(orjson.dumps(event_payload.body))
+        )
+        new_time = measure(lambda: object.__new__(event_class), args.number)
+        native_time = measure(event_payload.as_event, args.number)
+        json_time = measure(json_event_payload.as_event, args.number)
+        print(
+            f"{name:>8}: __new__ {new_time * 1e6:.2f} us, "
+            f"as_event {native_time * 1e6:.2f} us, "
+            f"as_event after JSON {json_time * 1e6:.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares random (version 4) and time-ordered (version 7) event ids: the cost of creating an id and an event,
+and how fast ids are inserted into an SQLite table keyed by them, like the tables of schedules and integrity guards.
+Also compares the clock used for timestamps of events with `pytz`, if it is installed.
+
+    python -m benchmarks.event_id --number 100000 --row-count 1000000
+"""
+
+import argparse
+import datetime as dt
+import os
+import sqlite3
+import tempfile
+import time
+import timeit
+import uuid
+from typing import Any, Callable
+
+from eventual import util
+from eventual.model import set_event_id_factory
+
+from .model import order_placed
+
+
+def measure(fn: Callable[[], Any], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def measure_inserts(create_id: Callable[[], uuid.UUID], row_count: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "ids.sqlite3"))
+        connection.execute("CREATE TABLE event_entry (id BLOB PRIMARY KEY)")
+        start = time.perf_counter()
+        for _ in range(0, row_count, 1000):
+            with connection:
+                connection.executemany(
+                    "INSERT INTO event_entry (id) VALUES (?)",
+                    ((create_id().bytes,) for _ in range(1000)),
+                )
+        elapsed = time.perf_counter() - start
+        connection.close()
+    return row_count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--row-count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for name, create_id in [("uuid4", uuid.uuid4), ("uuid7", util.uuid7)]:
+        set_event_id_factory(create_id)
+        id_time = measure(create_id, args.number)
+        event_time = measure(order_placed, args.number)
+        insert_rate = measure_inserts(create_id, args.row_count)
+        print(
+            f"{name:>8}: id {id_time * 1e6:.2f} us, "
+            f"event {event_time * 1e6:.2f} us, "
+            f"{insert_rate:.0f} inserts/s"
+        )
+    set_event_id_factory(uuid.uuid4)
+
+    utc_time = measure(lambda: dt.datetime.now(tz=dt.timezone.utc), args.number)
+    try:
+        import pytz
+    except ImportError:
+        print(f"   clock: timezone.utc {utc_time * 1e6:.2f} us")
+    else:
+        pytz_time = measure(lambda: dt.datetime.now(tz=pytz.UTC), args.number)
+        print(
+            f"   clock: pytz {pytz_time * 1e6:.2f} us, "
+            f"timezone.utc {utc_time * 1e6:.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
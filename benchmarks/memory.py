@@ -0,0 +1,76 @@
+"""
+Reports how many bytes an instance of an event and of an entity takes, with and without slots.
+Values the instances refer to are allocated before measuring and shared, so only the instances themselves,
+their dictionaries and outboxes are counted, along with the id and the timestamp every event creates.
+
+    python -m benchmarks.memory --count 100000
+"""
+
+import argparse
+import tracemalloc
+import uuid
+from typing import Any, Callable, List
+
+from .model import (
+    Order,
+    OrderPlaced,
+    SlottedOrder,
+    SlottedOrderPlaced,
+    order_placed,
+)
+
+
+def measure(create: Callable[[], Any], count: int) -> float:
+    instance_seq: List[Any] = []
+    tracemalloc.start()
+    try:
+        for _ in range(count):
+            instance_seq.append(create())
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The list that holds instances is measured too, it takes a pointer per instance.
+    return size / count - 8
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    event = order_placed()
+    unique_id = uuid.uuid4()
+    create_seq = [
+        (
+            "event",
+            lambda: OrderPlaced(
+                order_id=event.order_id,
+                customer=event.customer,
+                item_count=3,
+                total=9.5,
+            ),
+            lambda: SlottedOrderPlaced(
+                order_id=event.order_id,
+                customer=event.customer,
+                item_count=3,
+                total=9.5,
+            ),
+        ),
+        (
+            "entity",
+            lambda: Order._create(unique_id=unique_id, customer=event.customer),
+            lambda: SlottedOrder._create(unique_id=unique_id, customer=event.customer),
+        ),
+    ]
+    for name, create, create_slotted in create_seq:
+        size = measure(create, args.count)
+        slotted_size = measure(create_slotted, args.count)
+        print(
+            f"{name:>8}: {size:.0f} bytes, "
+            f"slotted {slotted_size:.0f} bytes, "
+            f"{size / slotted_size:.1f}x smaller"
+        )
+
+
+if __name__ == "__main__":
+    main()
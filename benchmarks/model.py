@@ -0,0 +1,67 @@
+import dataclasses
+import datetime as dt
+import uuid
+from typing import Dict, List
+
+from eventual.model import Entity, Event, SlottedEntity, SlottedEvent, slotted
+
+
+@dataclasses.dataclass(frozen=True)
+class OrderPlaced(Event):
+    order_id: uuid.UUID
+    customer: str
+    item_count: int
+    total: float
+
+
+@slotted
+@dataclasses.dataclass(frozen=True)
+class SlottedOrderPlaced(SlottedEvent):
+    order_id: uuid.UUID
+    customer: str
+    item_count: int
+    total: float
+
+
+@dataclasses.dataclass(frozen=True)
+class OrderLine:
+    sku: str
+    quantity: int
+    price: float
+
+
+@dataclasses.dataclass(frozen=True)
+class OrderShipped(Event):
+    order_id: uuid.UUID
+    line_seq: List[OrderLine]
+    shipped_on: dt.datetime
+    carrier_from_region: Dict[str, str]
+
+
+class Order(Entity[uuid.UUID]):
+    def __init__(self, *, unique_id: uuid.UUID, customer: str):
+        super().__init__(unique_id=unique_id)
+        self.customer = customer
+
+
+class SlottedOrder(SlottedEntity[uuid.UUID]):
+    __slots__ = ("customer",)
+
+    def __init__(self, *, unique_id: uuid.UUID, customer: str):
+        super().__init__(unique_id=unique_id)
+        self.customer = customer
+
+
+def order_placed() -> OrderPlaced:
+    return OrderPlaced(order_id=uuid.uuid4(), customer="alice", item_count=3, total=9.5)
+
+
+def order_shipped() -> OrderShipped:
+    return OrderShipped(
+        order_id=uuid.uuid4(),
+        line_seq=[
+            OrderLine(sku=f"sku-{i}", quantity=i, price=1.5 * i) for i in range(5)
+        ],
+        shipped_on=dt.datetime.now(dt.timezone.utc),
+        carrier_from_region={"eu": "dhl", "us": "ups"},
+    )
@@ -0,0 +1,38 @@
+"""
+Compares the compiled serializer used by `EventPayload.from_event` with `dataclasses.asdict`
+for a flat event and for an event with nested dataclasses.
+
+    python -m benchmarks.serializer --number 100000
+"""
+
+import argparse
+import dataclasses
+import timeit
+from typing import Any, Callable
+
+from eventual.model.compiler import serializer_from_class
+
+from .model import order_placed, order_shipped
+
+
+def measure(fn: Callable[[Any], Any], event: Any, number: int) -> float:
+    return min(timeit.repeat(lambda: fn(event), number=number, repeat=5)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for name, event in [("flat", order_placed()), ("nested", order_shipped())]:
+        asdict_time = measure(dataclasses.asdict, event, args.number)
+        compiled_time = measure(serializer_from_class(type(event)), event, args.number)
+        print(
+            f"{name:>8}: asdict {asdict_time * 1e6:.2f} us, "
+            f"compiled {compiled_time * 1e6:.2f} us, "
+            f"{asdict_time / compiled_time:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
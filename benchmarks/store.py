@@ -0,0 +1,82 @@
+"""
+Measures how many events per second the schedule and the integrity guard sustain
+when they are used the way the router and the scheduler use them: events are written in batches,
+every one of them is checked, dispatched, completed and finally closed.
+
+    python -m benchmarks.store --event-count 20000 --batch-size 100
+"""
+
+import argparse
+import pathlib
+import tempfile
+import time
+from typing import Any, Callable, List, Tuple
+
+import anyio
+
+from eventual.abc.guarantee import Guarantee
+from eventual.abc.router import IntegrityGuard
+from eventual.abc.schedule import EventSchedule
+from eventual.memory import MemoryEventSchedule, MemoryIntegrityGuard
+from eventual.model import EventPayload
+from eventual.sqlite import SqliteDatabase, SqliteEventSchedule, SqliteIntegrityGuard
+
+from .model import order_placed
+
+StoreFactory = Callable[[pathlib.Path], Tuple[EventSchedule[Any], IntegrityGuard[Any]]]
+
+
+def memory_store(_: pathlib.Path) -> Tuple[EventSchedule[Any], IntegrityGuard[Any]]:
+    return MemoryEventSchedule(claim_duration=60.0), MemoryIntegrityGuard()
+
+
+def sqlite_store(
+    directory: pathlib.Path,
+) -> Tuple[EventSchedule[Any], IntegrityGuard[Any]]:
+    database = SqliteDatabase(str(directory / "eventual.db"))
+    return SqliteEventSchedule(database, claim_duration=60.0), SqliteIntegrityGuard(
+        database
+    )
+
+
+async def measure(
+    store_factory: StoreFactory, event_count: int, batch_size: int
+) -> float:
+    event_payload_seq = [
+        EventPayload.from_event(order_placed()) for _ in range(event_count)
+    ]
+    batch_seq: List[List[EventPayload]] = [
+        event_payload_seq[start : start + batch_size]
+        for start in range(0, event_count, batch_size)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        event_schedule, integrity_guard = store_factory(pathlib.Path(directory))
+        started_at = time.perf_counter()
+        for batch in batch_seq:
+            await event_schedule.add_claimed_event_entries(batch)
+            event_id_seq = [event_payload.id for event_payload in batch]
+            await integrity_guard.which_dispatch_forbidden(event_id_seq)
+            await integrity_guard.record_dispatch_attempts(batch)
+            await integrity_guard.record_completions_with_guarantee(
+                batch, Guarantee.AT_LEAST_ONCE
+            )
+            await event_schedule.close_event_entries(event_id_seq)
+        return event_count / (time.perf_counter() - started_at)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--event-count", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    for name, store_factory in [("memory", memory_store), ("sqlite", sqlite_store)]:
+        events_per_second = await measure(
+            store_factory, args.event_count, args.batch_size
+        )
+        print(f"{name:>8}: {events_per_second:,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    anyio.run(main)
@@ -1,5 +1,5 @@
 import abc
-from typing import AsyncIterable
+from typing import AbstractSet, AsyncIterable, Sequence
 
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
@@ -16,6 +16,12 @@ class Message(abc.ABC):
     def acknowledge(self) -> None:
         raise NotImplementedError
 
+    @classmethod
+    def acknowledge_many(cls, message_seq: Sequence["Message"]) -> None:
+        # Brokers that can acknowledge several messages with one call should override this.
+        for message in message_seq:
+            message.acknowledge()
+
     def __repr__(self) -> str:
         return f"{self.event_payload.id}/{self.event_payload.subject}"
 
@@ -34,3 +40,17 @@ class MessageBroker(abc.ABC):
     @abc.abstractmethod
     def message_receive_stream(self) -> AsyncIterable[Message]:
         raise NotImplementedError
+
+    def restrict_to_subjects(self, subject_set: AbstractSet[str]) -> None:
+        # Brokers that can tell the subject of a message without decoding it (e.g. from headers or a routing key)
+        # should skip messages with other subjects or not subscribe to them at all.
+        # Routers call it only if messages nobody handles can be dropped.
+        return None
+
+    @property
+    def forwards_messages(self) -> bool:
+        return type(self).forward_message is not MessageBroker.forward_message
+
+    async def forward_message(self, message: Message) -> None:
+        # Brokers don't have to forward messages, routers refuse to forward them with a broker that doesn't.
+        raise NotImplementedError
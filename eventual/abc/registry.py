@@ -1,18 +1,46 @@
 import abc
 import dataclasses
+import enum
+import functools
 import sys
-from typing import Awaitable, Callable, Generic, List, Mapping
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
 if sys.version_info >= (3, 8):
     from typing import Protocol
 else:
     from typing_extensions import Protocol
 
+import anyio.to_process
+import anyio.to_thread
+
+from eventual.model import Event, EventPayload
+
 from .broker import Message
-from .router import Guarantee
+from .guarantee import Guarantee
+from .retry import RetryPolicy
 from .schedule import EventScheduler
 from .work_unit import WU
 
+H = TypeVar("H", bound=Callable[..., Any])
+
+
+class Offload(str, enum.Enum):
+    THREAD = "THREAD"
+    PROCESS = "PROCESS"
+
 
 class MessageHandler(Protocol[WU]):
     def __call__(
@@ -21,11 +49,47 @@ class MessageHandler(Protocol[WU]):
         raise NotImplementedError
 
 
+class BatchMessageHandler(Protocol[WU]):
+    def __call__(
+        self, __msg_seq: List[Message], __scheduler: EventScheduler[WU]
+    ) -> Awaitable[None]:
+        raise NotImplementedError
+
+
 @dataclasses.dataclass
 class HandlerSpecification(Generic[WU]):
     guarantee: Guarantee
     delay_on_exc: float
-    message_handler: MessageHandler[WU]
+    # It's a `BatchMessageHandler` when `batch_max_size` is set and a `MessageHandler` otherwise.
+    message_handler: Union[MessageHandler[WU], BatchMessageHandler[WU]]
+    # How many messages handled by this specification can be in flight at once, `None` means no limit.
+    max_in_flight: Optional[int] = None
+    # Messages of one subject are gathered into a batch until either there are `batch_max_size` of them
+    # or `batch_max_wait` seconds have passed since the first one arrived.
+    batch_max_size: Optional[int] = None
+    batch_max_wait: float = 0.0
+    # Decides how long to wait before the next attempt, `None` means always wait `delay_on_exc`.
+    retry_policy: Optional[RetryPolicy] = None
+    # After so many failed attempts the event is parked as a dead letter instead of being retried.
+    max_attempts: Optional[int] = None
+    # Names the handler in attempt counters of events, so it has to be the same on every node of a service
+    # and different for every handler. It's the qualified name of the handler unless given.
+    consumer: str = ""
+
+    def __post_init__(self) -> None:
+        if self.consumer:
+            return
+        handler = self.message_handler
+        name = getattr(handler, "__qualname__", None)
+        # Lambdas, closures and partials share their names with other handlers.
+        if self.max_attempts is not None and (name is None or "<" in name):
+            raise ValueError("handler without a unique name has to be given a consumer")
+        module = getattr(handler, "__module__", type(handler).__module__)
+        self.consumer = f"{module}.{name or type(handler).__qualname__}"
+
+    @property
+    def is_batch(self) -> bool:
+        return self.batch_max_size is not None
 
 
 class HandlerRegistry(abc.ABC, Generic[WU]):
@@ -33,9 +97,15 @@ class HandlerRegistry(abc.ABC, Generic[WU]):
     def register(
         self,
         subject_seq: List[str],
-        handler: MessageHandler[WU],
+        handler: Union[MessageHandler[WU], BatchMessageHandler[WU]],
         guarantee: Guarantee,
         delay_on_exc: float,
+        max_in_flight: Optional[int] = None,
+        batch_max_size: Optional[int] = None,
+        batch_max_wait: float = 0.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        max_attempts: Optional[int] = None,
+        consumer: Optional[str] = None,
     ) -> None:
         raise NotImplementedError
 
@@ -45,12 +115,82 @@ class HandlerRegistry(abc.ABC, Generic[WU]):
 
     def subscribe(
         self,
-        event_type_seq: List[str],
+        event_type_seq: Sequence[Union[str, Type[Event]]],
         guarantee: Guarantee = Guarantee.AT_LEAST_ONCE,
         delay_on_exc: float = 1.0,
-    ) -> Callable[[MessageHandler[WU]], MessageHandler[WU]]:
-        def decorator(handler: MessageHandler[WU]) -> MessageHandler[WU]:
-            self.register(event_type_seq, handler, guarantee, delay_on_exc)
+        max_in_flight: Optional[int] = None,
+        batch_max_size: Optional[int] = None,
+        batch_max_wait: float = 0.0,
+        offload: Optional[Offload] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        max_attempts: Optional[int] = None,
+        consumer: Optional[str] = None,
+    ) -> Callable[[H], H]:
+        # An offloaded handler is a plain function that takes an `EventPayload` (or a list of them
+        # for a batch handler) and runs in a worker thread or process. It can't use the scheduler,
+        # but guarantees are still maintained on the event loop around it.
+        def decorator(handler: H) -> H:
+            message_handler = handler
+            if offload is not None:
+                message_handler = _offloaded_message_handler(
+                    handler, offload, batch_max_size is not None
+                )
+            self.register(
+                [_subject_from_event_type(event_type) for event_type in event_type_seq],
+                cast(
+                    Union[MessageHandler[WU], BatchMessageHandler[WU]],
+                    message_handler,
+                ),
+                guarantee,
+                delay_on_exc,
+                max_in_flight,
+                batch_max_size,
+                batch_max_wait,
+                retry_policy,
+                max_attempts,
+                consumer,
+            )
             return handler
 
         return decorator
+
+
+def _subject_from_event_type(event_type: Union[str, Type[Event]]) -> str:
+    if isinstance(event_type, str):
+        return event_type
+    return event_type.__subject__
+
+
+async def _run_offloaded(fn: Callable[[Any], Any], offload: Offload, arg: Any) -> None:
+    if offload == Offload.THREAD:
+        await anyio.to_thread.run_sync(fn, arg)
+    elif offload == Offload.PROCESS:
+        # The function and the payload are pickled to cross the process boundary,
+        # so the function has to be importable by its qualified name.
+        await anyio.to_process.run_sync(fn, arg)
+    else:
+        raise AssertionError("there are no more ways to offload")
+
+
+def _offloaded_message_handler(
+    fn: Callable[[Any], Any], offload: Offload, is_batch: bool
+) -> Any:
+    # Wrappers take the name of the function, so that offloaded handlers are told apart by their consumers.
+    if is_batch:
+
+        @functools.wraps(fn)
+        async def batch_message_handler(
+            msg_seq: List[Message], _: EventScheduler[Any]
+        ) -> None:
+            event_payload_seq: List[EventPayload] = [
+                msg.event_payload for msg in msg_seq
+            ]
+            await _run_offloaded(fn, offload, event_payload_seq)
+
+        return batch_message_handler
+
+    @functools.wraps(fn)
+    async def message_handler(msg: Message, _: EventScheduler[Any]) -> None:
+        await _run_offloaded(fn, offload, msg.event_payload)
+
+    return message_handler
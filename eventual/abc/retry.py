@@ -0,0 +1,8 @@
+import abc
+
+
+class RetryPolicy(abc.ABC):
+    @abc.abstractmethod
+    def delay(self, attempt: int) -> float:
+        # `attempt` is the number of times handling of the event has failed, so it starts at 1.
+        raise NotImplementedError
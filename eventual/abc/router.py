@@ -1,7 +1,17 @@
 import abc
+import enum
 import uuid
 from contextlib import asynccontextmanager
-from typing import AsyncContextManager, AsyncGenerator, Generic
+from typing import (
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterator,
+    Generic,
+    Iterable,
+    List,
+    Sequence,
+    Set,
+)
 
 from eventual.model import EventPayload
 
@@ -13,6 +23,8 @@ from .work_unit import WU
 
 
 class IntegrityGuard(abc.ABC, Generic[WU]):
+    # Methods that take a sequence fall back to their single item counterparts,
+    # implementations backed by a database should override them to make one query per sequence.
     @abc.abstractmethod
     def create_work_unit(self) -> AsyncContextManager[WU]:
         raise NotImplementedError
@@ -21,6 +33,19 @@ class IntegrityGuard(abc.ABC, Generic[WU]):
     async def is_dispatch_forbidden(self, event_id: uuid.UUID) -> bool:
         raise NotImplementedError
 
+    async def which_dispatch_forbidden(
+        self, event_id_seq: Iterable[uuid.UUID]
+    ) -> Set[uuid.UUID]:
+        forbidden_event_id_set = set()
+        for event_id in event_id_seq:
+            if await self.is_dispatch_forbidden(event_id):
+                forbidden_event_id_set.add(event_id)
+        return forbidden_event_id_set
+
+    def every_forbidden_event_id(self) -> AsyncIterator[uuid.UUID]:
+        # Guards that can list every handled event let `CachedIntegrityGuard` fill its Bloom filter.
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def record_completion_with_guarantee(
         self,
@@ -29,10 +54,36 @@ class IntegrityGuard(abc.ABC, Generic[WU]):
     ) -> uuid.UUID:
         raise NotImplementedError
 
+    async def record_completions_with_guarantee(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        guarantee: Guarantee,
+    ) -> List[uuid.UUID]:
+        return [
+            await self.record_completion_with_guarantee(event_payload, guarantee)
+            for event_payload in event_payload_seq
+        ]
+
     @abc.abstractmethod
     async def record_dispatch_attempt(self, event_payload: EventPayload) -> uuid.UUID:
         raise NotImplementedError
 
+    async def record_dispatch_attempts(
+        self, event_payload_seq: Sequence[EventPayload]
+    ) -> List[uuid.UUID]:
+        return [
+            await self.record_dispatch_attempt(event_payload)
+            for event_payload in event_payload_seq
+        ]
+
+    async def run_in_background(self) -> None:
+        # Guards that buffer writes can flush them periodically here, it runs for as long as the lifespan does.
+        return None
+
+    async def flush(self) -> None:
+        # Persists buffered writes, it's called upon shutdown after the router has stopped.
+        return None
+
     @asynccontextmanager
     async def handle_exactly_once(
         self, message: Message
@@ -64,6 +115,53 @@ class IntegrityGuard(abc.ABC, Generic[WU]):
         )
         message.acknowledge()
 
+    @asynccontextmanager
+    async def handle_batch_exactly_once(
+        self, message_seq: Sequence[Message]
+    ) -> AsyncGenerator[List[EventPayload], None]:
+        event_payload_seq = [message.event_payload for message in message_seq]
+        async with self.create_work_unit() as _:
+            yield event_payload_seq
+            await self.record_completions_with_guarantee(
+                event_payload_seq, guarantee=Guarantee.EXACTLY_ONCE
+            )
+        _acknowledge_many(message_seq)
+
+    @asynccontextmanager
+    async def handle_batch_no_more_than_once(
+        self, message_seq: Sequence[Message]
+    ) -> AsyncGenerator[List[EventPayload], None]:
+        event_payload_seq = [message.event_payload for message in message_seq]
+        await self.record_completions_with_guarantee(
+            event_payload_seq, guarantee=Guarantee.NO_MORE_THAN_ONCE
+        )
+        _acknowledge_many(message_seq)
+        yield event_payload_seq
+
+    @asynccontextmanager
+    async def handle_batch_at_least_once(
+        self, message_seq: Sequence[Message]
+    ) -> AsyncGenerator[List[EventPayload], None]:
+        event_payload_seq = [message.event_payload for message in message_seq]
+        yield event_payload_seq
+        await self.record_completions_with_guarantee(
+            event_payload_seq, guarantee=Guarantee.AT_LEAST_ONCE
+        )
+        _acknowledge_many(message_seq)
+
+
+def _acknowledge_many(message_seq: Sequence[Message]) -> None:
+    if message_seq:
+        type(message_seq[0]).acknowledge_many(message_seq)
+
+
+class UnhandledSubjectPolicy(str, enum.Enum):
+    # Leave the message unacknowledged and let the broker decide what happens to it.
+    DROP = "DROP"
+    ACKNOWLEDGE = "ACKNOWLEDGE"
+    # Hand the message over to `MessageBroker.forward_message` and acknowledge it.
+    FORWARD = "FORWARD"
+
 
 class MessageRouter(abc.ABC):
     @abc.abstractmethod
@@ -9,19 +9,38 @@ from typing import (
     AsyncIterable,
     Generic,
     Iterable,
+    List,
+    NamedTuple,
     Optional,
+    Sequence,
     Tuple,
 )
 
 import anyio
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
+from eventual import util
 from eventual.model import Entity, EventPayload
 
 from .work_unit import WU
 
 
+def shard_key_from_event_id(event_id: uuid.UUID) -> int:
+    # Low bits are random in every kind of UUID we produce, while high bits can be a timestamp.
+    return event_id.int & 0x7FFFFFFF
+
+
+class Shard(NamedTuple):
+    number: int
+    total: int
+
+    def contains(self, event_id: uuid.UUID) -> bool:
+        return shard_key_from_event_id(event_id) % self.total == self.number
+
+
 class EventSchedule(abc.ABC, Generic[WU]):
+    # `add_claimed_event_entries` and `close_event_entries` go through entries one by one,
+    # a schedule backed by a database should write them in a single statement instead.
     def __init__(self, claim_duration: float):
         self.claim_duration = claim_duration
 
@@ -35,6 +54,14 @@ class EventSchedule(abc.ABC, Generic[WU]):
     ) -> None:
         raise NotImplementedError
 
+    async def add_claimed_event_entries(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        due_after: Optional[dt.datetime] = None,
+    ) -> None:
+        for event_payload in event_payload_seq:
+            await self.add_claimed_event_entry(event_payload, due_after)
+
     @abc.abstractmethod
     async def is_event_entry_claimed(self, event_id: uuid.UUID) -> bool:
         raise NotImplementedError
@@ -53,20 +80,85 @@ class EventSchedule(abc.ABC, Generic[WU]):
     async def close_event_entry(self, event_id: uuid.UUID) -> None:
         raise NotImplementedError
 
+    async def close_event_entries(self, event_id_seq: Sequence[uuid.UUID]) -> None:
+        for event_id in event_id_seq:
+            await self.close_event_entry(event_id)
+
+    async def claim_due_event_entries(
+        self, node_id: str, limit: int, shard: Optional[Shard] = None
+    ) -> List[EventPayload]:
+        # Implementations should override this to claim only entries of the shard in a single query.
+        # Entries are claimed upon reading, so filtering them here would steal entries of other shards,
+        # that's why the default implementation ignores the shard.
+        event_payload_seq: List[EventPayload] = []
+        event_payload_stream = self.every_open_unclaimed_event_entry_due_now()
+        try:
+            async for event_payload in event_payload_stream:
+                event_payload_seq.append(event_payload)
+                if len(event_payload_seq) == limit:
+                    break
+        finally:
+            aclose = getattr(event_payload_stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        return event_payload_seq
+
+    async def renew_event_entry_claims(
+        self, node_id: str, event_id_seq: Sequence[uuid.UUID]
+    ) -> None:
+        # Extends claims that `node_id` still holds, entries claimed by another node are left alone.
+        return None
+
+    async def record_node_heartbeat(self, node_id: str, ttl: float) -> None:
+        return None
+
+    async def every_live_node_id(self) -> List[str]:
+        # Schedules that don't track nodes return nothing, which means recovery isn't sharded.
+        return []
+
+    async def add_dead_letter_entry(
+        self, event_payload: EventPayload, reason: str
+    ) -> None:
+        # Only handlers with `max_attempts` park dead letters, so schedules don't have to support them,
+        # the router refuses to start such handlers with a schedule that doesn't.
+        raise NotImplementedError
+
+    async def every_dead_letter_entry(
+        self, event_id_seq: Optional[Sequence[uuid.UUID]] = None
+    ) -> List[Tuple[EventPayload, str]]:
+        # Returns every parked event along with the reason it was parked for, `None` means every dead letter.
+        raise NotImplementedError
+
+    async def remove_dead_letter_entries(
+        self, event_id_seq: Sequence[uuid.UUID]
+    ) -> None:
+        raise NotImplementedError
+
 
 class EventScheduler(Generic[WU]):
     def __init__(
         self,
         event_payload_send_stream: MemoryObjectSendStream[EventPayload],
         event_schedule: EventSchedule[WU],
+        confirmation_batch_max_size: int = 100,
+        confirmation_batch_max_wait: float = 0.0,
     ) -> None:
+        if confirmation_batch_max_size <= 0:
+            raise ValueError("batch size has to be positive")
+        if confirmation_batch_max_wait < 0:
+            raise ValueError("batch wait has to be non-negative")
+
         self.event_payload_send_stream = event_payload_send_stream
         self._event_schedule = event_schedule
+        # Confirmations that have arrived by the time we get to them are closed at once,
+        # the buffer lets the broker go on while we close the previous batch.
+        self.confirmation_batch_max_size = confirmation_batch_max_size
+        self.confirmation_batch_max_wait = confirmation_batch_max_wait
 
         confirmation_stream_pair: Tuple[
             MemoryObjectSendStream[EventPayload],
             MemoryObjectReceiveStream[EventPayload],
-        ] = anyio.create_memory_object_stream()
+        ] = anyio.create_memory_object_stream(confirmation_batch_max_size)
         (
             self.confirmation_send_stream,
             self._confirmation_stream,
@@ -80,18 +172,65 @@ class EventScheduler(Generic[WU]):
     ) -> None:
         raise NotImplementedError
 
+    async def schedule_event_seq(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        delay: float = 0.0,
+    ) -> None:
+        for event_payload in event_payload_seq:
+            await self.schedule_event(event_payload, delay)
+
     @abc.abstractmethod
     async def schedule_every_open_unclaimed_event_entry_due_now(
         self,
     ) -> None:
         raise NotImplementedError
 
+    @property
+    def parks_dead_letters(self) -> bool:
+        return (
+            type(self._event_schedule).add_dead_letter_entry
+            is not EventSchedule.add_dead_letter_entry
+        )
+
+    async def park_dead_letter(self, event_payload: EventPayload, reason: str) -> None:
+        await self._event_schedule.add_dead_letter_entry(event_payload, reason)
+
+    async def redrive_dead_letters(
+        self, event_id_seq: Optional[Sequence[uuid.UUID]] = None
+    ) -> int:
+        # Dead letters are removed only after they are scheduled again, so a crash in between
+        # can send an event twice, but never loses it.
+        dead_letter_seq = await self._event_schedule.every_dead_letter_entry(
+            event_id_seq
+        )
+        if not dead_letter_seq:
+            return 0
+        await self.schedule_event_seq(
+            [event_payload.without_attempts() for event_payload, _ in dead_letter_seq]
+        )
+        await self._event_schedule.remove_dead_letter_entries(
+            [event_payload.id for event_payload, _ in dead_letter_seq]
+        )
+        return len(dead_letter_seq)
+
     async def receive_confirmation_stream(self) -> None:
         async with self._confirmation_stream:
-            async for event_payload in self._confirmation_stream:
-                await self._event_schedule.close_event_entry(event_payload.id)
+            while True:
+                try:
+                    event_payload_seq = await util.receive_batch(
+                        self._confirmation_stream,
+                        self.confirmation_batch_max_size,
+                        self.confirmation_batch_max_wait,
+                    )
+                except anyio.EndOfStream:
+                    return
+                await self._event_schedule.close_event_entries(
+                    [event_payload.id for event_payload in event_payload_seq]
+                )
 
     async def schedule_outbox(self, entity_seq: Iterable[Entity[Any]]) -> None:
+        event_payload_seq: List[EventPayload] = []
         for entity in entity_seq:
             # Make a copy because during asynchronous processing
             # someone can add messages to the outbox.
@@ -102,8 +241,12 @@ class EventScheduler(Generic[WU]):
             # TODO: Maybe timestamp data is not reliable enough in the context of tracking changes to entities.
             # For such purposes we would have to store origin of the message.
             # TODO: It could be better to explicitly use the stream here to achieve clean shutdown.
-            for event in event_seq:
-                await self.schedule_event(event_payload=EventPayload.from_event(event))
+            event_payload_seq.extend(
+                EventPayload.from_event(event) for event in event_seq
+            )
+        if event_payload_seq:
+            # Every event of every entity is written to the schedule at once.
+            await self.schedule_event_seq(event_payload_seq)
 
     @asynccontextmanager
     async def schedule_outbox_in_work_unit(
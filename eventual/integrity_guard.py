@@ -0,0 +1,331 @@
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+import anyio
+
+from eventual.abc.broker import Message
+from eventual.abc.guarantee import Guarantee
+from eventual.abc.router import IntegrityGuard
+from eventual.abc.work_unit import WU
+from eventual.model import EventPayload
+from eventual.util import BloomFilter
+
+
+class CachedIntegrityGuard(IntegrityGuard[WU]):
+    """
+    Wraps an integrity guard and remembers ids of events that were handled by this process,
+    so that redeliveries and retries of those events are answered without touching the storage.
+
+    Only positive answers are cached, because an event that is not handled yet can be handled by another process
+    at any moment. The exception is the optional Bloom filter: when it's given the wrapper assumes that every
+    completion goes through this very instance (e.g. there is a single consumer), so an id that is absent
+    from the filter is reported as not handled right away. The filter is seeded with every handled event
+    of the wrapped guard by `seed_bloom_filter` (which `run_in_background` calls), and until that is over
+    the wrapped guard is asked about every id the cache doesn't know.
+    """
+
+    def __init__(
+        self,
+        integrity_guard: IntegrityGuard[WU],
+        max_size: int = 10_000,
+        ttl: Optional[float] = None,
+        bloom_filter: Optional[BloomFilter] = None,
+    ):
+        if max_size <= 0:
+            raise ValueError("cache size has to be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl has to be positive")
+        if (
+            bloom_filter is not None
+            and type(integrity_guard).every_forbidden_event_id
+            is IntegrityGuard.every_forbidden_event_id
+        ):
+            raise ValueError("bloom filter needs a guard that lists handled events")
+
+        self.integrity_guard = integrity_guard
+        self.max_size = max_size
+        self.ttl = ttl
+        self.bloom_filter = bloom_filter
+
+        self.hit_count = 0
+        self.miss_count = 0
+        self.negative_hit_count = 0
+
+        self._cached_at_from_event_id: "OrderedDict[uuid.UUID, float]" = OrderedDict()
+        self._is_bloom_filter_seeded = False
+
+    def __len__(self) -> int:
+        return len(self._cached_at_from_event_id)
+
+    def _remember(self, event_id: uuid.UUID) -> None:
+        self._cached_at_from_event_id[event_id] = time.monotonic()
+        self._cached_at_from_event_id.move_to_end(event_id)
+        if len(self._cached_at_from_event_id) > self.max_size:
+            self._cached_at_from_event_id.popitem(last=False)
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(event_id)
+
+    def _is_remembered(self, event_id: uuid.UUID) -> bool:
+        cached_at = self._cached_at_from_event_id.get(event_id)
+        if cached_at is None:
+            return False
+        if self.ttl is not None and time.monotonic() - cached_at > self.ttl:
+            del self._cached_at_from_event_id[event_id]
+            return False
+        self._cached_at_from_event_id.move_to_end(event_id)
+        return True
+
+    def _is_surely_not_handled(self, event_id: uuid.UUID) -> bool:
+        return (
+            self.bloom_filter is not None
+            and self._is_bloom_filter_seeded
+            and event_id not in self.bloom_filter
+        )
+
+    async def seed_bloom_filter(self) -> None:
+        if self.bloom_filter is None or self._is_bloom_filter_seeded:
+            return
+        # Events handled by this process in the meantime are added to the filter as usual.
+        async for event_id in self.integrity_guard.every_forbidden_event_id():
+            self.bloom_filter.add(event_id)
+        self._is_bloom_filter_seeded = True
+
+    def create_work_unit(self) -> AsyncContextManager[WU]:
+        return self.integrity_guard.create_work_unit()
+
+    async def is_dispatch_forbidden(self, event_id: uuid.UUID) -> bool:
+        if self._is_remembered(event_id):
+            self.hit_count += 1
+            return True
+        if self._is_surely_not_handled(event_id):
+            self.negative_hit_count += 1
+            return False
+
+        self.miss_count += 1
+        is_forbidden = await self.integrity_guard.is_dispatch_forbidden(event_id)
+        if is_forbidden:
+            self._remember(event_id)
+        return is_forbidden
+
+    async def which_dispatch_forbidden(
+        self, event_id_seq: Iterable[uuid.UUID]
+    ) -> Set[uuid.UUID]:
+        forbidden_event_id_set = set()
+        unknown_event_id_seq = []
+        for event_id in event_id_seq:
+            if self._is_remembered(event_id):
+                self.hit_count += 1
+                forbidden_event_id_set.add(event_id)
+            elif self._is_surely_not_handled(event_id):
+                self.negative_hit_count += 1
+            else:
+                self.miss_count += 1
+                unknown_event_id_seq.append(event_id)
+
+        if unknown_event_id_seq:
+            stored_event_id_set = await self.integrity_guard.which_dispatch_forbidden(
+                unknown_event_id_seq
+            )
+            for event_id in stored_event_id_set:
+                self._remember(event_id)
+            forbidden_event_id_set |= stored_event_id_set
+        return forbidden_event_id_set
+
+    def every_forbidden_event_id(self) -> AsyncIterator[uuid.UUID]:
+        return self.integrity_guard.every_forbidden_event_id()
+
+    async def record_completion_with_guarantee(
+        self,
+        event_payload: EventPayload,
+        guarantee: Guarantee,
+    ) -> uuid.UUID:
+        event_id = await self.integrity_guard.record_completion_with_guarantee(
+            event_payload, guarantee
+        )
+        # Completion with the exactly once guarantee is a part of the work unit,
+        # which can still be rolled back, see `handle_exactly_once`.
+        if guarantee != Guarantee.EXACTLY_ONCE:
+            self._remember(event_payload.id)
+        return event_id
+
+    async def record_completions_with_guarantee(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        guarantee: Guarantee,
+    ) -> List[uuid.UUID]:
+        event_id_seq = await self.integrity_guard.record_completions_with_guarantee(
+            event_payload_seq, guarantee
+        )
+        if guarantee != Guarantee.EXACTLY_ONCE:
+            for event_payload in event_payload_seq:
+                self._remember(event_payload.id)
+        return event_id_seq
+
+    async def record_dispatch_attempt(self, event_payload: EventPayload) -> uuid.UUID:
+        return await self.integrity_guard.record_dispatch_attempt(event_payload)
+
+    async def record_dispatch_attempts(
+        self, event_payload_seq: Sequence[EventPayload]
+    ) -> List[uuid.UUID]:
+        return await self.integrity_guard.record_dispatch_attempts(event_payload_seq)
+
+    async def run_in_background(self) -> None:
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(self.integrity_guard.run_in_background)
+            await self.seed_bloom_filter()
+
+    async def flush(self) -> None:
+        await self.integrity_guard.flush()
+
+    @asynccontextmanager
+    async def handle_exactly_once(
+        self, message: Message
+    ) -> AsyncGenerator[EventPayload, None]:
+        async with self.create_work_unit() as work_unit:
+            yield message.event_payload
+            await self.record_completion_with_guarantee(
+                message.event_payload, guarantee=Guarantee.EXACTLY_ONCE
+            )
+        message.acknowledge()
+        if work_unit.committed:
+            self._remember(message.event_payload.id)
+
+    @asynccontextmanager
+    async def handle_batch_exactly_once(
+        self, message_seq: Sequence[Message]
+    ) -> AsyncGenerator[List[EventPayload], None]:
+        event_payload_seq = [message.event_payload for message in message_seq]
+        async with self.create_work_unit() as work_unit:
+            yield event_payload_seq
+            await self.record_completions_with_guarantee(
+                event_payload_seq, guarantee=Guarantee.EXACTLY_ONCE
+            )
+        if message_seq:
+            type(message_seq[0]).acknowledge_many(message_seq)
+        if work_unit.committed:
+            for event_payload in event_payload_seq:
+                self._remember(event_payload.id)
+
+
+class WriteBehindIntegrityGuard(IntegrityGuard[WU]):
+    """
+    Wraps an integrity guard and buffers dispatch attempts, so that recording an attempt
+    doesn't put a storage write on the critical path of every dispatched message.
+
+    Buffered attempts are written in bulk with `record_dispatch_attempts` once there are `max_size` of them
+    or every `interval` seconds, whichever comes first. A buffer that outgrows `max_size` while the storage
+    is slow is flushed by the caller. Attempts that are still buffered when the process dies are lost,
+    which only affects bookkeeping: attempts are not used to decide whether to dispatch an event.
+    """
+
+    def __init__(
+        self,
+        integrity_guard: IntegrityGuard[WU],
+        max_size: int = 100,
+        interval: float = 0.1,
+    ):
+        if max_size <= 0:
+            raise ValueError("buffer size has to be positive")
+        if interval <= 0:
+            raise ValueError("interval has to be positive")
+
+        self.integrity_guard = integrity_guard
+        self.max_size = max_size
+        self.interval = interval
+
+        self._event_payload_buffer: List[EventPayload] = []
+        self._buffer_full: Optional[anyio.Event] = None
+
+    def create_work_unit(self) -> AsyncContextManager[WU]:
+        return self.integrity_guard.create_work_unit()
+
+    async def is_dispatch_forbidden(self, event_id: uuid.UUID) -> bool:
+        return await self.integrity_guard.is_dispatch_forbidden(event_id)
+
+    async def which_dispatch_forbidden(
+        self, event_id_seq: Iterable[uuid.UUID]
+    ) -> Set[uuid.UUID]:
+        return await self.integrity_guard.which_dispatch_forbidden(event_id_seq)
+
+    def every_forbidden_event_id(self) -> AsyncIterator[uuid.UUID]:
+        return self.integrity_guard.every_forbidden_event_id()
+
+    async def record_completion_with_guarantee(
+        self,
+        event_payload: EventPayload,
+        guarantee: Guarantee,
+    ) -> uuid.UUID:
+        return await self.integrity_guard.record_completion_with_guarantee(
+            event_payload, guarantee
+        )
+
+    async def record_completions_with_guarantee(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        guarantee: Guarantee,
+    ) -> List[uuid.UUID]:
+        return await self.integrity_guard.record_completions_with_guarantee(
+            event_payload_seq, guarantee
+        )
+
+    async def record_dispatch_attempt(self, event_payload: EventPayload) -> uuid.UUID:
+        self._event_payload_buffer.append(event_payload)
+        buffer_size = len(self._event_payload_buffer)
+        if buffer_size >= self.max_size:
+            if self._buffer_full is None or buffer_size > self.max_size:
+                # Nobody flushes in the background or the flush can't keep up, so we have to do it ourselves,
+                # which also holds the caller back until the storage catches up.
+                await self._flush_buffer()
+            else:
+                self._buffer_full.set()
+        return event_payload.id
+
+    async def record_dispatch_attempts(
+        self, event_payload_seq: Sequence[EventPayload]
+    ) -> List[uuid.UUID]:
+        return [
+            await self.record_dispatch_attempt(event_payload)
+            for event_payload in event_payload_seq
+        ]
+
+    async def run_in_background(self) -> None:
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(self.integrity_guard.run_in_background)
+                while True:
+                    self._buffer_full = anyio.Event()
+                    if len(self._event_payload_buffer) < self.max_size:
+                        with anyio.move_on_after(self.interval):
+                            await self._buffer_full.wait()
+                    await self._flush_buffer()
+        finally:
+            # Attempts are flushed inline again once nobody does it in the background.
+            self._buffer_full = None
+
+    async def flush(self) -> None:
+        await self._flush_buffer()
+        await self.integrity_guard.flush()
+
+    async def _flush_buffer(self) -> None:
+        if not self._event_payload_buffer:
+            return
+        event_payload_seq = self._event_payload_buffer
+        self._event_payload_buffer = []
+        try:
+            await self.integrity_guard.record_dispatch_attempts(event_payload_seq)
+        except BaseException:
+            # Keep the attempts around, so the next flush can try again.
+            self._event_payload_buffer[:0] = event_payload_seq
+            raise
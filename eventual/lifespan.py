@@ -7,7 +7,7 @@ from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStre
 from eventual.abc.broker import MessageBroker
 from eventual.abc.registry import HandlerRegistry
 from eventual.abc.router import IntegrityGuard
-from eventual.abc.work_unit import WU, WorkUnit
+from eventual.abc.work_unit import WU
 from eventual.model import EventPayload
 from eventual.router import Router
 from eventual.scheduler import EventSchedule, Scheduler
@@ -16,7 +16,7 @@ from eventual.scheduler import EventSchedule, Scheduler
 def default_lifespan(
     handler_registry: HandlerRegistry[WU],
     message_broker: MessageBroker,
-    integrity_guard: IntegrityGuard[WorkUnit],
+    integrity_guard: IntegrityGuard[WU],
     event_payload_stream_pair: Tuple[
         MemoryObjectSendStream[EventPayload], MemoryObjectReceiveStream[EventPayload]
     ],
@@ -26,7 +26,18 @@ def default_lifespan(
         Scheduler[WU],
     ],
     router_factory: Callable[[TaskGroup], Router],
+    recover_unclaimed: bool = True,
+    recovery_interval: Optional[float] = None,
+    claim_renewal_interval: Optional[float] = None,
 ) -> Callable:
+    # When several processes share the same event schedule, they recover separate shards of it
+    # if the schedule keeps track of live nodes, otherwise only one of them should set `recover_unclaimed`,
+    # because every process would scan the schedule for the same entries.
+    # `claim_renewal_interval` has to be shorter than `claim_duration`.
+    # Entries that nobody has sent become available once their claim expires, so by default
+    # the schedule is swept for them as often as claims expire, but no more than once a second.
+    if recovery_interval is None:
+        recovery_interval = max(event_schedule.claim_duration, 1.0)
     event_payload_send_stream, event_payload_stream = event_payload_stream_pair
 
     async def generator(_: Optional[Any] = None) -> AsyncGenerator[None, None]:
@@ -45,13 +56,31 @@ def default_lifespan(
                     scheduler,
                 )
                 background_group.start_soon(scheduler.receive_confirmation_stream)
+                # Delayed events are released in the background group, which is cancelled upon shutdown.
+                await background_group.start(scheduler.release_due_event_payloads)
+                background_group.start_soon(integrity_guard.run_in_background)
+                if claim_renewal_interval is not None:
+                    background_group.start_soon(
+                        scheduler.renew_claims_periodically, claim_renewal_interval
+                    )
                 background_group.start_soon(
                     message_broker.send_event_payload_stream,
                     event_payload_stream,
                     scheduler.confirmation_send_stream,
                 )
-                await scheduler.schedule_every_open_unclaimed_event_entry_due_now()
+                if recover_unclaimed:
+                    # Only nodes that recover entries are live, otherwise their shards would be left behind.
+                    background_group.start_soon(
+                        scheduler.record_heartbeats_periodically
+                    )
+                    # Sweeps are throttled by `recovery_max_rate` of the scheduler, so even the first one
+                    # runs in the background instead of holding up the startup.
+                    background_group.start_soon(
+                        scheduler.sweep_unclaimed_periodically, recovery_interval
+                    )
                 yield
                 background_group.cancel_scope.cancel()
+            # Router is stopped at this point, so nothing can be added to the buffers anymore.
+            await integrity_guard.flush()
 
     return generator
@@ -0,0 +1,5 @@
+from .integrity_guard import MemoryIntegrityGuard
+from .schedule import MemoryEventSchedule
+from .work_unit import MemoryWorkUnit
+
+__all__ = ["MemoryEventSchedule", "MemoryIntegrityGuard", "MemoryWorkUnit"]
@@ -0,0 +1,42 @@
+import collections
+import uuid
+from typing import AsyncContextManager, AsyncIterator, Counter, Dict
+
+from eventual.abc.guarantee import Guarantee
+from eventual.abc.router import IntegrityGuard
+from eventual.model import EventPayload
+
+from .work_unit import MemoryWorkUnit
+
+
+class MemoryIntegrityGuard(IntegrityGuard[MemoryWorkUnit]):
+    def __init__(self) -> None:
+        self._guarantee_from_event_id: Dict[uuid.UUID, Guarantee] = {}
+        self._dispatch_attempt_counter: Counter[uuid.UUID] = collections.Counter()
+
+    def create_work_unit(self) -> AsyncContextManager[MemoryWorkUnit]:
+        return MemoryWorkUnit.create()
+
+    async def is_dispatch_forbidden(self, event_id: uuid.UUID) -> bool:
+        return event_id in self._guarantee_from_event_id
+
+    async def every_forbidden_event_id(self) -> AsyncIterator[uuid.UUID]:
+        for event_id in list(self._guarantee_from_event_id):
+            yield event_id
+
+    async def record_completion_with_guarantee(
+        self, event_payload: EventPayload, guarantee: Guarantee
+    ) -> uuid.UUID:
+        event_id = event_payload.id
+        if event_id in self._guarantee_from_event_id:
+            raise ValueError("completion of the event has already been recorded")
+
+        self._guarantee_from_event_id[event_id] = guarantee
+        return event_id
+
+    async def record_dispatch_attempt(self, event_payload: EventPayload) -> uuid.UUID:
+        self._dispatch_attempt_counter[event_payload.id] += 1
+        return event_payload.id
+
+    def dispatch_attempt_count(self, event_id: uuid.UUID) -> int:
+        return self._dispatch_attempt_counter[event_id]
@@ -0,0 +1,199 @@
+import dataclasses
+import datetime as dt
+import heapq
+import itertools
+import uuid
+from typing import (
+    AsyncContextManager,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eventual import util
+from eventual.abc.schedule import EventSchedule, Shard
+from eventual.model import EventPayload
+
+from .work_unit import MemoryWorkUnit
+
+
+@dataclasses.dataclass
+class _EventEntry:
+    event_payload: EventPayload
+    due_after: Optional[dt.datetime]
+    claimed_until: dt.datetime
+    # `None` means the entry is claimed by whoever has added it.
+    claimed_by: Optional[str] = None
+    # Number of the item in the ready queue that is current for this entry, older items are stale.
+    queue_number: int = -1
+
+    @property
+    def ready_at(self) -> dt.datetime:
+        if self.due_after is None or self.due_after < self.claimed_until:
+            return self.claimed_until
+        return self.due_after
+
+
+class MemoryEventSchedule(EventSchedule[MemoryWorkUnit]):
+    """
+    Keeps open event entries in memory, which is enough for a single node that doesn't have to
+    survive a restart.
+
+    Entries are indexed by the moment they become available for recovery, which is the later of
+    `due_after` and the claim expiry. Looking up entries that are due now and closing an entry
+    both take O(log n), closed and re-claimed entries are dropped from the index lazily. Once stale items
+    outnumber open entries, they are dropped all at once, so the index doesn't grow beyond twice the number
+    of open entries.
+    """
+
+    def __init__(self, claim_duration: float) -> None:
+        super().__init__(claim_duration)
+        self._entry_from_event_id: Dict[uuid.UUID, _EventEntry] = {}
+        self._ready_queue: List[Tuple[dt.datetime, int, _EventEntry]] = []
+        self._ready_queue_counter = itertools.count()
+        self._dead_letter_from_event_id: Dict[uuid.UUID, Tuple[EventPayload, str]] = {}
+        self._expires_at_from_node_id: Dict[str, dt.datetime] = {}
+
+    def create_work_unit(self) -> AsyncContextManager[MemoryWorkUnit]:
+        return MemoryWorkUnit.create()
+
+    def _claim_until(self, now: dt.datetime) -> dt.datetime:
+        return now + dt.timedelta(seconds=self.claim_duration)
+
+    def _enqueue(self, entry: _EventEntry) -> None:
+        entry.queue_number = next(self._ready_queue_counter)
+        heapq.heappush(self._ready_queue, (entry.ready_at, entry.queue_number, entry))
+
+    def _is_queued(self, queue_number: int, entry: _EventEntry) -> bool:
+        # An item is stale if the entry has been closed, replaced or queued again since.
+        return (
+            entry.queue_number == queue_number
+            and self._entry_from_event_id.get(entry.event_payload.id) is entry
+        )
+
+    def _compact_ready_queue(self) -> None:
+        if len(self._ready_queue) <= 2 * len(self._entry_from_event_id):
+            return
+        # Only items are filtered, entries that a scan has taken out of the queue are put back by that scan.
+        self._ready_queue = [
+            item for item in self._ready_queue if self._is_queued(item[1], item[2])
+        ]
+        heapq.heapify(self._ready_queue)
+
+    async def add_claimed_event_entry(
+        self, event_payload: EventPayload, due_after: Optional[dt.datetime] = None
+    ) -> None:
+        entry = _EventEntry(
+            event_payload=event_payload,
+            due_after=due_after,
+            claimed_until=self._claim_until(util.tz_aware_utcnow()),
+        )
+        self._entry_from_event_id[event_payload.id] = entry
+        self._enqueue(entry)
+        self._compact_ready_queue()
+
+    async def is_event_entry_claimed(self, event_id: uuid.UUID) -> bool:
+        entry = self._entry_from_event_id.get(event_id)
+        return entry is not None and entry.claimed_until > util.tz_aware_utcnow()
+
+    async def every_open_unclaimed_event_entry_due_now(
+        self,
+    ) -> AsyncIterator[EventPayload]:
+        now = util.tz_aware_utcnow()
+        claimed_entry_seq: List[_EventEntry] = []
+        try:
+            while self._ready_queue and self._ready_queue[0][0] <= now:
+                _, queue_number, entry = heapq.heappop(self._ready_queue)
+                if not self._is_queued(queue_number, entry):
+                    continue
+                entry.claimed_until = self._claim_until(now)
+                claimed_entry_seq.append(entry)
+                yield entry.event_payload
+        finally:
+            # Claimed entries are queued again only after the scan, otherwise an entry with a claim
+            # that expires immediately would come up again within the same scan.
+            for entry in claimed_entry_seq:
+                self._enqueue(entry)
+
+    async def claim_due_event_entries(
+        self, node_id: str, limit: int, shard: Optional[Shard] = None
+    ) -> List[EventPayload]:
+        now = util.tz_aware_utcnow()
+        claimed_entry_seq: List[_EventEntry] = []
+        skipped_entry_seq: List[_EventEntry] = []
+        while (
+            len(claimed_entry_seq) < limit
+            and self._ready_queue
+            and self._ready_queue[0][0] <= now
+        ):
+            _, queue_number, entry = heapq.heappop(self._ready_queue)
+            if not self._is_queued(queue_number, entry):
+                continue
+            if shard is not None and not shard.contains(entry.event_payload.id):
+                skipped_entry_seq.append(entry)
+                continue
+            entry.claimed_until = self._claim_until(now)
+            entry.claimed_by = node_id
+            claimed_entry_seq.append(entry)
+
+        for entry in itertools.chain(claimed_entry_seq, skipped_entry_seq):
+            self._enqueue(entry)
+        return [entry.event_payload for entry in claimed_entry_seq]
+
+    async def renew_event_entry_claims(
+        self, node_id: str, event_id_seq: Sequence[uuid.UUID]
+    ) -> None:
+        claimed_until = self._claim_until(util.tz_aware_utcnow())
+        for event_id in event_id_seq:
+            entry = self._entry_from_event_id.get(event_id)
+            if entry is None or entry.claimed_by not in (None, node_id):
+                continue
+            entry.claimed_until = claimed_until
+            entry.claimed_by = node_id
+            self._enqueue(entry)
+        self._compact_ready_queue()
+
+    async def record_node_heartbeat(self, node_id: str, ttl: float) -> None:
+        self._expires_at_from_node_id[node_id] = util.tz_aware_utcnow() + dt.timedelta(
+            seconds=ttl
+        )
+
+    async def every_live_node_id(self) -> List[str]:
+        now = util.tz_aware_utcnow()
+        for node_id, expires_at in list(self._expires_at_from_node_id.items()):
+            if expires_at <= now:
+                del self._expires_at_from_node_id[node_id]
+        return list(self._expires_at_from_node_id)
+
+    async def is_event_entry_closed(self, event_id: uuid.UUID) -> bool:
+        # Closed entries are forgotten, so every entry that isn't open is considered closed.
+        return event_id not in self._entry_from_event_id
+
+    async def close_event_entry(self, event_id: uuid.UUID) -> None:
+        self._entry_from_event_id.pop(event_id, None)
+        self._compact_ready_queue()
+
+    async def add_dead_letter_entry(
+        self, event_payload: EventPayload, reason: str
+    ) -> None:
+        self._dead_letter_from_event_id[event_payload.id] = (event_payload, reason)
+
+    async def every_dead_letter_entry(
+        self, event_id_seq: Optional[Sequence[uuid.UUID]] = None
+    ) -> List[Tuple[EventPayload, str]]:
+        if event_id_seq is None:
+            return list(self._dead_letter_from_event_id.values())
+        return [
+            self._dead_letter_from_event_id[event_id]
+            for event_id in event_id_seq
+            if event_id in self._dead_letter_from_event_id
+        ]
+
+    async def remove_dead_letter_entries(
+        self, event_id_seq: Sequence[uuid.UUID]
+    ) -> None:
+        for event_id in event_id_seq:
+            self._dead_letter_from_event_id.pop(event_id, None)
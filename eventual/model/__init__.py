@@ -1,4 +1,22 @@
-from .entity import Entity
-from .event import Event, EventPayload
+from .entity import Entity, SlottedEntity
+from .event import (
+    Event,
+    EventPayload,
+    LazyEventPayload,
+    SlottedEvent,
+    event_class_from_subject,
+    set_event_id_factory,
+)
+from .slots import slotted
 
-__all__ = ["Entity", "Event", "EventPayload"]
+__all__ = [
+    "Entity",
+    "Event",
+    "EventPayload",
+    "LazyEventPayload",
+    "SlottedEntity",
+    "SlottedEvent",
+    "event_class_from_subject",
+    "set_event_id_factory",
+    "slotted",
+]
@@ -0,0 +1,117 @@
+"""
+Codecs turn event payloads into bytes and back, so brokers and stores share the same encoding.
+
+Every encoded payload is a frame: a version byte, 16 bytes of the event id, the time the event occurred on
+in microseconds since the epoch, the length of the subject, the subject itself and finally the body.
+Reading the id, the time and the subject of a frame doesn't touch the body, which is decoded lazily
+from a memory view of the frame, so nothing is copied in between.
+"""
+
+import abc
+import datetime as dt
+import decimal
+import enum
+import json
+import struct
+import uuid
+from typing import Any, Dict, Union
+
+from .event import EventPayload, LazyEventPayload
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_FRAME_VERSION = 2
+_FRAME_HEADER = struct.Struct(">B16sqH")
+
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_MICROSECOND = dt.timedelta(microseconds=1)
+
+
+def _plain_from_value(value: Any) -> Any:
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} can't be encoded")
+
+
+class PayloadCodec(abc.ABC):
+    content_type = "application/octet-stream"
+
+    @abc.abstractmethod
+    def encode_body(self, body: Dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def decode_body(self, data: Buffer) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def encode(self, event_payload: EventPayload) -> bytes:
+        subject = event_payload.subject.encode()
+        occurred_on = event_payload.occurred_on
+        if occurred_on.tzinfo is None:
+            occurred_on = occurred_on.replace(tzinfo=dt.timezone.utc)
+        header = _FRAME_HEADER.pack(
+            _FRAME_VERSION,
+            event_payload.id.bytes,
+            (occurred_on - _EPOCH) // _MICROSECOND,
+            len(subject),
+        )
+        return b"".join((header, subject, self.encode_body(event_payload.body)))
+
+    def decode(self, data: Buffer) -> LazyEventPayload:
+        view = memoryview(data)
+        version, id_bytes, timestamp, subject_size = _FRAME_HEADER.unpack_from(view)
+        if version != _FRAME_VERSION:
+            raise ValueError(f"frame version {version} is not supported")
+        subject_end = _FRAME_HEADER.size + subject_size
+        return LazyEventPayload(
+            id=uuid.UUID(bytes=id_bytes),
+            subject=str(view[_FRAME_HEADER.size : subject_end], "utf-8"),
+            encoded_body=view[subject_end:],
+            decode_body=self.decode_body,
+            occurred_on=_EPOCH + timestamp * _MICROSECOND,
+        )
+
+
+class JsonCodec(PayloadCodec):
+    # Uses `orjson` when it's installed, the standard library otherwise.
+    content_type = "application/json"
+
+    def encode_body(self, body: Dict[str, Any]) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(body, default=_plain_from_value)
+        return json.dumps(body, default=_plain_from_value).encode()
+
+    def decode_body(self, data: Buffer) -> Dict[str, Any]:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(bytes(data))
+
+
+class MsgpackCodec(PayloadCodec):
+    content_type = "application/msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack has to be installed to use MsgpackCodec")
+
+    def encode_body(self, body: Dict[str, Any]) -> bytes:
+        return msgpack.packb(body, default=_plain_from_value, use_bin_type=True)
+
+    def decode_body(self, data: Buffer) -> Dict[str, Any]:
+        return msgpack.unpackb(data, raw=False)
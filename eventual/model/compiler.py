@@ -0,0 +1,266 @@
+"""
+Generates functions that turn dataclass instances into dictionaries and back.
+
+The result of a serializer is the same as the one of `dataclasses.asdict`, but the list of fields is read once
+per class and values that can't contain other values are taken as is instead of being deep-copied.
+
+A deserializer does the opposite: it creates an instance from a dictionary, even one that went through JSON,
+by coercing values back to the types of the fields. Like unpickling, it doesn't call `__init__`,
+fields are set directly on a new instance, so fields with `init=False` are restored too.
+"""
+
+import copy
+import dataclasses
+import datetime as dt
+import decimal
+import enum
+import types
+import typing
+import uuid
+from typing import Any, Callable, Dict, Optional, Type
+
+Serializer = Callable[[Any], Dict[str, Any]]
+Deserializer = Callable[[Dict[str, Any]], Any]
+Converter = Callable[[Any], Any]
+
+# `copy.deepcopy` returns these values themselves, so there is no reason to call it.
+_ATOMIC_TYPE_SET = frozenset(
+    {
+        type(None),
+        bool,
+        int,
+        float,
+        complex,
+        str,
+        bytes,
+        uuid.UUID,
+        dt.datetime,
+        dt.date,
+        dt.time,
+        dt.timedelta,
+        decimal.Decimal,
+    }
+)
+
+_serializer_from_class: Dict[type, Serializer] = {}
+_deserializer_from_class: Dict[type, Deserializer] = {}
+
+
+def _convert(value: Any) -> Any:
+    value_type = type(value)
+    if value_type in _ATOMIC_TYPE_SET or isinstance(value, enum.Enum):
+        return value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return serializer_from_class(value_type)(value)
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return value_type(*[_convert(item) for item in value])
+    if isinstance(value, (list, tuple)):
+        return value_type(_convert(item) for item in value)
+    if isinstance(value, dict):
+        return value_type(
+            (_convert(key), _convert(item)) for key, item in value.items()
+        )
+    return copy.deepcopy(value)
+
+
+def _compile_serializer(cls: Type[Any]) -> Serializer:
+    line_seq = []
+    for field in dataclasses.fields(cls):
+        line_seq.append(
+            f"    value = obj.{field.name}\n"
+            f"    body[{field.name!r}] = value if type(value) in atomic_type_set else convert(value)\n"
+        )
+    source = (
+        "def serialize(obj):\n"
+        "    body = {}\n" + "".join(line_seq) + "    return body\n"
+    )
+    namespace: Dict[str, Any] = {
+        "atomic_type_set": _ATOMIC_TYPE_SET,
+        "convert": _convert,
+    }
+    exec(source, namespace)  # noqa: S102
+    serialize: Serializer = namespace["serialize"]
+    serialize.__qualname__ = f"serialize_{cls.__qualname__}"
+    return serialize
+
+
+def serializer_from_class(cls: Type[Any]) -> Serializer:
+    # Fields of a dataclass don't change after the class is created, so the serializer is made once.
+    serializer = _serializer_from_class.get(cls)
+    if serializer is None:
+        serializer = _serializer_from_class[cls] = _compile_serializer(cls)
+    return serializer
+
+
+def _datetime_from_value(value: Any) -> dt.datetime:
+    return dt.datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _date_from_value(value: Any) -> dt.date:
+    return dt.date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _time_from_value(value: Any) -> dt.time:
+    return dt.time.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _converter_from_class(cls: Any) -> Optional[Converter]:
+    # Returns `None` for values that are taken as is.
+    if cls is uuid.UUID:
+        return lambda value: value if type(value) is uuid.UUID else uuid.UUID(value)
+    if cls is dt.datetime:
+        return _datetime_from_value
+    if cls is dt.date:
+        return _date_from_value
+    if cls is dt.time:
+        return _time_from_value
+    if cls is decimal.Decimal:
+        return lambda value: value if type(value) is cls else decimal.Decimal(value)
+    if isinstance(cls, type) and issubclass(cls, enum.Enum):
+        return cls
+    if isinstance(cls, type) and dataclasses.is_dataclass(cls):
+        deserialize = deserializer_from_class(cls)
+        return lambda value: deserialize(value) if isinstance(value, dict) else value
+    if isinstance(cls, type) and issubclass(cls, tuple) and hasattr(cls, "_fields"):
+        return lambda value: value if isinstance(value, cls) else cls(*value)
+    return _converter_from_generic(cls)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _optional_converter(convert: Converter) -> Converter:
+    return lambda value: None if value is None else convert(value)
+
+
+def _collection_converter(
+    collection_class: type, convert: Optional[Converter]
+) -> Converter:
+    if convert is None:
+        return lambda value: (
+            value if type(value) is collection_class else collection_class(value)
+        )
+    convert_item: Converter = convert
+    return lambda value: collection_class(convert_item(item) for item in value)
+
+
+def _mapping_converter(convert_key: Converter, convert_item: Converter) -> Converter:
+    return lambda value: {
+        convert_key(key): convert_item(item) for key, item in value.items()
+    }
+
+
+def _converter_from_generic(cls: Any) -> Optional[Converter]:
+    origin = getattr(cls, "__origin__", None)
+    arg_seq = [
+        arg
+        for arg in getattr(cls, "__args__", ())
+        if not isinstance(arg, typing.TypeVar)
+    ]
+    if origin is typing.Union:
+        # Only `Optional` is supported, members of other unions can't be told apart.
+        if len(arg_seq) != 2 or type(None) not in arg_seq:
+            return None
+        item_class = arg_seq[1] if arg_seq[0] is type(None) else arg_seq[0]
+        convert = _converter_from_class(item_class)
+        return None if convert is None else _optional_converter(convert)
+    if origin in (list, set, frozenset):
+        return _collection_converter(
+            origin, _converter_from_class(arg_seq[0]) if arg_seq else None
+        )
+    if origin is tuple:
+        if len(arg_seq) == 2 and arg_seq[1] is Ellipsis:
+            return _collection_converter(tuple, _converter_from_class(arg_seq[0]))
+        convert_seq = [_converter_from_class(arg) or _identity for arg in arg_seq]
+        return lambda value: tuple(
+            convert(item) for convert, item in zip(convert_seq, value)
+        )
+    if origin is dict and len(arg_seq) == 2:
+        convert_key = _converter_from_class(arg_seq[0])
+        convert_item = _converter_from_class(arg_seq[1])
+        if convert_key is None and convert_item is None:
+            return None
+        return _mapping_converter(convert_key or _identity, convert_item or _identity)
+    return None
+
+
+def _is_slot(cls: Type[Any], name: str) -> bool:
+    for base in cls.__mro__:
+        if name in base.__dict__:
+            return isinstance(base.__dict__[name], types.MemberDescriptorType)
+    return False
+
+
+def _compile_deserializer(cls: Type[Any]) -> Deserializer:
+    try:
+        type_from_name = typing.get_type_hints(cls)
+    except NameError:
+        # Annotations that can't be resolved are left as they are, values of such fields are taken as is.
+        type_from_name = {}
+
+    namespace: Dict[str, Any] = {
+        "cls": cls,
+        "new": object.__new__,
+        "setattr": object.__setattr__,
+        "missing": dataclasses.MISSING,
+        "uuid_type": uuid.UUID,
+        "datetime_from_str": dt.datetime.fromisoformat,
+    }
+    # Writing into the dictionary of an instance is much cheaper than `object.__setattr__`,
+    # the latter is needed only for fields that are kept in slots.
+    has_dict = bool(getattr(cls, "__dictoffset__", 0))
+    obj_line = "    obj = new(cls)\n" + (
+        "    obj_dict = obj.__dict__\n" if has_dict else ""
+    )
+    line_seq = []
+    for i, field in enumerate(dataclasses.fields(cls)):
+        if field.default is not dataclasses.MISSING:
+            namespace[f"default_{i}"] = field.default
+            line_seq.append(f"    value = body.get({field.name!r}, default_{i})\n")
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"default_factory_{i}"] = field.default_factory
+            line_seq.append(
+                f"    value = body.get({field.name!r}, missing)\n"
+                f"    if value is missing:\n"
+                f"        value = default_factory_{i}()\n"
+            )
+        else:
+            line_seq.append(f"    value = body[{field.name!r}]\n")
+
+        field_type = type_from_name.get(field.name, field.type)
+        # Every event has an id and a timestamp, so these two are checked inline.
+        if field_type is uuid.UUID:
+            line_seq.append(
+                "    if type(value) is not uuid_type:\n        value = uuid_type(value)\n"
+            )
+        elif field_type is dt.datetime:
+            line_seq.append(
+                "    if type(value) is str:\n        value = datetime_from_str(value)\n"
+            )
+        else:
+            convert = _converter_from_class(field_type)
+            if convert is not None:
+                namespace[f"convert_{i}"] = convert
+                line_seq.append(f"    value = convert_{i}(value)\n")
+        if has_dict and not _is_slot(cls, field.name):
+            line_seq.append(f"    obj_dict[{field.name!r}] = value\n")
+        else:
+            line_seq.append(f"    setattr(obj, {field.name!r}, value)\n")
+
+    source = (
+        "def deserialize(body):\n" + obj_line + "".join(line_seq) + "    return obj\n"
+    )
+    exec(source, namespace)  # noqa: S102
+    deserialize: Deserializer = namespace["deserialize"]
+    deserialize.__qualname__ = f"deserialize_{cls.__qualname__}"
+    return deserialize
+
+
+def deserializer_from_class(cls: Type[Any]) -> Deserializer:
+    deserializer = _deserializer_from_class.get(cls)
+    if deserializer is None:
+        # The entry is filled in before compiling, so a dataclass that refers to itself doesn't recurse forever.
+        _deserializer_from_class[cls] = lambda body: _deserializer_from_class[cls](body)
+        deserializer = _deserializer_from_class[cls] = _compile_deserializer(cls)
+    return deserializer
@@ -41,10 +41,13 @@ class NoPublicConstructor(abc.ABCMeta):
 ID = typing.TypeVar("ID")
 
 
-class Entity(typing.Generic[ID], metaclass=NoPublicConstructor):
-    def __init__(self, *, unique_id: ID):
-        self._unique_id = unique_id
-        self._outbox: typing.Deque[Event] = deque()
+class _BaseEntity(typing.Generic[ID], metaclass=NoPublicConstructor):
+    # The behaviour shared by `Entity` and `SlottedEntity`. It has no slots of its own,
+    # so every instance either gets a dictionary from `Entity` or keeps its attributes in slots.
+    __slots__ = ()
+
+    _unique_id: ID
+    _outbox: typing.Deque[Event]
 
     @property
     def id(self) -> ID:
@@ -59,10 +62,72 @@ class Entity(typing.Generic[ID], metaclass=NoPublicConstructor):
         self._outbox.clear()
         return consumed_data
 
-    def as_dictionary(self) -> typing.Dict[str, typing.Any]:
-        return self.__dict__
-
     def __eq__(self, other: typing.Any) -> bool:
         if isinstance(other, self.__class__):
             return self.id == other.id
         return False
+
+
+class Entity(_BaseEntity[ID]):
+    def __init__(self, *, unique_id: ID):
+        self._unique_id = unique_id
+        self._outbox = deque()
+
+    def as_dictionary(self) -> typing.Dict[str, typing.Any]:
+        return self.__dict__
+
+
+# Type checkers see a slotted entity as any other entity, it's passed wherever an `Entity` is expected.
+if typing.TYPE_CHECKING:
+    _SlottedEntityBase = Entity
+else:
+    _SlottedEntityBase = _BaseEntity
+
+
+class SlottedEntity(_SlottedEntityBase[ID]):
+    """
+    An entity that keeps its attributes in slots instead of a dictionary.
+
+    Subclasses have to declare `__slots__` for attributes of their own, otherwise instances get a dictionary again.
+    The outbox is created the first time it's used, most entities that are loaded never put an event in it.
+    """
+
+    __slots__ = ("_unique_id", "_outbox_deque")
+
+    def __init__(self, *, unique_id: ID):
+        self._unique_id = unique_id
+        self._outbox_deque: typing.Optional[typing.Deque[Event]] = None
+
+    @property  # type: ignore[override]
+    def _outbox(self) -> typing.Deque[Event]:
+        if self._outbox_deque is None:
+            self._outbox_deque = deque()
+        return self._outbox_deque
+
+    @_outbox.setter
+    def _outbox(self, outbox: typing.Deque[Event]) -> None:
+        self._outbox_deque = outbox
+
+    def clear_outbox(self) -> typing.List[Event]:
+        if not self._outbox_deque:
+            return []
+        return super().clear_outbox()
+
+    def as_dictionary(self) -> typing.Dict[str, typing.Any]:
+        # The result has the same keys as the one of an entity without slots.
+        dictionary: typing.Dict[str, typing.Any] = {}
+        for cls in type(self).__mro__:
+            slot_seq = cls.__dict__.get("__slots__", ())
+            for name in [slot_seq] if isinstance(slot_seq, str) else slot_seq:
+                if name not in ("__dict__", "__weakref__") and hasattr(self, name):
+                    dictionary[name] = getattr(self, name)
+        del dictionary["_outbox_deque"]
+        dictionary["_outbox"] = (
+            deque() if self._outbox_deque is None else self._outbox_deque
+        )
+        dictionary.update(getattr(self, "__dict__", {}))
+        return dictionary
+
+
+# Checks of instances agree with type checkers.
+Entity.register(SlottedEntity)
@@ -1,11 +1,26 @@
 import dataclasses
 import datetime as dt
 import re
+import sys
 import uuid
-from typing import Any, Dict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 from eventual import util
 
+from .compiler import deserializer_from_class, serializer_from_class
+from .slots import slotted
+
 
 def _kebab_from_camel(s: str) -> str:
     return re.sub(r"(?<!^)(?=[A-Z])", "-", s).lower()
@@ -18,6 +33,36 @@ class EventPayload:
     subject: str
     body: Dict[str, Any]
 
+    def attempt_of(self, consumer: str) -> int:
+        # How many times `consumer` has failed to handle the event before it was sent again.
+        # A retry is sent to every consumer of the subject, so each of them counts only its own failures.
+        return int(self.body.get("_attempt_from_consumer", {}).get(consumer, 0))
+
+    def with_attempt(self, consumer: str, attempt: int) -> "EventPayload":
+        attempt_from_consumer = self.body.get("_attempt_from_consumer", {})
+        return EventPayload(
+            id=self.id,
+            occurred_on=self.occurred_on,
+            subject=self.subject,
+            body={
+                **self.body,
+                "_attempt_from_consumer": {**attempt_from_consumer, consumer: attempt},
+            },
+        )
+
+    def without_attempts(self) -> "EventPayload":
+        body = dict(self.body)
+        body.pop("_attempt_from_consumer", None)
+        return EventPayload(
+            id=self.id, occurred_on=self.occurred_on, subject=self.subject, body=body
+        )
+
+    def as_event(self) -> "Event":
+        event_class = _event_class_from_subject.get(self.subject)
+        if event_class is None:
+            raise ValueError(f"there is no event class with subject {self.subject}")
+        return cast("Event", deserializer_from_class(event_class)(self.body))
+
     @classmethod
     def from_event_body(cls, event_body: Dict[str, Any]) -> "EventPayload":
         event_id = event_body["id"]
@@ -29,14 +74,16 @@ class EventPayload:
         return cls(
             id=event_id,
             occurred_on=occurred_on,
-            subject=event_body["_subject"],
+            # Subjects of event classes and of registered handlers are interned,
+            # so looking them up by this one mostly compares pointers.
+            subject=sys.intern(event_body["_subject"]),
             body=event_body,
         )
 
     @classmethod
     def from_event(cls, event: "Event") -> "EventPayload":
-        body = dataclasses.asdict(event)
-        subject = _kebab_from_camel(type(event).__name__)
+        body = serializer_from_class(type(event))(event)
+        subject = type(event).__subject__
         body["_subject"] = subject
         return EventPayload(
             id=event.id,
@@ -46,14 +93,149 @@ class EventPayload:
         )
 
 
+class LazyEventPayload(EventPayload):
+    """
+    An event payload that is created from a message before its body is decoded.
+
+    Brokers usually know the id and the subject of a message from its headers, which is everything
+    the router needs to drop a duplicate or a message nobody handles. The encoded body is kept as is
+    and decoded only when `body` (or `occurred_on`, if it wasn't in the headers) is accessed for the first time.
+    """
+
+    _occurred_on: Optional[dt.datetime]
+    _encoded_body: Optional[Union[bytes, memoryview]]
+    _decode_body: Callable[[Union[bytes, memoryview]], Dict[str, Any]]
+    _body: Optional[Dict[str, Any]]
+
+    def __init__(
+        self,
+        id: uuid.UUID,
+        subject: str,
+        encoded_body: Union[bytes, memoryview],
+        decode_body: Callable[[Union[bytes, memoryview]], Dict[str, Any]],
+        occurred_on: Optional[dt.datetime] = None,
+    ):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "subject", sys.intern(subject))
+        object.__setattr__(self, "_occurred_on", occurred_on)
+        object.__setattr__(self, "_encoded_body", encoded_body)
+        object.__setattr__(self, "_decode_body", decode_body)
+        object.__setattr__(self, "_body", None)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Memory views can't be pickled, so a payload that is sent to another process is decoded first.
+        return EventPayload, (self.id, self.occurred_on, self.subject, self.body)
+
+    @property
+    def is_body_decoded(self) -> bool:
+        return self._body is not None
+
+    @property  # type: ignore[override]
+    def body(self) -> Dict[str, Any]:
+        if self._body is None:
+            object.__setattr__(
+                self,
+                "_body",
+                self._decode_body(cast(Union[bytes, memoryview], self._encoded_body)),
+            )
+            # The encoded body isn't needed anymore and can be large.
+            object.__setattr__(self, "_encoded_body", None)
+        return cast(Dict[str, Any], self._body)
+
+    @property  # type: ignore[override]
+    def occurred_on(self) -> dt.datetime:
+        if self._occurred_on is None:
+            occurred_on = self.body["occurred_on"]
+            if isinstance(occurred_on, str):
+                occurred_on = dt.datetime.fromisoformat(occurred_on)
+            object.__setattr__(self, "_occurred_on", occurred_on)
+        return cast(dt.datetime, self._occurred_on)
+
+
+_event_class_from_subject: Dict[str, Type["Event"]] = {}
+
+EventIdFactory = Callable[[], uuid.UUID]
+
+_event_id_factory: EventIdFactory = uuid.uuid4
+
+
+def set_event_id_factory(event_id_factory: EventIdFactory) -> None:
+    # E.g. `util.uuid7`, for time-ordered ids that keep inserts into indexes of schedules and integrity guards local.
+    global _event_id_factory
+    _event_id_factory = event_id_factory
+
+
+def _create_event_id() -> uuid.UUID:
+    return _event_id_factory()
+
+
+def event_class_from_subject(subject: str) -> Optional[Type["Event"]]:
+    return _event_class_from_subject.get(subject)
+
+
 @dataclasses.dataclass(frozen=True)
-class Event:
-    id: uuid.UUID = dataclasses.field(init=False, default_factory=uuid.uuid4)
+class _BaseEvent:
+    """
+    Fields and subjects shared by `Event` and `SlottedEvent`.
+
+    It has no slots of its own, so every instance either gets a dictionary from `Event`
+    or keeps all of its fields in slots when its class is derived from `SlottedEvent`.
+    """
+
+    __slots__ = ()
+
+    # Subject is derived from the class name once, when the class is created,
+    # a subclass can set its own `__subject__` instead.
+    __subject__: ClassVar[str] = "event"
+
+    id: uuid.UUID = dataclasses.field(init=False, default_factory=_create_event_id)
     occurred_on: dt.datetime = dataclasses.field(
         init=False, default_factory=util.tz_aware_utcnow
     )
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # `Event` and `SlottedEvent` are bases of events, not events of their own.
+        if cls.__module__ == __name__:
+            return
+        subject = cls.__dict__.get("__subject__") or _kebab_from_camel(cls.__name__)
+        cls.__subject__ = sys.intern(subject)
+        # Payloads are turned back into events by subject, so it can't belong to two classes.
+        # Only the same class created anew, e.g. by `slotted`, takes over the subject.
+        event_class = _event_class_from_subject.get(cls.__subject__)
+        if event_class is not None and (
+            event_class.__module__,
+            event_class.__qualname__,
+        ) != (cls.__module__, cls.__qualname__):
+            raise ValueError(
+                f"subject {cls.__subject__} already belongs to "
+                f"{event_class.__module__}.{event_class.__qualname__}"
+            )
+        # A slotted event is an `Event` as far as type checkers are concerned.
+        _event_class_from_subject[cls.__subject__] = cast(Type["Event"], cls)
+
+
+@dataclasses.dataclass(frozen=True)
+class Event(_BaseEvent):
     # I really want to keep events as simple as possible.
     # Events in `eventsourcing` have `.apply(entity)` and I don't know how I feel about that.
     # TODO: Does it make sense for event to be produced by different kinds of entities?
     # If yes, then `.apply(entity)` can become very messy and separate entities behavior from its class definition.
+    pass
+
+
+# Type checkers see a slotted event as any other event, it's passed wherever an `Event` is expected.
+if TYPE_CHECKING:
+    _SlottedEventBase = Event
+else:
+    _SlottedEventBase = _BaseEvent
+
+
+@slotted
+@dataclasses.dataclass(frozen=True)
+class SlottedEvent(_SlottedEventBase):
+    """
+    An event that keeps its fields in slots instead of a dictionary.
+
+    Subclasses have to be decorated with `slotted` too, otherwise instances get a dictionary again.
+    """
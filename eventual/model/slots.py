@@ -0,0 +1,53 @@
+"""
+Dataclasses keep their fields in a dictionary of every instance, which costs more memory than the fields themselves.
+`slotted` rebuilds a dataclass with `__slots__` instead, the same way `dataclass(slots=True)` does on Python 3.10.
+"""
+
+import dataclasses
+from typing import Any, List, Set, Type, TypeVar, cast
+
+T = TypeVar("T")
+
+
+def _getstate(self: Any) -> List[Any]:
+    return [getattr(self, field.name) for field in dataclasses.fields(self)]
+
+
+def _setstate(self: Any, state: List[Any]) -> None:
+    # Frozen dataclasses forbid `setattr`, which is what pickle uses to restore slots by default.
+    for field, value in zip(dataclasses.fields(self), state):
+        object.__setattr__(self, field.name, value)
+
+
+def slotted(cls: Type[T]) -> Type[T]:
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError(f"{cls.__qualname__} is not a dataclass")
+    # A single base without slots gives every instance a dictionary anyway.
+    for base in cls.__mro__[1:-1]:
+        if "__slots__" not in base.__dict__:
+            raise TypeError(f"{base.__qualname__} has no slots")
+
+    inherited_slot_set: Set[str] = set()
+    for base in cls.__mro__[1:-1]:
+        slot_seq = base.__dict__["__slots__"]
+        inherited_slot_set.update([slot_seq] if isinstance(slot_seq, str) else slot_seq)
+    field_name_seq = tuple(
+        field.name
+        for field in dataclasses.fields(cls)
+        if field.name not in inherited_slot_set
+    )
+
+    cls_dict = dict(cls.__dict__)
+    # Defaults of fields are class attributes that would conflict with slots, `__init__` has its own copy of them.
+    for name in field_name_seq:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = field_name_seq
+    # The qualified name is known to `__init_subclass__` of the bases already.
+    cls_dict["__qualname__"] = cls.__qualname__
+    cls_dict.setdefault("__getstate__", _getstate)
+    cls_dict.setdefault("__setstate__", _setstate)
+
+    metaclass: Any = type(cls)
+    return cast(Type[T], metaclass(cls.__name__, cls.__bases__, cls_dict))
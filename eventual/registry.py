@@ -1,8 +1,15 @@
+import sys
 from types import MappingProxyType
-from typing import Dict, Generic, List, Mapping
+from typing import Dict, Generic, List, Mapping, Optional, Union
 
 from eventual.abc.guarantee import Guarantee
-from eventual.abc.registry import HandlerRegistry, HandlerSpecification, MessageHandler
+from eventual.abc.registry import (
+    BatchMessageHandler,
+    HandlerRegistry,
+    HandlerSpecification,
+    MessageHandler,
+)
+from eventual.abc.retry import RetryPolicy
 from eventual.abc.work_unit import WU
 
 
@@ -18,22 +25,48 @@ class Registry(HandlerRegistry, Generic[WU]):
     def register(
         self,
         subject_seq: List[str],
-        handler: MessageHandler[WU],
+        handler: Union[MessageHandler[WU], BatchMessageHandler[WU]],
         guarantee: Guarantee,
         delay_on_exc: float,
+        max_in_flight: Optional[int] = None,
+        batch_max_size: Optional[int] = None,
+        batch_max_wait: float = 0.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        max_attempts: Optional[int] = None,
+        consumer: Optional[str] = None,
     ) -> None:
         if delay_on_exc <= 0:
             raise ValueError("delay has to be non-negative")
+        if max_in_flight is not None and max_in_flight <= 0:
+            raise ValueError("in-flight limit has to be positive")
+        if batch_max_size is not None and batch_max_size <= 0:
+            raise ValueError("batch size has to be positive")
+        if batch_max_wait < 0:
+            raise ValueError("batch wait has to be non-negative")
+        if max_attempts is not None and max_attempts <= 0:
+            raise ValueError("attempt limit has to be positive")
 
+        # Every subject shares the specification, so the in-flight limit applies to the handler as a whole.
+        handler_spec = HandlerSpecification[WU](
+            message_handler=handler,
+            guarantee=guarantee,
+            delay_on_exc=delay_on_exc,
+            max_in_flight=max_in_flight,
+            batch_max_size=batch_max_size,
+            batch_max_wait=batch_max_wait,
+            retry_policy=retry_policy,
+            max_attempts=max_attempts,
+            consumer=consumer or "",
+        )
         for subject in subject_seq:
+            # Subjects of events are interned too, so a lookup finds the key by identity.
+            subject = sys.intern(subject)
             if subject in self.handler_spec_from_subject:
                 # TODO: Change error type to something more appropriate.
                 raise ValueError(
                     "it is not possible to register multiple functions to handle the same event type"
                 )
-            self.handler_spec_from_subject[subject] = HandlerSpecification[WU](
-                message_handler=handler, guarantee=guarantee, delay_on_exc=delay_on_exc
-            )
+            self.handler_spec_from_subject[subject] = handler_spec
 
     def mapping(self) -> Mapping[str, HandlerSpecification[WU]]:
         return MappingProxyType(self.handler_spec_from_subject)
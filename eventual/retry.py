@@ -0,0 +1,102 @@
+import random
+import time
+
+from eventual.abc.retry import RetryPolicy
+
+
+class FixedDelay(RetryPolicy):
+    def __init__(self, delay: float):
+        if delay <= 0:
+            raise ValueError("delay has to be positive")
+        self._delay = delay
+
+    def delay(self, attempt: int) -> float:
+        return self._delay
+
+
+class ExponentialBackoff(RetryPolicy):
+    """
+    Multiplies the delay by `multiplier` after every failed attempt up to `max_delay`.
+
+    A `jitter` share of every delay is random, so that services that failed to handle the same event
+    because of a common dependency don't retry it all at the same moment.
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 1.0,
+        multiplier: float = 2.0,
+        max_delay: float = 300.0,
+        jitter: float = 0.5,
+    ):
+        if base_delay <= 0:
+            raise ValueError("delay has to be positive")
+        if multiplier < 1:
+            raise ValueError("multiplier can't be less than one")
+        if max_delay < base_delay:
+            raise ValueError("max delay can't be less than base delay")
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter has to be between 0 and 1")
+
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        exponent = max(0, attempt - 1)
+        try:
+            delay = min(self.max_delay, self.base_delay * self.multiplier**exponent)
+        except OverflowError:
+            delay = self.max_delay
+        return delay * (1 - self.jitter * random.random())
+
+
+class RetryBudget:
+    """
+    Caps retries to a share of throughput: every dispatched event adds `ratio` of a retry to the budget
+    and `min_per_second` retries are added every second, so that a service that handles little can still retry.
+
+    A retry that doesn't fit into the budget isn't dropped, instead it's delayed until the budget
+    has refilled enough, so retries are spread over time instead of coming back all at once.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_per_second: float = 1.0,
+        max_balance: float = 100.0,
+    ):
+        if ratio < 0:
+            raise ValueError("ratio has to be non-negative")
+        if min_per_second <= 0:
+            raise ValueError("rate has to be positive")
+        if max_balance < 1:
+            raise ValueError("balance has to fit at least one retry")
+
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+
+        self._balance = 0.0
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._balance = min(
+            self.max_balance,
+            self._balance + (now - self._updated_at) * self.min_per_second,
+        )
+        self._updated_at = now
+
+    def deposit(self) -> None:
+        self._refill()
+        self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def reserve(self, retry_count: int = 1) -> float:
+        # Returns how much longer the retries have to wait for the budget to cover them.
+        self._refill()
+        self._balance -= retry_count
+        if self._balance >= 0:
+            return 0.0
+        return -self._balance / self.min_per_second
@@ -1,14 +1,37 @@
-from typing import Any, AsyncContextManager
+import json
+import logging
+import math
+import traceback
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
+import anyio
 from anyio.abc import TaskGroup
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
+from eventual import util
 from eventual.abc.broker import Message, MessageBroker
 from eventual.abc.guarantee import Guarantee
-from eventual.abc.router import IntegrityGuard, MessageRouter
+from eventual.abc.registry import BatchMessageHandler, HandlerSpecification
+from eventual.abc.retry import RetryPolicy
+from eventual.abc.router import IntegrityGuard, MessageRouter, UnhandledSubjectPolicy
 from eventual.abc.schedule import EventScheduler
 from eventual.abc.work_unit import WU
 from eventual.model import EventPayload
 from eventual.registry import HandlerRegistry, MessageHandler
+from eventual.retry import FixedDelay, RetryBudget
+
+logger = logging.getLogger(__name__)
 
 
 def _manager_from_guarantee(
@@ -23,32 +46,241 @@ def _manager_from_guarantee(
     raise AssertionError("there are no more guarantees")
 
 
+def _batch_manager_from_guarantee(
+    msg_seq: Sequence[Message],
+    integrity_guard: IntegrityGuard[Any],
+    guarantee: Guarantee,
+) -> AsyncContextManager[List[EventPayload]]:
+    if guarantee == guarantee.AT_LEAST_ONCE:
+        return integrity_guard.handle_batch_at_least_once(msg_seq)
+    if guarantee == guarantee.EXACTLY_ONCE:
+        return integrity_guard.handle_batch_exactly_once(msg_seq)
+    if guarantee == guarantee.NO_MORE_THAN_ONCE:
+        return integrity_guard.handle_batch_no_more_than_once(msg_seq)
+    raise AssertionError("there are no more guarantees")
+
+
+def _retry_policy_from_spec(handler_spec: HandlerSpecification[Any]) -> RetryPolicy:
+    if handler_spec.retry_policy is not None:
+        return handler_spec.retry_policy
+    return FixedDelay(handler_spec.delay_on_exc)
+
+
+def _reason_from_exc(exc: Exception) -> str:
+    return "".join(traceback.format_exception_only(type(exc), exc)).strip()
+
+
+async def _retry_message_seq(
+    scheduler: EventScheduler[WU],
+    handler_spec: HandlerSpecification[WU],
+    message_seq: Sequence[Message],
+    exc: Exception,
+    retry_budget: Optional[RetryBudget],
+) -> None:
+    consumer = handler_spec.consumer
+    retry_seq: List[EventPayload] = []
+    for message in message_seq:
+        event_payload = message.event_payload.with_attempt(
+            consumer, message.event_payload.attempt_of(consumer) + 1
+        )
+        if (
+            handler_spec.max_attempts is not None
+            and event_payload.attempt_of(consumer) >= handler_spec.max_attempts
+        ):
+            # A poison message would otherwise come back forever, so it's parked until someone re-drives it.
+            await scheduler.park_dead_letter(event_payload, _reason_from_exc(exc))
+        else:
+            retry_seq.append(event_payload)
+    if not retry_seq:
+        return
+
+    delay = _retry_policy_from_spec(handler_spec).delay(
+        max(event_payload.attempt_of(consumer) for event_payload in retry_seq)
+    )
+    if retry_budget is not None:
+        # When a lot of events fail at once, retries are spread out instead of doubling the load.
+        delay += retry_budget.reserve(len(retry_seq))
+    await scheduler.schedule_event_seq(retry_seq, delay=delay)
+
+
 async def _handle_with_retry(
     integrity_guard: IntegrityGuard[WU],
     scheduler: EventScheduler[WU],
-    fn: MessageHandler[WU],
+    handler_spec: HandlerSpecification[WU],
     message: Message,
-    guarantee: Guarantee,
-    delay_on_exc: float,
+    retry_budget: Optional[RetryBudget] = None,
 ) -> None:
+    fn = cast(MessageHandler[WU], handler_spec.message_handler)
     try:
-        async with _manager_from_guarantee(message, integrity_guard, guarantee):
+        async with _manager_from_guarantee(
+            message, integrity_guard, handler_spec.guarantee
+        ):
             await fn(message, scheduler)
-    except Exception:
-        await scheduler.schedule_event(
-            message.event_payload,
-            delay=delay_on_exc,
-        )
+    except Exception as exc:
+        # A failure is over once the event is retried or parked, whichever way the message was dispatched.
+        logger.exception("%s has failed to handle %r", handler_spec.consumer, message)
+        await _retry_message_seq(scheduler, handler_spec, [message], exc, retry_budget)
         message.acknowledge()
-        raise
+
+
+async def _handle_with_retry_and_release(
+    semaphore_seq: List[anyio.Semaphore],
+    integrity_guard: IntegrityGuard[WU],
+    scheduler: EventScheduler[WU],
+    handler_spec: HandlerSpecification[WU],
+    message: Message,
+    retry_budget: Optional[RetryBudget] = None,
+) -> None:
+    try:
+        await _handle_with_retry(
+            integrity_guard, scheduler, handler_spec, message, retry_budget
+        )
+    finally:
+        for semaphore in semaphore_seq:
+            semaphore.release()
+
+
+async def _handle_batch_with_retry(
+    integrity_guard: IntegrityGuard[WU],
+    scheduler: EventScheduler[WU],
+    handler_spec: HandlerSpecification[WU],
+    message_seq: List[Message],
+    retry_budget: Optional[RetryBudget] = None,
+) -> None:
+    fn = cast(BatchMessageHandler[WU], handler_spec.message_handler)
+    try:
+        async with _batch_manager_from_guarantee(
+            message_seq, integrity_guard, handler_spec.guarantee
+        ):
+            await fn(message_seq, scheduler)
+    except Exception as exc:
+        logger.exception(
+            "%s has failed to handle a batch of %d",
+            handler_spec.consumer,
+            len(message_seq),
+        )
+        await _retry_message_seq(
+            scheduler, handler_spec, message_seq, exc, retry_budget
+        )
+        type(message_seq[0]).acknowledge_many(message_seq)
+
+
+_BatchItem = Tuple[List[anyio.Semaphore], Message]
+
+
+async def _handle_batch_stream(
+    batch_stream: MemoryObjectReceiveStream[_BatchItem],
+    handler_spec: HandlerSpecification[WU],
+    integrity_guard: IntegrityGuard[WU],
+    scheduler: EventScheduler[WU],
+    retry_budget: Optional[RetryBudget] = None,
+) -> None:
+    async with batch_stream:
+        while True:
+            try:
+                item_seq = await util.receive_batch(
+                    batch_stream,
+                    cast(int, handler_spec.batch_max_size),
+                    handler_spec.batch_max_wait,
+                )
+            except anyio.EndOfStream:
+                break
+
+            try:
+                await _handle_batch_with_retry(
+                    integrity_guard,
+                    scheduler,
+                    handler_spec,
+                    [message for _, message in item_seq],
+                    retry_budget,
+                )
+            finally:
+                for semaphore_seq, _ in item_seq:
+                    for semaphore in semaphore_seq:
+                        semaphore.release()
+
+
+_PartitionItem = Tuple[List[anyio.Semaphore], HandlerSpecification[Any], Message]
+
+
+def _partition_hash(partition_value: Any) -> int:
+    try:
+        return hash(partition_value)
+    except TypeError:
+        # Lists and objects decoded from a body aren't hashable, so equal values are hashed by their encoding.
+        return hash(json.dumps(partition_value, sort_keys=True, default=str))
+
+
+async def _handle_partition(
+    partition_stream: MemoryObjectReceiveStream[_PartitionItem],
+    integrity_guard: IntegrityGuard[WU],
+    scheduler: EventScheduler[WU],
+    retry_budget: Optional[RetryBudget] = None,
+) -> None:
+    async with partition_stream:
+        async for semaphore_seq, handler_spec, message in partition_stream:
+            # A failed event is retried, which means it comes back out of order.
+            await _handle_with_retry_and_release(
+                semaphore_seq,
+                integrity_guard,
+                scheduler,
+                handler_spec,
+                message,
+                retry_budget,
+            )
+
+
+async def _pump_messages(
+    message_stream: AsyncIterable[Message],
+    message_send_stream: MemoryObjectSendStream[Message],
+) -> None:
+    async with message_send_stream:
+        async for message in message_stream:
+            await message_send_stream.send(message)
 
 
 class Router(MessageRouter):
     def __init__(
         self,
         task_group: TaskGroup,
+        max_in_flight: Optional[int] = None,
+        dedup_batch_max_size: int = 1,
+        dedup_batch_max_wait: float = 0.0,
+        partition_key: Optional[str] = None,
+        partition_count: int = 1,
+        unhandled_subject_policy: UnhandledSubjectPolicy = UnhandledSubjectPolicy.DROP,
+        retry_budget: Optional[RetryBudget] = None,
     ):
+        if max_in_flight is not None and max_in_flight <= 0:
+            raise ValueError("in-flight limit has to be positive")
+        if dedup_batch_max_size <= 0:
+            raise ValueError("batch size has to be positive")
+        if dedup_batch_max_wait < 0:
+            raise ValueError("batch wait has to be non-negative")
+        if partition_count <= 0:
+            raise ValueError("partition count has to be positive")
+
         self.task_group = task_group
+        self.max_in_flight = max_in_flight
+        self.dedup_batch_max_size = dedup_batch_max_size
+        self.dedup_batch_max_wait = dedup_batch_max_wait
+        # Events that have the same value of `partition_key` in their body are handled one by one
+        # in the order they were received, events from different partitions are handled concurrently.
+        self.partition_key = partition_key
+        self.partition_count = partition_count
+        self.unhandled_subject_policy = unhandled_subject_policy
+        # Shared by every handler, so that a failing dependency doesn't turn into a retry storm.
+        self.retry_budget = retry_budget
+
+        self._handler_spec_from_subject: Mapping[str, HandlerSpecification[Any]] = {}
+        self._in_flight_semaphore: Optional[anyio.Semaphore] = None
+        self._spec_semaphore_from_spec_id: Dict[int, anyio.Semaphore] = {}
+        self._partition_send_stream_seq: List[
+            MemoryObjectSendStream[_PartitionItem]
+        ] = []
+        self._batch_send_stream_from_subject: Dict[
+            str, MemoryObjectSendStream[_BatchItem]
+        ] = {}
 
     async def dispatch_from_broker(
         self,
@@ -57,35 +289,270 @@ class Router(MessageRouter):
         integrity_guard: IntegrityGuard[WU],
         scheduler: EventScheduler[WU],
     ) -> None:
-        handler_spec_from_subject = handler_registry.mapping()
-        message_stream = message_broker.message_receive_stream()
+        self._handler_spec_from_subject = handler_registry.mapping()
+        # Otherwise the first event out of attempts would fail on its way to the dead letters.
+        if not scheduler.parks_dead_letters and any(
+            spec.max_attempts is not None
+            for spec in self._handler_spec_from_subject.values()
+        ):
+            raise ValueError("attempt limit needs a schedule that keeps dead letters")
+        # Otherwise the first message nobody handles would stop the router.
+        if (
+            self.unhandled_subject_policy == UnhandledSubjectPolicy.FORWARD
+            and not message_broker.forwards_messages
+        ):
+            raise ValueError("broker doesn't forward messages")
 
-        async for message in message_stream:
-            is_event_handled = await integrity_guard.is_dispatch_forbidden(
-                message.event_payload.id
+        # Semaphores are created here and not in the constructor,
+        # because they have to be bound to the running event loop.
+        if self.max_in_flight is not None:
+            self._in_flight_semaphore = anyio.Semaphore(self.max_in_flight)
+        for spec in self._handler_spec_from_subject.values():
+            if spec.max_in_flight is not None:
+                self._spec_semaphore_from_spec_id.setdefault(
+                    id(spec), anyio.Semaphore(spec.max_in_flight)
+                )
+
+        if self.partition_key is not None:
+            # When handlers are bounded by the in-flight limit there is no point to block the whole router
+            # on a single busy partition, otherwise a partition can hold only the message being handled.
+            partition_buffer_size = math.inf if self.max_in_flight is not None else 0
+            for _ in range(self.partition_count):
+                partition_stream_pair: Tuple[
+                    MemoryObjectSendStream[_PartitionItem],
+                    MemoryObjectReceiveStream[_PartitionItem],
+                ] = anyio.create_memory_object_stream(partition_buffer_size)
+                partition_send_stream, partition_stream = partition_stream_pair
+                self._partition_send_stream_seq.append(partition_send_stream)
+                self.task_group.start_soon(
+                    _handle_partition,
+                    partition_stream,
+                    integrity_guard,
+                    scheduler,
+                    self.retry_budget,
+                )
+
+        for subject, spec in self._handler_spec_from_subject.items():
+            if spec.is_batch:
+                # Buffer lets the router fill the next batch while the current one is being handled.
+                batch_stream_pair: Tuple[
+                    MemoryObjectSendStream[_BatchItem],
+                    MemoryObjectReceiveStream[_BatchItem],
+                ] = anyio.create_memory_object_stream(cast(int, spec.batch_max_size))
+                batch_send_stream, batch_stream = batch_stream_pair
+                self._batch_send_stream_from_subject[subject] = batch_send_stream
+                self.task_group.start_soon(
+                    _handle_batch_stream,
+                    batch_stream,
+                    spec,
+                    integrity_guard,
+                    scheduler,
+                    self.retry_budget,
+                )
+
+        # Brokers that can see the subject before decoding a message don't have to decode messages
+        # that nobody is going to handle. Messages the policy acknowledges or forwards have to be delivered.
+        if self.unhandled_subject_policy == UnhandledSubjectPolicy.DROP:
+            message_broker.restrict_to_subjects(
+                frozenset(self._handler_spec_from_subject)
             )
-            if is_event_handled:
-                # There is no guarantee that messages that we've marked as handled
-                # were actually acknowledged, so it's not an error to get the handled message.
-                # Furthermore, even if someone sends the same message multiple times,
-                # but we consider it handled, we do nothing in a truly idempotent manner.
-                message.acknowledge()
-                continue
-
-            handler_spec = handler_spec_from_subject.get(message.event_payload.subject)
-            if handler_spec is None:
-                continue
 
+        try:
+            await self._dispatch_from_message_stream(
+                message_broker, integrity_guard, scheduler
+            )
+        finally:
+            for partition_send_stream in self._partition_send_stream_seq:
+                partition_send_stream.close()
+            for batch_send_stream in self._batch_send_stream_from_subject.values():
+                batch_send_stream.close()
+
+    async def _dispatch_from_message_stream(
+        self,
+        message_broker: MessageBroker,
+        integrity_guard: IntegrityGuard[WU],
+        scheduler: EventScheduler[WU],
+    ) -> None:
+        message_stream = message_broker.message_receive_stream()
+
+        if self.dedup_batch_max_size == 1:
+            async for message in message_stream:
+                # Subject is checked first, because it's free, while checking the id can cost a query.
+                handler_spec = self._handler_spec_from_subject.get(
+                    message.event_payload.subject
+                )
+                if handler_spec is None:
+                    await self._dispose_of_unhandled(message, message_broker)
+                    continue
+
+                is_event_handled = await integrity_guard.is_dispatch_forbidden(
+                    message.event_payload.id
+                )
+                await self._dispatch(
+                    message, handler_spec, is_event_handled, integrity_guard, scheduler
+                )
+            return
+
+        # Messages are moved to a memory stream, because it's safe to cancel a receive from it
+        # while waiting for the batch to fill up, which is not true for an arbitrary async iterable.
+        message_stream_pair: Tuple[
+            MemoryObjectSendStream[Message], MemoryObjectReceiveStream[Message]
+        ] = anyio.create_memory_object_stream(self.dedup_batch_max_size)
+        message_send_stream, message_receive_stream = message_stream_pair
+
+        async with anyio.create_task_group() as pump_group:
+            pump_group.start_soon(_pump_messages, message_stream, message_send_stream)
+            async with message_receive_stream:
+                while True:
+                    try:
+                        message_seq = await util.receive_batch(
+                            message_receive_stream,
+                            self.dedup_batch_max_size,
+                            self.dedup_batch_max_wait,
+                        )
+                    except anyio.EndOfStream:
+                        break
+
+                    handled_message_seq = []
+                    for message in message_seq:
+                        if (
+                            message.event_payload.subject
+                            in self._handler_spec_from_subject
+                        ):
+                            handled_message_seq.append(message)
+                        else:
+                            await self._dispose_of_unhandled(message, message_broker)
+                    if not handled_message_seq:
+                        continue
+
+                    # One lookup for the whole batch instead of a round trip per message.
+                    forbidden_event_id_set = (
+                        await integrity_guard.which_dispatch_forbidden(
+                            [
+                                message.event_payload.id
+                                for message in handled_message_seq
+                            ]
+                        )
+                    )
+                    for message in handled_message_seq:
+                        await self._dispatch(
+                            message,
+                            self._handler_spec_from_subject[
+                                message.event_payload.subject
+                            ],
+                            message.event_payload.id in forbidden_event_id_set,
+                            integrity_guard,
+                            scheduler,
+                        )
+
+    async def _dispose_of_unhandled(
+        self, message: Message, message_broker: MessageBroker
+    ) -> None:
+        if self.unhandled_subject_policy == UnhandledSubjectPolicy.DROP:
+            return
+        if self.unhandled_subject_policy == UnhandledSubjectPolicy.FORWARD:
+            await message_broker.forward_message(message)
+        message.acknowledge()
+
+    async def _dispatch(
+        self,
+        message: Message,
+        handler_spec: HandlerSpecification[WU],
+        is_event_handled: bool,
+        integrity_guard: IntegrityGuard[WU],
+        scheduler: EventScheduler[WU],
+    ) -> None:
+        if is_event_handled:
+            # There is no guarantee that messages that we've marked as handled
+            # were actually acknowledged, so it's not an error to get the handled message.
+            # Furthermore, even if someone sends the same message multiple times,
+            # but we consider it handled, we do nothing in a truly idempotent manner.
+            message.acknowledge()
+            return
+
+        # Waiting for a free slot stops us from pulling more messages from the broker,
+        # so the amount of messages held in memory stays bounded when handlers stall.
+        semaphore_seq: List[anyio.Semaphore] = []
+        spec_semaphore = self._spec_semaphore_from_spec_id.get(id(handler_spec))
+        if spec_semaphore is not None:
+            semaphore_seq.append(spec_semaphore)
+        if self._in_flight_semaphore is not None:
+            semaphore_seq.append(self._in_flight_semaphore)
+        await self._acquire(semaphore_seq)
+
+        await self._start_dispatch(
+            semaphore_seq, handler_spec, message, integrity_guard, scheduler
+        )
+
+    @staticmethod
+    async def _acquire(semaphore_seq: List[anyio.Semaphore]) -> None:
+        acquired_seq: List[anyio.Semaphore] = []
+        try:
+            for semaphore in semaphore_seq:
+                await semaphore.acquire()
+                acquired_seq.append(semaphore)
+        except BaseException:
+            for semaphore in acquired_seq:
+                semaphore.release()
+            raise
+
+    async def _start_dispatch(
+        self,
+        semaphore_seq: List[anyio.Semaphore],
+        handler_spec: HandlerSpecification[WU],
+        message: Message,
+        integrity_guard: IntegrityGuard[WU],
+        scheduler: EventScheduler[WU],
+    ) -> None:
+        try:
             # We save every event that we attempt to dispatch, not every event we receive,
             # because we can get a lot of events that we do not care about.
             await integrity_guard.record_dispatch_attempt(message.event_payload)
+        except BaseException:
+            for semaphore in semaphore_seq:
+                semaphore.release()
+            raise
 
-            self.task_group.start_soon(
-                _handle_with_retry,
-                integrity_guard,
-                scheduler,
-                handler_spec.message_handler,
-                message,
-                handler_spec.guarantee,
-                handler_spec.delay_on_exc,
+        if self.retry_budget is not None:
+            self.retry_budget.deposit()
+
+        try:
+            batch_send_stream = self._batch_send_stream_from_subject.get(
+                message.event_payload.subject
             )
+            if batch_send_stream is not None:
+                await batch_send_stream.send((semaphore_seq, message))
+                return
+
+            partition_send_stream = self._partition_send_stream_from_message(message)
+            if partition_send_stream is not None:
+                await partition_send_stream.send((semaphore_seq, handler_spec, message))
+                return
+        except BaseException:
+            for semaphore in semaphore_seq:
+                semaphore.release()
+            raise
+
+        self.task_group.start_soon(
+            _handle_with_retry_and_release,
+            semaphore_seq,
+            integrity_guard,
+            scheduler,
+            handler_spec,
+            message,
+            self.retry_budget,
+        )
+
+    def _partition_send_stream_from_message(
+        self, message: Message
+    ) -> Optional[MemoryObjectSendStream[_PartitionItem]]:
+        if not self._partition_send_stream_seq:
+            return None
+        partition_value = message.event_payload.body.get(cast(str, self.partition_key))
+        if partition_value is None:
+            # There is nothing to order by, so the event doesn't have to wait for anything.
+            return None
+        partition_index = _partition_hash(partition_value) % len(
+            self._partition_send_stream_seq
+        )
+        return self._partition_send_stream_seq[partition_index]
@@ -1,12 +1,17 @@
 import abc
 import datetime as dt
+import heapq
+import itertools
+import uuid
+import warnings
+from typing import List, Optional, Sequence, Set, Tuple
 
 import anyio
-from anyio.abc import TaskGroup
+from anyio.abc import TaskGroup, TaskStatus
 from anyio.streams.memory import MemoryObjectSendStream
 
 from eventual import util
-from eventual.abc.schedule import EventSchedule, EventScheduler
+from eventual.abc.schedule import EventSchedule, EventScheduler, Shard
 from eventual.abc.work_unit import WU
 from eventual.model import EventPayload
 
@@ -16,6 +21,11 @@ async def enqueue_after_delay(
     event_payload: EventPayload,
     delay: float,
 ) -> None:
+    warnings.warn(
+        "enqueue_after_delay is deprecated, delayed events are released by Scheduler",
+        DeprecationWarning,
+        stacklevel=2,
+    )
     async with event_payload_send_stream:
         await anyio.sleep(delay)
         await event_payload_send_stream.send(event_payload)
@@ -27,9 +37,101 @@ class Scheduler(EventScheduler[WU], abc.ABC):
         event_body_send_stream: MemoryObjectSendStream[EventPayload],
         event_schedule: EventSchedule[WU],
         task_group: TaskGroup,
+        recovery_page_size: int = 100,
+        recovery_max_rate: Optional[float] = None,
+        confirmation_batch_max_size: int = 100,
+        confirmation_batch_max_wait: float = 0.0,
+        node_id: Optional[str] = None,
+        node_ttl: float = 30.0,
     ):
-        super().__init__(event_body_send_stream, event_schedule)
+        if recovery_page_size <= 0:
+            raise ValueError("page size has to be positive")
+        if recovery_max_rate is not None and recovery_max_rate <= 0:
+            raise ValueError("rate has to be positive")
+        if node_ttl <= 0:
+            raise ValueError("node ttl has to be positive")
+
+        super().__init__(
+            event_body_send_stream,
+            event_schedule,
+            confirmation_batch_max_size,
+            confirmation_batch_max_wait,
+        )
         self.task_group = task_group
+        # Recovery reads the schedule page by page and sends no more than `recovery_max_rate` events per second,
+        # so that a large backlog of unclaimed events doesn't flood the broker and the schedule storage.
+        self.recovery_page_size = recovery_page_size
+        self.recovery_max_rate = recovery_max_rate
+        # Nodes that share the schedule recover only their own shard of entries: live nodes are ordered
+        # by id and every node takes the entries that hash to its position.
+        self.node_id = node_id if node_id is not None else uuid.uuid4().hex
+        self.node_ttl = node_ttl
+
+        # Every delayed event waits in a single heap ordered by the time it's due,
+        # instead of having a sleeping task of its own.
+        self._delay_queue: List[Tuple[float, int, EventPayload]] = []
+        self._delay_queue_counter = itertools.count()
+        self._delay_queue_changed: Optional[anyio.Event] = None
+        # Unless something runs `release_due_event_payloads`, a task that releases delayed events
+        # is started in `task_group` when there are some and it ends once every one of them is sent.
+        self._is_releasing = False
+        self._is_releasing_until_cancelled = False
+
+    def _enqueue_after_delay(self, event_payload: EventPayload, delay: float) -> None:
+        entry = (
+            anyio.current_time() + delay,
+            next(self._delay_queue_counter),
+            event_payload,
+        )
+        heapq.heappush(self._delay_queue, entry)
+        # Only an event that is due earlier than every other one can change how long to wait.
+        if self._delay_queue[0] is entry and self._delay_queue_changed is not None:
+            self._delay_queue_changed.set()
+        if not self._is_releasing and not self._is_releasing_until_cancelled:
+            self._is_releasing = True
+            self.task_group.start_soon(self._release_until_empty)
+
+    async def release_due_event_payloads(
+        self, *, task_status: TaskStatus = anyio.TASK_STATUS_IGNORED
+    ) -> None:
+        # Runs until cancelled, e.g. in a task group that is cancelled upon shutdown,
+        # unlike the task in `task_group` that is waited for.
+        self._is_releasing_until_cancelled = True
+        task_status.started()
+        try:
+            await self._release(until_empty=False)
+        finally:
+            self._is_releasing_until_cancelled = False
+
+    async def _release_until_empty(self) -> None:
+        try:
+            await self._release(until_empty=True)
+        finally:
+            self._is_releasing = False
+
+    async def _release(self, until_empty: bool) -> None:
+        while True:
+            if not self._delay_queue:
+                if until_empty:
+                    return
+                self._delay_queue_changed = anyio.Event()
+                await self._delay_queue_changed.wait()
+                continue
+
+            due_at, _, _ = self._delay_queue[0]
+            delay = due_at - anyio.current_time()
+            if delay > 0:
+                self._delay_queue_changed = anyio.Event()
+                with anyio.move_on_after(delay):
+                    await self._delay_queue_changed.wait()
+                continue
+
+            entry = heapq.heappop(self._delay_queue)
+            try:
+                await self.event_payload_send_stream.send(entry[2])
+            except BaseException:
+                heapq.heappush(self._delay_queue, entry)
+                raise
 
     async def schedule_event(
         self,
@@ -38,22 +140,80 @@ class Scheduler(EventScheduler[WU], abc.ABC):
     ) -> None:
         send_after = util.tz_aware_utcnow() + dt.timedelta(seconds=delay)
         await self._event_schedule.add_claimed_event_entry(event_payload, send_after)
-        self.task_group.start_soon(
-            enqueue_after_delay,
-            self.event_payload_send_stream.clone(),
-            event_payload,
-            delay,
+        self._enqueue_after_delay(event_payload, delay)
+
+    async def schedule_event_seq(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        delay: float = 0.0,
+    ) -> None:
+        send_after = util.tz_aware_utcnow() + dt.timedelta(seconds=delay)
+        await self._event_schedule.add_claimed_event_entries(
+            event_payload_seq, send_after
         )
-        await self.schedule_every_open_unclaimed_event_entry_due_now()
+        for event_payload in event_payload_seq:
+            self._enqueue_after_delay(event_payload, delay)
+
+    async def _current_shard(self) -> Optional[Shard]:
+        await self._event_schedule.record_node_heartbeat(self.node_id, self.node_ttl)
+        node_id_seq = sorted(await self._event_schedule.every_live_node_id())
+        if self.node_id not in node_id_seq:
+            return None
+        return Shard(node_id_seq.index(self.node_id), len(node_id_seq))
 
     async def schedule_every_open_unclaimed_event_entry_due_now(
         self,
     ) -> None:
-        async for event_payload in self._event_schedule.every_open_unclaimed_event_entry_due_now():
-            delay = 0.0
-            self.task_group.start_soon(
-                enqueue_after_delay,
-                self.event_payload_send_stream.clone(),
-                event_payload,
-                delay,
+        shard = await self._current_shard()
+        seen_event_id_set: Set[uuid.UUID] = set()
+        while True:
+            page_size = await self._schedule_page(shard, seen_event_id_set)
+            if page_size < self.recovery_page_size:
+                return
+            if self.recovery_max_rate is not None:
+                await anyio.sleep(page_size / self.recovery_max_rate)
+
+    async def _schedule_page(
+        self, shard: Optional[Shard], seen_event_id_set: Set[uuid.UUID]
+    ) -> int:
+        # Every page is a new query: entries are claimed when they are read,
+        # so the next query starts where the previous one has stopped.
+        page_size = 0
+        for event_payload in await self._event_schedule.claim_due_event_entries(
+            self.node_id, self.recovery_page_size, shard
+        ):
+            if event_payload.id in seen_event_id_set:
+                # The claim has already expired or the schedule doesn't claim entries upon reading.
+                continue
+            seen_event_id_set.add(event_payload.id)
+            self._enqueue_after_delay(event_payload, 0.0)
+            page_size += 1
+        return page_size
+
+    async def renew_claims_periodically(self, interval: float) -> None:
+        # Events that wait in the delay queue for longer than `claim_duration` would otherwise be
+        # recovered and sent by another node, so their claims are extended while they wait.
+        while True:
+            await anyio.sleep(interval)
+            event_id_seq = [
+                event_payload.id for _, _, event_payload in self._delay_queue
+            ]
+            if event_id_seq:
+                await self._event_schedule.renew_event_entry_claims(
+                    self.node_id, event_id_seq
+                )
+
+    async def record_heartbeats_periodically(self) -> None:
+        # A node stays in the list of live nodes for as long as it keeps recording heartbeats,
+        # no matter how rarely it sweeps, so its shard isn't taken over by other nodes in between.
+        while True:
+            await self._event_schedule.record_node_heartbeat(
+                self.node_id, self.node_ttl
             )
+            await anyio.sleep(self.node_ttl / 3)
+
+    async def sweep_unclaimed_periodically(self, interval: float) -> None:
+        # The first sweep starts right away and recovers whatever has been left by a previous run.
+        while True:
+            await self.schedule_every_open_unclaimed_event_entry_due_now()
+            await anyio.sleep(interval)
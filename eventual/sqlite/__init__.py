@@ -0,0 +1,11 @@
+from .database import SqliteDatabase
+from .integrity_guard import SqliteIntegrityGuard
+from .schedule import SqliteEventSchedule
+from .work_unit import SqliteWorkUnit
+
+__all__ = [
+    "SqliteDatabase",
+    "SqliteEventSchedule",
+    "SqliteIntegrityGuard",
+    "SqliteWorkUnit",
+]
@@ -0,0 +1,218 @@
+import contextlib
+import contextvars
+import itertools
+import sqlite3
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
+
+import anyio
+
+from eventual.abc.work_unit import InterruptWork
+from eventual.model.codec import JsonCodec, PayloadCodec
+
+from .work_unit import SqliteWorkUnit
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS event_entry (
+    id BLOB PRIMARY KEY,
+    body BLOB NOT NULL,
+    shard_key INTEGER NOT NULL,
+    due_after REAL,
+    claimed_at REAL NOT NULL,
+    claimed_by TEXT
+);
+CREATE INDEX IF NOT EXISTS event_entry_recovery_idx
+    ON event_entry (claimed_at, due_after);
+CREATE TABLE IF NOT EXISTS dead_letter_entry (
+    id BLOB PRIMARY KEY,
+    body BLOB NOT NULL,
+    reason TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS node (
+    id TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS handled_event (
+    id BLOB PRIMARY KEY,
+    guarantee TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dispatched_event (
+    id BLOB PRIMARY KEY,
+    body BLOB NOT NULL,
+    attempt_count INTEGER NOT NULL
+);
+"""
+
+
+class SqliteDatabase:
+    """
+    A SQLite database in WAL mode shared by the schedule and the integrity guard.
+
+    Statements run in a worker thread one at a time. A work unit holds the connection for as long
+    as its transaction is open, statements made by the task that opened it (or by a nested work unit,
+    which becomes a savepoint) join the transaction, statements made by other tasks wait for it to end.
+    Queries made outside of a work unit go to a second connection instead, WAL lets it read
+    the last committed state while a transaction is open, so they never wait for one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout: float = 5.0,
+        cached_statements: int = 128,
+        codec: Optional[PayloadCodec] = None,
+    ):
+        self.path = path
+        # Payloads are stored the way they are sent, in frames of the codec.
+        self.codec = codec or JsonCodec()
+        # The connection is in autocommit mode, transactions are opened explicitly by work units.
+        self._connection = self._connect(busy_timeout, cached_statements)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        # It's safe in WAL mode: a power loss can only lose the last transactions, not corrupt the database.
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(_SCHEMA)
+        # An in-memory database exists only for the connection that created it.
+        self._read_connection: Optional[sqlite3.Connection] = None
+        if path != ":memory:":
+            self._read_connection = self._connect(busy_timeout, cached_statements)
+            self._read_connection.execute("PRAGMA query_only = ON")
+        self._read_thread_limiter = anyio.CapacityLimiter(1)
+
+        self._lock = anyio.Lock()
+        self._thread_limiter = anyio.CapacityLimiter(1)
+        self._open_work_unit: Optional[SqliteWorkUnit] = None
+        self._work_unit_var: contextvars.ContextVar[Optional[SqliteWorkUnit]] = (
+            contextvars.ContextVar(f"sqlite_work_unit_{id(self)}", default=None)
+        )
+        self._savepoint_counter = itertools.count()
+        # `WorkUnit.create` takes no arguments, so the class a work unit is created with knows its database.
+        self.work_unit_class: Type[SqliteWorkUnit] = type(
+            SqliteWorkUnit.__name__, (SqliteWorkUnit,), {"database": self}
+        )
+
+    def _connect(
+        self, busy_timeout: float, cached_statements: int
+    ) -> sqlite3.Connection:
+        return sqlite3.connect(
+            self.path,
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=cached_statements,
+        )
+
+    def _owns_transaction(self) -> bool:
+        work_unit = self._work_unit_var.get()
+        return work_unit is not None and work_unit is self._open_work_unit
+
+    async def _run_in_thread(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return await anyio.to_thread.run_sync(
+            fn, self._connection, limiter=self._thread_limiter
+        )
+
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        # Runs `fn` within the transaction of the current work unit or on its own if there is none.
+        if self._owns_transaction():
+            return await self._run_in_thread(fn)
+        async with self._lock:
+            return await self._run_in_thread(fn)
+
+    async def execute(self, sql: str, parameters: Sequence[Any] = ()) -> List[Any]:
+        return await self.run(lambda c: c.execute(sql, parameters).fetchall())
+
+    async def query(self, sql: str, parameters: Sequence[Any] = ()) -> List[Any]:
+        # Reads within a work unit have to see what it has written so far.
+        if self._read_connection is None or self._owns_transaction():
+            return await self.execute(sql, parameters)
+        read_connection = self._read_connection
+        return await anyio.to_thread.run_sync(
+            lambda: read_connection.execute(sql, parameters).fetchall(),
+            limiter=self._read_thread_limiter,
+        )
+
+    async def execute_many(
+        self, sql: str, parameter_seq: Iterable[Sequence[Any]]
+    ) -> None:
+        parameter_seq = list(parameter_seq)
+        if not parameter_seq:
+            return
+        await self.run(lambda c: c.executemany(sql, parameter_seq))
+
+    async def _end(self, *sql_seq: str) -> None:
+        # A transaction has to be finished even if the task that owns it is being cancelled.
+        def end(connection: sqlite3.Connection) -> None:
+            for sql in sql_seq:
+                connection.execute(sql)
+
+        with anyio.CancelScope(shield=True):
+            await self._run_in_thread(end)
+
+    @contextlib.asynccontextmanager
+    async def create_work_unit(self) -> AsyncGenerator[SqliteWorkUnit, None]:
+        if self._owns_transaction():
+            savepoint = f"work_unit_{next(self._savepoint_counter)}"
+            async with self._transaction(
+                f"SAVEPOINT {savepoint}",
+                (f"RELEASE {savepoint}",),
+                (f"ROLLBACK TO {savepoint}", f"RELEASE {savepoint}"),
+            ) as work_unit:
+                yield work_unit
+            return
+
+        async with self._lock:
+            async with self._transaction(
+                "BEGIN IMMEDIATE", ("COMMIT",), ("ROLLBACK",)
+            ) as work_unit:
+                yield work_unit
+
+    @contextlib.asynccontextmanager
+    async def _transaction(
+        self,
+        begin_sql: str,
+        commit_sql_seq: Sequence[str],
+        rollback_sql_seq: Sequence[str],
+    ) -> AsyncGenerator[SqliteWorkUnit, None]:
+        work_unit = self.work_unit_class()
+        await self._run_in_thread(lambda c: c.execute(begin_sql))
+        outer_work_unit = self._open_work_unit
+        self._open_work_unit = work_unit
+        token = self._work_unit_var.set(work_unit)
+        try:
+            try:
+                yield work_unit
+            except InterruptWork:
+                await self._end(*rollback_sql_seq)
+                return
+            except BaseException:
+                await self._end(*rollback_sql_seq)
+                raise
+
+            try:
+                await self._end(*commit_sql_seq)
+            except BaseException:
+                await self._end(*rollback_sql_seq)
+                raise
+            work_unit._committed = True
+        finally:
+            self._work_unit_var.reset(token)
+            self._open_work_unit = outer_work_unit
+
+    async def close(self) -> None:
+        if self._read_connection is not None:
+            read_connection = self._read_connection
+            await anyio.to_thread.run_sync(
+                read_connection.close, limiter=self._read_thread_limiter
+            )
+        async with self._lock:
+            await self._run_in_thread(lambda c: c.close())
@@ -0,0 +1,95 @@
+import uuid
+from typing import AsyncContextManager, AsyncIterator, Iterable, List, Sequence, Set
+
+from eventual.abc.guarantee import Guarantee
+from eventual.abc.router import IntegrityGuard
+from eventual.model import EventPayload
+
+from .database import SqliteDatabase
+from .work_unit import SqliteWorkUnit
+
+# Stays below the default limit on the number of parameters in a statement of older SQLite versions.
+_MAX_PARAMETER_COUNT = 500
+
+
+class SqliteIntegrityGuard(IntegrityGuard[SqliteWorkUnit]):
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    def create_work_unit(self) -> AsyncContextManager[SqliteWorkUnit]:
+        return self.database.create_work_unit()
+
+    async def is_dispatch_forbidden(self, event_id: uuid.UUID) -> bool:
+        row_seq = await self.database.query(
+            "SELECT 1 FROM handled_event WHERE id = ?", (event_id.bytes,)
+        )
+        return bool(row_seq)
+
+    async def which_dispatch_forbidden(
+        self, event_id_seq: Iterable[uuid.UUID]
+    ) -> Set[uuid.UUID]:
+        event_id_seq = list(event_id_seq)
+        forbidden_event_id_set: Set[uuid.UUID] = set()
+        for start in range(0, len(event_id_seq), _MAX_PARAMETER_COUNT):
+            chunk = event_id_seq[start : start + _MAX_PARAMETER_COUNT]
+            placeholders = ", ".join("?" * len(chunk))
+            row_seq = await self.database.query(
+                f"SELECT id FROM handled_event WHERE id IN ({placeholders})",
+                [event_id.bytes for event_id in chunk],
+            )
+            forbidden_event_id_set.update(uuid.UUID(bytes=row[0]) for row in row_seq)
+        return forbidden_event_id_set
+
+    async def every_forbidden_event_id(self) -> AsyncIterator[uuid.UUID]:
+        # Ids are read page by page in the order of the primary key, so the connection isn't held for long.
+        last_id = b""
+        while True:
+            row_seq = await self.database.query(
+                "SELECT id FROM handled_event WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, _MAX_PARAMETER_COUNT),
+            )
+            for (event_id,) in row_seq:
+                yield uuid.UUID(bytes=event_id)
+            if len(row_seq) < _MAX_PARAMETER_COUNT:
+                return
+            last_id = row_seq[-1][0]
+
+    async def record_completion_with_guarantee(
+        self,
+        event_payload: EventPayload,
+        guarantee: Guarantee,
+    ) -> uuid.UUID:
+        await self.record_completions_with_guarantee([event_payload], guarantee)
+        return event_payload.id
+
+    async def record_completions_with_guarantee(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        guarantee: Guarantee,
+    ) -> List[uuid.UUID]:
+        # A second completion of the same event violates the primary key, just like it should.
+        await self.database.execute_many(
+            "INSERT INTO handled_event (id, guarantee) VALUES (?, ?)",
+            (
+                (event_payload.id.bytes, guarantee.value)
+                for event_payload in event_payload_seq
+            ),
+        )
+        return [event_payload.id for event_payload in event_payload_seq]
+
+    async def record_dispatch_attempt(self, event_payload: EventPayload) -> uuid.UUID:
+        await self.record_dispatch_attempts([event_payload])
+        return event_payload.id
+
+    async def record_dispatch_attempts(
+        self, event_payload_seq: Sequence[EventPayload]
+    ) -> List[uuid.UUID]:
+        await self.database.execute_many(
+            "INSERT INTO dispatched_event (id, body, attempt_count) VALUES (?, ?, 1) "
+            "ON CONFLICT (id) DO UPDATE SET attempt_count = attempt_count + 1",
+            (
+                (event_payload.id.bytes, self.database.codec.encode(event_payload))
+                for event_payload in event_payload_seq
+            ),
+        )
+        return [event_payload.id for event_payload in event_payload_seq]
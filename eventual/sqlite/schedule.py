@@ -0,0 +1,204 @@
+import datetime as dt
+import time
+import uuid
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eventual.abc.schedule import EventSchedule, Shard, shard_key_from_event_id
+from eventual.model import EventPayload
+
+from .database import SqliteDatabase
+from .work_unit import SqliteWorkUnit
+
+
+def _timestamp_from_datetime(value: Optional[dt.datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    return value.timestamp()
+
+
+class SqliteEventSchedule(EventSchedule[SqliteWorkUnit]):
+    def __init__(
+        self,
+        database: SqliteDatabase,
+        claim_duration: float,
+        recovery_page_size: int = 100,
+    ):
+        if recovery_page_size <= 0:
+            raise ValueError("page size has to be positive")
+
+        super().__init__(claim_duration)
+        self.database = database
+        self.recovery_page_size = recovery_page_size
+
+    def create_work_unit(self) -> AsyncContextManager[SqliteWorkUnit]:
+        return self.database.create_work_unit()
+
+    async def add_claimed_event_entry(
+        self, event_payload: EventPayload, due_after: Optional[dt.datetime] = None
+    ) -> None:
+        await self.add_claimed_event_entries([event_payload], due_after)
+
+    async def add_claimed_event_entries(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        due_after: Optional[dt.datetime] = None,
+    ) -> None:
+        claimed_at = time.time()
+        due_after_timestamp = _timestamp_from_datetime(due_after)
+        # An event that is scheduled again, e.g. to be retried, replaces its previous entry.
+        await self.database.execute_many(
+            "INSERT OR REPLACE INTO event_entry "
+            "(id, body, shard_key, due_after, claimed_at, claimed_by) "
+            "VALUES (?, ?, ?, ?, ?, NULL)",
+            (
+                (
+                    event_payload.id.bytes,
+                    self.database.codec.encode(event_payload),
+                    shard_key_from_event_id(event_payload.id),
+                    due_after_timestamp,
+                    claimed_at,
+                )
+                for event_payload in event_payload_seq
+            ),
+        )
+
+    async def is_event_entry_claimed(self, event_id: uuid.UUID) -> bool:
+        row_seq = await self.database.query(
+            "SELECT claimed_at FROM event_entry WHERE id = ?", (event_id.bytes,)
+        )
+        return bool(row_seq) and row_seq[0][0] > time.time() - self.claim_duration
+
+    async def every_open_unclaimed_event_entry_due_now(
+        self,
+    ) -> AsyncIterator[EventPayload]:
+        now = time.time()
+        claimed_before = now - self.claim_duration
+        last_rowid = 0
+        while True:
+            # Entries are claimed page by page as they are read, every page is a single transaction,
+            # so two nodes sharing the database can't claim the same entry.
+            async with self.database.create_work_unit():
+                row_seq = await self.database.execute(
+                    "SELECT rowid, body FROM event_entry "
+                    "WHERE claimed_at <= ? AND (due_after IS NULL OR due_after <= ?) "
+                    "AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (claimed_before, now, last_rowid, self.recovery_page_size),
+                )
+                await self.database.execute_many(
+                    "UPDATE event_entry SET claimed_at = ? WHERE rowid = ?",
+                    ((now, rowid) for rowid, _ in row_seq),
+                )
+            for _, body in row_seq:
+                yield self.database.codec.decode(body)
+            if len(row_seq) < self.recovery_page_size:
+                return
+            last_rowid = row_seq[-1][0]
+
+    async def claim_due_event_entries(
+        self, node_id: str, limit: int, shard: Optional[Shard] = None
+    ) -> List[EventPayload]:
+        now = time.time()
+        sql = (
+            "SELECT rowid, body FROM event_entry "
+            "WHERE claimed_at <= ? AND (due_after IS NULL OR due_after <= ?)"
+        )
+        parameters: List[Any] = [now - self.claim_duration, now]
+        if shard is not None:
+            sql += " AND shard_key % ? = ?"
+            parameters.extend([shard.total, shard.number])
+        # Entries that have been claimed the longest ago go first, so a claim that expires immediately
+        # doesn't make the same entries come up again and again.
+        sql += " ORDER BY claimed_at LIMIT ?"
+        parameters.append(limit)
+
+        async with self.database.create_work_unit():
+            row_seq = await self.database.execute(sql, parameters)
+            await self.database.execute_many(
+                "UPDATE event_entry SET claimed_at = ?, claimed_by = ? WHERE rowid = ?",
+                ((now, node_id, rowid) for rowid, _ in row_seq),
+            )
+        return [self.database.codec.decode(body) for _, body in row_seq]
+
+    async def renew_event_entry_claims(
+        self, node_id: str, event_id_seq: Sequence[uuid.UUID]
+    ) -> None:
+        now = time.time()
+        await self.database.execute_many(
+            "UPDATE event_entry SET claimed_at = ?, claimed_by = ? "
+            "WHERE id = ? AND (claimed_by IS NULL OR claimed_by = ?)",
+            ((now, node_id, event_id.bytes, node_id) for event_id in event_id_seq),
+        )
+
+    async def record_node_heartbeat(self, node_id: str, ttl: float) -> None:
+        await self.database.execute(
+            "INSERT INTO node (id, expires_at) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET expires_at = excluded.expires_at",
+            (node_id, time.time() + ttl),
+        )
+
+    async def every_live_node_id(self) -> List[str]:
+        now = time.time()
+        await self.database.execute("DELETE FROM node WHERE expires_at <= ?", (now,))
+        row_seq = await self.database.execute(
+            "SELECT id FROM node WHERE expires_at > ? ORDER BY id", (now,)
+        )
+        return [node_id for node_id, in row_seq]
+
+    async def is_event_entry_closed(self, event_id: uuid.UUID) -> bool:
+        row_seq = await self.database.query(
+            "SELECT 1 FROM event_entry WHERE id = ?", (event_id.bytes,)
+        )
+        # Every entry that isn't open is considered closed, just like in the memory schedule.
+        return not row_seq
+
+    async def close_event_entry(self, event_id: uuid.UUID) -> None:
+        await self.close_event_entries([event_id])
+
+    async def close_event_entries(self, event_id_seq: Sequence[uuid.UUID]) -> None:
+        # Closed entries are deleted, the table only ever holds the open ones.
+        await self.database.execute_many(
+            "DELETE FROM event_entry WHERE id = ?",
+            ((event_id.bytes,) for event_id in event_id_seq),
+        )
+
+    async def add_dead_letter_entry(
+        self, event_payload: EventPayload, reason: str
+    ) -> None:
+        await self.database.execute(
+            "INSERT OR REPLACE INTO dead_letter_entry (id, body, reason) VALUES (?, ?, ?)",
+            (event_payload.id.bytes, self.database.codec.encode(event_payload), reason),
+        )
+
+    async def every_dead_letter_entry(
+        self, event_id_seq: Optional[Sequence[uuid.UUID]] = None
+    ) -> List[Tuple[EventPayload, str]]:
+        if event_id_seq is None:
+            row_seq = await self.database.query(
+                "SELECT body, reason FROM dead_letter_entry ORDER BY rowid"
+            )
+        else:
+            row_seq = []
+            for event_id in event_id_seq:
+                row_seq.extend(
+                    await self.database.query(
+                        "SELECT body, reason FROM dead_letter_entry WHERE id = ?",
+                        (event_id.bytes,),
+                    )
+                )
+        return [(self.database.codec.decode(body), reason) for body, reason in row_seq]
+
+    async def remove_dead_letter_entries(
+        self, event_id_seq: Sequence[uuid.UUID]
+    ) -> None:
+        await self.database.execute_many(
+            "DELETE FROM dead_letter_entry WHERE id = ?",
+            ((event_id.bytes,) for event_id in event_id_seq),
+        )
@@ -0,0 +1,27 @@
+from typing import TYPE_CHECKING, AsyncContextManager, ClassVar, Optional, Type
+
+from eventual.abc.work_unit import WorkUnit
+
+if TYPE_CHECKING:
+    from .database import SqliteDatabase
+
+
+class SqliteWorkUnit(WorkUnit):
+    # Every database binds a subclass of its own, see `SqliteDatabase.work_unit_class`.
+    database: ClassVar[Optional["SqliteDatabase"]] = None
+
+    def __init__(self) -> None:
+        self._committed = False
+
+    @classmethod
+    def create(cls: Type["SqliteWorkUnit"]) -> AsyncContextManager["SqliteWorkUnit"]:
+        # A work unit is a transaction, so it can't exist without a database.
+        if cls.database is None:
+            raise TypeError(
+                "work unit has to be created with the class bound to a database"
+            )
+        return cls.database.create_work_unit()
+
+    @property
+    def committed(self) -> bool:
+        return self._committed
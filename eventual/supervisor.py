@@ -0,0 +1,129 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+from multiprocessing.context import BaseContext
+from types import FrameType
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+import anyio
+
+Lifespan = Callable[..., AsyncGenerator[None, None]]
+# Gets a flag that tells if the worker is the only one that should recover unclaimed events,
+# usually it's passed as `recover_unclaimed` to `default_lifespan`.
+LifespanFactory = Callable[[bool], Lifespan]
+
+
+async def _serve_until_signal(lifespan: Lifespan) -> None:
+    with anyio.open_signal_receiver(signal.SIGTERM, signal.SIGINT) as signal_stream:
+        async with asynccontextmanager(lifespan)():
+            async for _ in signal_stream:
+                break
+
+
+def _serve(lifespan_factory: LifespanFactory, is_recovery_leader: bool) -> None:
+    # Forked workers inherit handlers of the supervisor, which have no meaning in a worker.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    anyio.run(_serve_until_signal, lifespan_factory(is_recovery_leader))
+
+
+class Supervisor:
+    """
+    Runs `worker_count` processes, each of which serves a lifespan produced by `lifespan_factory`.
+
+    A worker that exits without being asked to is restarted after `restart_delay` seconds. Upon `stop()`
+    (or SIGTERM/SIGINT when running in the main thread) every worker gets SIGTERM and is killed
+    if it doesn't shut down within `shutdown_timeout` seconds. The first worker is the recovery leader,
+    it keeps the role across restarts.
+    """
+
+    def __init__(
+        self,
+        lifespan_factory: LifespanFactory,
+        worker_count: Optional[int] = None,
+        restart_delay: float = 1.0,
+        shutdown_timeout: float = 10.0,
+        mp_context: Optional[BaseContext] = None,
+    ):
+        if worker_count is None:
+            worker_count = os.cpu_count() or 1
+        if worker_count <= 0:
+            raise ValueError("worker count has to be positive")
+
+        self.lifespan_factory = lifespan_factory
+        self.worker_count = worker_count
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.mp_context: Any = mp_context or multiprocessing.get_context()
+
+        self.restart_count = 0
+        self._process_seq: List[Any] = []
+        self._stopping = threading.Event()
+
+    def _start_worker(self, worker_index: int) -> Any:
+        process = self.mp_context.Process(
+            target=_serve,
+            args=(self.lifespan_factory, worker_index == 0),
+            name=f"eventual-worker-{worker_index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _handle_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self) -> None:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._handle_signal)
+            signal.signal(signal.SIGINT, self._handle_signal)
+
+        self._process_seq = [
+            self._start_worker(worker_index)
+            for worker_index in range(self.worker_count)
+        ]
+        try:
+            self._supervise()
+        finally:
+            self._shutdown()
+
+    def _supervise(self) -> None:
+        died_at_from_worker_index: Dict[int, float] = {}
+        while not self._stopping.is_set():
+            multiprocessing.connection.wait(
+                [
+                    process.sentinel
+                    for process in self._process_seq
+                    if process.is_alive()
+                ],
+                timeout=0.1,
+            )
+            now = time.monotonic()
+            for worker_index, process in enumerate(self._process_seq):
+                if process.is_alive() or self._stopping.is_set():
+                    continue
+                died_at = died_at_from_worker_index.setdefault(worker_index, now)
+                if now - died_at >= self.restart_delay:
+                    process.join()
+                    del died_at_from_worker_index[worker_index]
+                    self._process_seq[worker_index] = self._start_worker(worker_index)
+                    self.restart_count += 1
+
+    def _shutdown(self) -> None:
+        for process in self._process_seq:
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._process_seq:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
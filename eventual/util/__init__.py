@@ -1,3 +1,6 @@
+from .bloom import BloomFilter
+from .ids import uuid7
+from .stream import receive_batch
 from .tz import tz_aware_utcnow
 
-__all__ = ["tz_aware_utcnow"]
+__all__ = ["BloomFilter", "receive_batch", "tz_aware_utcnow", "uuid7"]
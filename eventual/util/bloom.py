@@ -0,0 +1,40 @@
+import hashlib
+import math
+import uuid
+
+
+class BloomFilter:
+    """
+    A probabilistic set of UUIDs: it can report false positives, but never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("capacity has to be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error rate has to be between 0 and 1")
+
+        self.bit_count = max(
+            8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        )
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self._bit_array = bytearray((self.bit_count + 7) // 8)
+
+    def _position_seq(self, event_id: uuid.UUID) -> range:
+        # Double hashing: k positions are derived from two halves of a single digest.
+        digest = hashlib.blake2b(event_id.bytes, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return range(first, first + self.hash_count * second, second)
+
+    def add(self, event_id: uuid.UUID) -> None:
+        for position in self._position_seq(event_id):
+            position %= self.bit_count
+            self._bit_array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, event_id: uuid.UUID) -> bool:
+        for position in self._position_seq(event_id):
+            position %= self.bit_count
+            if not self._bit_array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+import uuid
+from typing import Callable
+
+
+def _uuid_from_int(value: int) -> uuid.UUID:
+    # The same as `uuid.UUID(int=value)` without checks of arguments, which take most of the time.
+    event_id = object.__new__(uuid.UUID)
+    object.__setattr__(event_id, "int", value)
+    object.__setattr__(event_id, "is_safe", uuid.SafeUUID.unknown)
+    return event_id
+
+
+class _Uuid7Factory:
+    """
+    Creates version 7 UUIDs: 48 bits of Unix time in milliseconds, 12 bits of a counter and 62 random bits.
+
+    Ids are ordered by time, so inserting them into an index mostly touches its last page.
+    The factory remembers the time and the counter of the last id it has created,
+    so ids created within the same millisecond (or after the clock went back) are ordered by the counter.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last_timestamp = 0
+        self._last_counter = 0
+
+    def __call__(self) -> uuid.UUID:
+        timestamp = time.time_ns() // 1_000_000
+        # Random bits come from the OS, like those of `uuid.uuid4`, so ids can't be predicted
+        # from the ones seen before and processes forked from each other don't share them.
+        random_int = int.from_bytes(os.urandom(10), "big")
+        with self._lock:
+            if timestamp > self._last_timestamp:
+                # The counter starts at a random value below half of its range, so it has room to grow.
+                counter = (random_int >> 62) & 0x7FF
+            else:
+                timestamp = self._last_timestamp
+                counter = self._last_counter + 1
+                if counter > 0xFFF:
+                    timestamp += 1
+                    counter = 0
+            self._last_timestamp, self._last_counter = timestamp, counter
+
+        return _uuid_from_int(
+            (timestamp << 80)
+            | (0x7 << 76)
+            | (counter << 64)
+            | (0b10 << 62)
+            | (random_int & 0x3FFF_FFFF_FFFF_FFFF)
+        )
+
+
+uuid7: Callable[[], uuid.UUID] = _Uuid7Factory()
@@ -0,0 +1,30 @@
+from typing import List, TypeVar
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream
+
+T = TypeVar("T")
+
+
+async def receive_batch(
+    receive_stream: MemoryObjectReceiveStream[T], max_size: int, max_wait: float
+) -> List[T]:
+    # Waits for the first item indefinitely and raises `anyio.EndOfStream` if there is none,
+    # then gathers more items until either the batch is full or `max_wait` seconds have passed.
+    item_seq = [await receive_stream.receive()]
+    while len(item_seq) < max_size:
+        try:
+            item_seq.append(receive_stream.receive_nowait())
+        except anyio.WouldBlock:
+            break
+        except anyio.EndOfStream:
+            return item_seq
+
+    if max_wait > 0:
+        with anyio.move_on_after(max_wait):
+            while len(item_seq) < max_size:
+                try:
+                    item_seq.append(await receive_stream.receive())
+                except anyio.EndOfStream:
+                    break
+    return item_seq
@@ -1,6 +1,6 @@
 #!/bin/sh -e
 
-export SOURCE_FILES="eventual tests"
+export SOURCE_FILES="eventual tests benchmarks"
 set -x
 
 black --check --diff $SOURCE_FILES
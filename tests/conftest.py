@@ -4,10 +4,10 @@ import pytest
 
 from eventual.abc.router import IntegrityGuard
 from eventual.abc.schedule import EventSchedule
+from eventual.memory import MemoryEventSchedule
 from eventual.model import Event, EventPayload
 from eventual.registry import Registry
 from tests.memory.integrity_guard import MemoryIntegrityGuard
-from tests.memory.scheduler import MemoryEventSchedule
 from tests.memory.work_unit import MemoryWorkUnit
 from tests.model import Person, SomethingHappened
 
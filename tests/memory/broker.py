@@ -1,24 +1,19 @@
-import datetime as dt
 import uuid
-from typing import AsyncIterable, Set, Tuple
+from typing import AbstractSet, AsyncIterable, List, Optional, Set, Tuple
 
 import anyio
-import orjson
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
 from eventual.abc.broker import Message, MessageBroker
 from eventual.model import EventPayload
+from eventual.model.codec import JsonCodec
+
+_codec = JsonCodec()
 
 
 class StreamMessage(Message):
     def __init__(self, message_bytes: bytes, broker: "StreamMessageBroker"):
-        body = orjson.loads(message_bytes)
-        self._event_payload = EventPayload(
-            id=uuid.UUID(body["id"]),
-            occurred_on=dt.datetime.fromisoformat(body["occurred_on"]),
-            subject=body["_subject"],
-            body=body,
-        )
+        self._event_payload = _codec.decode(message_bytes)
         self._broker = broker
 
     @property
@@ -39,6 +34,8 @@ class StreamMessageBroker(MessageBroker):
             self._receive_stream,
         ) = stream_pair
         self._event_id_set: Set[uuid.UUID] = set()
+        self._subject_set: Optional[AbstractSet[str]] = None
+        self.forwarded_msg_seq: List[Message] = []
 
     async def send_event_payload_stream(
         self,
@@ -58,11 +55,23 @@ class StreamMessageBroker(MessageBroker):
     async def message_receive_stream(self) -> AsyncIterable[Message]:
         async with self._receive_stream:
             async for message_bytes in self._receive_stream:
+                # The body of a frame isn't decoded until it's needed, so filtering by subject is cheap.
+                if (
+                    self._subject_set is not None
+                    and _codec.decode(message_bytes).subject not in self._subject_set
+                ):
+                    continue
                 yield self.create_msg(message_bytes)
 
+    def restrict_to_subjects(self, subject_set: AbstractSet[str]) -> None:
+        self._subject_set = subject_set
+
+    async def forward_message(self, message: Message) -> None:
+        self.forwarded_msg_seq.append(message)
+
     @classmethod
     def event_payload_as_bytes(cls, event_payload: EventPayload) -> bytes:
-        return orjson.dumps(event_payload.body)
+        return _codec.encode(event_payload)
 
     def create_msg(self, message_bytes: bytes) -> StreamMessage:
         msg = StreamMessage(message_bytes, self)
@@ -1,6 +1,6 @@
 import datetime as dt
 import uuid
-from typing import Any, AsyncContextManager, AsyncIterable, Dict, Optional
+from typing import Any, Dict
 
 from anyio.streams.memory import MemoryObjectSendStream
 
@@ -10,39 +10,6 @@ from eventual.model import EventPayload
 from tests.memory.work_unit import MemoryWorkUnit
 
 
-class MemoryEventSchedule(EventSchedule[MemoryWorkUnit]):
-    def __init__(self, claim_duration: float) -> None:
-        super().__init__(claim_duration)
-        self._event_entry_from_event_id: Dict[uuid.UUID, Dict[str, Any]] = {}
-
-    def create_work_unit(self) -> AsyncContextManager[MemoryWorkUnit]:
-        return MemoryWorkUnit.create()
-
-    async def add_claimed_event_entry(
-        self, event_payload: EventPayload, due_after: Optional[dt.datetime] = None
-    ) -> None:
-        self._event_entry_from_event_id[event_payload.id] = dict(
-            event_payload=event_payload,
-            claimed_at=util.tz_aware_utcnow(),
-            due_after=due_after,
-            closed=False,
-        )
-
-    async def is_event_entry_closed(self, event_id: uuid.UUID) -> bool:
-        event = self._event_entry_from_event_id[event_id]
-        return event["closed"]
-
-    async def close_event_entry(self, event_id: uuid.UUID) -> None:
-        event = self._event_entry_from_event_id[event_id]
-        event["closed"] = True
-
-    async def is_event_entry_claimed(self, event_id: uuid.UUID) -> bool:
-        raise NotImplementedError
-
-    def every_open_unclaimed_event_entry_due_now(self) -> AsyncIterable[EventPayload]:
-        raise NotImplementedError
-
-
 class MemoryScheduler(EventScheduler[MemoryWorkUnit]):
     def __init__(
         self,
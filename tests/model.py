@@ -1,6 +1,8 @@
+import dataclasses
 import uuid
+from typing import Dict, List, Set, Tuple
 
-from eventual.model import Entity, Event
+from eventual.model import Entity, Event, SlottedEntity, SlottedEvent, slotted
 
 
 class SomethingHappened(Event):
@@ -24,3 +26,46 @@ class Building(Entity[uuid.UUID]):
     @classmethod
     def from_floor_count(cls, floor_count: int) -> "Building":
         return cls._create(unique_id=uuid.uuid4(), floor_count=floor_count)
+
+
+class Street(SlottedEntity[uuid.UUID]):
+    __slots__ = ("name",)
+
+    def __init__(self, *, unique_id: uuid.UUID, name: str):
+        super().__init__(unique_id=unique_id)
+        self.name = name
+
+    @classmethod
+    def from_name(cls, name: str) -> "Street":
+        return cls._create(unique_id=uuid.uuid4(), name=name)
+
+    def rename(self, name: str) -> None:
+        self.name = name
+        self._outbox.append(SomethingHappened())
+
+
+@dataclasses.dataclass(frozen=True)
+class NumberAdded(Event):
+    counter: int
+    number: int
+
+
+@slotted
+@dataclasses.dataclass(frozen=True)
+class NumberMultiplied(SlottedEvent):
+    counter: int
+    factor: int = 2
+
+
+@dataclasses.dataclass(frozen=True)
+class Address:
+    city: str
+    line_seq: Tuple[str, ...]
+
+
+@dataclasses.dataclass(frozen=True)
+class PersonMoved(Event):
+    person_id: uuid.UUID
+    address: Address
+    previous_address_seq: List[Address]
+    tag_from_name: Dict[str, Set[str]]
@@ -3,7 +3,8 @@ from collections import deque
 
 import pytest
 
-from tests.model import Building, Person
+from eventual.model import Entity
+from tests.model import Building, Person, Street
 
 
 def test_entity_equality() -> None:
@@ -24,6 +25,35 @@ def test_entity_as_dictionary() -> None:
     )
 
 
+def test_entity_as_dictionary_is_its_dictionary() -> None:
+    unique_id = uuid.uuid4()
+    entity = Entity[uuid.UUID]._create(unique_id=unique_id)
+
+    assert entity.as_dictionary() is entity.__dict__
+    assert entity.as_dictionary() == dict(_outbox=deque(), _unique_id=unique_id)
+
+
 def test_entity_has_no_constructor() -> None:
     with pytest.raises(TypeError):
         _ = Building(unique_id=uuid.uuid4(), floor_count=1)
+
+
+def test_slotted_entity_as_dictionary() -> None:
+    street = Street.from_name("Rua Augusta")
+
+    assert not hasattr(street, "__dict__")
+    assert isinstance(street, Entity)
+    assert street.as_dictionary() == dict(
+        _outbox=deque(), _unique_id=street.id, name="Rua Augusta"
+    )
+
+
+def test_slotted_entity_creates_outbox_when_used() -> None:
+    street = Street.from_name("Rua Augusta")
+    assert street.clear_outbox() == []
+    assert street._outbox_deque is None
+
+    street.rename("Rua do Ouro")
+    assert len(street.as_dictionary()["_outbox"]) == 1
+    assert len(street.clear_outbox()) == 1
+    assert not street.outbox
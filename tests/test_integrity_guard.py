@@ -1,11 +1,18 @@
-from typing import Type
+import uuid
+from typing import List, Sequence, Type
 
 import anyio
 import pytest
 
+from eventual.abc.guarantee import Guarantee
 from eventual.abc.router import IntegrityGuard
 from eventual.abc.work_unit import InterruptWork
+from eventual.integrity_guard import CachedIntegrityGuard, WriteBehindIntegrityGuard
+from eventual.model import EventPayload
+from eventual.util import BloomFilter
+from tests.memory.integrity_guard import MemoryIntegrityGuard
 from tests.memory.work_unit import MemoryWorkUnit
+from tests.model import SomethingHappened
 from tests.test_broker import background_stream_broker
 
 EVENT_COUNT = 1
@@ -126,3 +133,175 @@ async def test_at_least_once_no_commit_and_no_acknowledge_when_ok(
                     raise exc_cls
             assert not await integrity_guard.is_dispatch_forbidden(msg.event_payload.id)
             assert not stream_broker.is_msg_acknowledged(msg.event_payload.id)
+
+
+async def test_cached_guard_answers_handled_events_from_cache(
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_payload: EventPayload,
+) -> None:
+    cached_guard = CachedIntegrityGuard(integrity_guard)
+    assert not await cached_guard.is_dispatch_forbidden(event_payload.id)
+    assert cached_guard.miss_count == 1
+
+    await cached_guard.record_completion_with_guarantee(
+        event_payload, Guarantee.AT_LEAST_ONCE
+    )
+    assert await cached_guard.is_dispatch_forbidden(event_payload.id)
+    assert await cached_guard.which_dispatch_forbidden([event_payload.id]) == {
+        event_payload.id
+    }
+    assert cached_guard.hit_count == 2
+    assert cached_guard.miss_count == 1
+
+
+async def test_cached_guard_evicts_least_recently_used(
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    cached_guard = CachedIntegrityGuard(integrity_guard, max_size=2)
+    event_payload_seq = [EventPayload.from_event(SomethingHappened()) for _ in range(3)]
+    for event_payload in event_payload_seq:
+        await cached_guard.record_completion_with_guarantee(
+            event_payload, Guarantee.NO_MORE_THAN_ONCE
+        )
+
+    assert len(cached_guard) == 2
+    # Evicted id is still forbidden, but the answer comes from the wrapped guard.
+    assert await cached_guard.is_dispatch_forbidden(event_payload_seq[0].id)
+    assert cached_guard.miss_count == 1
+
+
+async def test_cached_guard_does_not_cache_rolled_back_work(
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    cached_guard = CachedIntegrityGuard(integrity_guard)
+    confirmation_send_stream, _ = anyio.create_memory_object_stream(EVENT_COUNT)
+    async with background_stream_broker(
+        confirmation_send_stream, EVENT_COUNT
+    ) as stream_broker:
+        async for msg in stream_broker.message_receive_stream():
+            # Memory work unit is never committed unless asked to.
+            async with cached_guard.handle_exactly_once(msg):
+                pass
+            assert len(cached_guard) == 0
+
+
+async def test_cached_guard_trusts_bloom_filter_negatives(
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_payload: EventPayload,
+) -> None:
+    cached_guard = CachedIntegrityGuard(
+        integrity_guard, bloom_filter=BloomFilter(capacity=100)
+    )
+    await cached_guard.seed_bloom_filter()
+    assert not await cached_guard.is_dispatch_forbidden(event_payload.id)
+    assert cached_guard.negative_hit_count == 1
+    assert cached_guard.miss_count == 0
+
+
+async def test_cached_guard_seeds_bloom_filter_upon_restart(
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_payload: EventPayload,
+) -> None:
+    # The event was handled before the restart, so the new filter knows nothing about it.
+    await integrity_guard.record_completion_with_guarantee(
+        event_payload, Guarantee.NO_MORE_THAN_ONCE
+    )
+    bloom_filter = BloomFilter(capacity=100)
+    cached_guard = CachedIntegrityGuard(integrity_guard, bloom_filter=bloom_filter)
+    another_event_payload = EventPayload.from_event(SomethingHappened())
+
+    # Negatives of the filter aren't trusted until it's seeded.
+    assert not await cached_guard.is_dispatch_forbidden(another_event_payload.id)
+    assert cached_guard.negative_hit_count == 0
+
+    with anyio.move_on_after(0.1):
+        await cached_guard.run_in_background()
+    assert event_payload.id in bloom_filter
+    assert await cached_guard.is_dispatch_forbidden(event_payload.id)
+    assert not await cached_guard.is_dispatch_forbidden(another_event_payload.id)
+    assert cached_guard.negative_hit_count == 1
+
+
+async def test_cached_guard_rejects_bloom_filter_it_cannot_seed() -> None:
+    class UnlistedIntegrityGuard(MemoryIntegrityGuard):
+        every_forbidden_event_id = IntegrityGuard.every_forbidden_event_id
+
+    with pytest.raises(ValueError):
+        CachedIntegrityGuard(
+            UnlistedIntegrityGuard(), bloom_filter=BloomFilter(capacity=100)
+        )
+
+
+async def test_write_behind_guard_records_attempts_in_bulk(
+    event_payload: EventPayload,
+) -> None:
+    integrity_guard = MemoryIntegrityGuard()
+    write_behind_guard = WriteBehindIntegrityGuard(integrity_guard, max_size=2)
+
+    await write_behind_guard.record_dispatch_attempt(event_payload)
+    assert not integrity_guard.dispatch_attempt_count(event_payload.id)
+
+    await write_behind_guard.record_dispatch_attempt(event_payload)
+    assert integrity_guard.dispatch_attempt_count(event_payload.id) == 2
+
+
+async def test_write_behind_guard_flushes_periodically(
+    event_payload: EventPayload,
+) -> None:
+    integrity_guard = MemoryIntegrityGuard()
+    write_behind_guard = WriteBehindIntegrityGuard(
+        integrity_guard, max_size=100, interval=0.01
+    )
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(write_behind_guard.run_in_background)
+        await write_behind_guard.record_dispatch_attempt(event_payload)
+        await anyio.sleep(0.05)
+        assert integrity_guard.dispatch_attempt_count(event_payload.id) == 1
+
+        await write_behind_guard.record_dispatch_attempt(event_payload)
+        task_group.cancel_scope.cancel()
+
+    await write_behind_guard.flush()
+    assert integrity_guard.dispatch_attempt_count(event_payload.id) == 2
+
+
+class SlowIntegrityGuard(MemoryIntegrityGuard):
+    async def record_dispatch_attempts(
+        self, event_payload_seq: Sequence[EventPayload]
+    ) -> List[uuid.UUID]:
+        await anyio.sleep(0.05)
+        return await super().record_dispatch_attempts(event_payload_seq)
+
+
+async def test_write_behind_guard_bounds_buffer_of_slow_storage(
+    event_payload: EventPayload,
+) -> None:
+    write_behind_guard = WriteBehindIntegrityGuard(
+        SlowIntegrityGuard(), max_size=2, interval=60.0
+    )
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(write_behind_guard.run_in_background)
+        for _ in range(10):
+            await write_behind_guard.record_dispatch_attempt(event_payload)
+            assert len(write_behind_guard._event_payload_buffer) <= 2
+        task_group.cancel_scope.cancel()
+
+
+async def test_write_behind_guard_flushes_inline_after_background_stops(
+    event_payload: EventPayload,
+) -> None:
+    integrity_guard = MemoryIntegrityGuard()
+    write_behind_guard = WriteBehindIntegrityGuard(
+        integrity_guard, max_size=2, interval=60.0
+    )
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(write_behind_guard.run_in_background)
+        await anyio.sleep(0)
+        task_group.cancel_scope.cancel()
+
+    await write_behind_guard.record_dispatch_attempt(event_payload)
+    await write_behind_guard.record_dispatch_attempt(event_payload)
+    assert integrity_guard.dispatch_attempt_count(event_payload.id) == 2
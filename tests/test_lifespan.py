@@ -0,0 +1,105 @@
+import contextlib
+
+import anyio
+import pytest
+from anyio.abc import TaskGroup
+from anyio.streams.memory import MemoryObjectSendStream
+
+from eventual.abc.schedule import EventSchedule
+from eventual.lifespan import default_lifespan
+from eventual.memory import MemoryEventSchedule, MemoryIntegrityGuard
+from eventual.model import EventPayload
+from eventual.registry import Registry
+from eventual.router import Router
+from eventual.scheduler import Scheduler
+from tests.memory.broker import StreamMessageBroker
+from tests.memory.work_unit import MemoryWorkUnit
+from tests.model import SomethingHappened
+
+EVENT_COUNT = 5
+
+pytestmark = pytest.mark.anyio
+
+
+def throttled_scheduler(
+    event_payload_send_stream: MemoryObjectSendStream[EventPayload],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+    task_group: TaskGroup,
+) -> Scheduler[MemoryWorkUnit]:
+    return Scheduler(
+        event_payload_send_stream,
+        event_schedule,
+        task_group,
+        recovery_page_size=1,
+        recovery_max_rate=1.0,
+    )
+
+
+async def test_lifespan_recovers_in_background() -> None:
+    event_schedule = MemoryEventSchedule(0.0)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(EVENT_COUNT)
+    ]
+    await event_schedule.add_claimed_event_entries(event_payload_seq)
+    # Entries are available right away, but stay claimed once they are recovered.
+    event_schedule.claim_duration = 60.0
+
+    lifespan = default_lifespan(
+        Registry[MemoryWorkUnit](),
+        StreamMessageBroker(),
+        MemoryIntegrityGuard(),
+        anyio.create_memory_object_stream(EVENT_COUNT),
+        event_schedule,
+        throttled_scheduler,
+        Router,
+    )
+
+    async def recovered_count() -> int:
+        return sum(
+            [
+                await event_schedule.is_event_entry_claimed(event_payload.id)
+                or await event_schedule.is_event_entry_closed(event_payload.id)
+                for event_payload in event_payload_seq
+            ]
+        )
+
+    # Recovering the whole backlog at a page a second would take several seconds.
+    with anyio.fail_after(1.0):
+        async with contextlib.asynccontextmanager(lifespan)():
+            while not await recovered_count():
+                await anyio.sleep(0.01)
+    assert await recovered_count() < EVENT_COUNT
+
+
+async def test_lifespan_records_heartbeats_between_sweeps() -> None:
+    event_schedule = MemoryEventSchedule(1.0)
+    node_ttl = 0.05
+
+    def short_lived_scheduler(
+        event_payload_send_stream: MemoryObjectSendStream[EventPayload],
+        event_schedule: EventSchedule[MemoryWorkUnit],
+        task_group: TaskGroup,
+    ) -> Scheduler[MemoryWorkUnit]:
+        return Scheduler(
+            event_payload_send_stream,
+            event_schedule,
+            task_group,
+            node_id="node-a",
+            node_ttl=node_ttl,
+        )
+
+    lifespan = default_lifespan(
+        Registry[MemoryWorkUnit](),
+        StreamMessageBroker(),
+        MemoryIntegrityGuard(),
+        anyio.create_memory_object_stream(EVENT_COUNT),
+        event_schedule,
+        short_lived_scheduler,
+        Router,
+        recovery_interval=60.0,
+    )
+
+    async with contextlib.asynccontextmanager(lifespan)():
+        for _ in range(5):
+            await anyio.sleep(node_ttl)
+            assert await event_schedule.every_live_node_id() == ["node-a"]
@@ -0,0 +1,123 @@
+import datetime as dt
+from typing import List
+
+import pytest
+
+from eventual import util
+from eventual.abc.schedule import Shard
+from eventual.memory import MemoryEventSchedule
+from eventual.model import EventPayload
+from tests.model import SomethingHappened
+
+pytestmark = pytest.mark.anyio
+
+
+async def every_event_payload_due_now(
+    event_schedule: MemoryEventSchedule,
+) -> List[EventPayload]:
+    return [
+        event_payload
+        async for event_payload in event_schedule.every_open_unclaimed_event_entry_due_now()
+    ]
+
+
+async def test_memory_schedule_returns_entries_once_claim_expires() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=0.0)
+    event_payload = EventPayload.from_event(SomethingHappened())
+    await event_schedule.add_claimed_event_entry(event_payload)
+
+    assert await every_event_payload_due_now(event_schedule) == [event_payload]
+    # Claim expires immediately, so the entry is due again on the next scan.
+    assert await every_event_payload_due_now(event_schedule) == [event_payload]
+
+    await event_schedule.close_event_entry(event_payload.id)
+    assert await event_schedule.is_event_entry_closed(event_payload.id)
+    assert await every_event_payload_due_now(event_schedule) == []
+
+
+async def test_memory_schedule_keeps_claimed_entries() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=60.0)
+    event_payload = EventPayload.from_event(SomethingHappened())
+    await event_schedule.add_claimed_event_entry(event_payload)
+
+    assert await event_schedule.is_event_entry_claimed(event_payload.id)
+    assert not await event_schedule.is_event_entry_closed(event_payload.id)
+    assert await every_event_payload_due_now(event_schedule) == []
+
+
+async def test_memory_schedule_skips_entries_that_are_not_due() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=0.0)
+    now = util.tz_aware_utcnow()
+    due_event_payload, future_event_payload = (
+        EventPayload.from_event(SomethingHappened()) for _ in range(2)
+    )
+    await event_schedule.add_claimed_event_entry(
+        future_event_payload, now + dt.timedelta(seconds=60)
+    )
+    await event_schedule.add_claimed_event_entry(
+        due_event_payload, now - dt.timedelta(seconds=60)
+    )
+
+    assert await every_event_payload_due_now(event_schedule) == [due_event_payload]
+
+
+async def test_memory_schedule_claims_entries_of_shard() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=0.0)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(20)
+    ]
+    await event_schedule.add_claimed_event_entries(event_payload_seq)
+    shard = Shard(number=1, total=2)
+
+    claimed_payload_seq = await event_schedule.claim_due_event_entries(
+        "node", limit=len(event_payload_seq), shard=shard
+    )
+
+    assert {event_payload.id for event_payload in claimed_payload_seq} == {
+        event_payload.id
+        for event_payload in event_payload_seq
+        if shard.contains(event_payload.id)
+    }
+
+
+async def test_memory_schedule_renews_claims_of_node() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=0.0)
+    event_payload = EventPayload.from_event(SomethingHappened())
+    await event_schedule.add_claimed_event_entry(event_payload)
+    assert await event_schedule.claim_due_event_entries("node-a", limit=1) == [
+        event_payload
+    ]
+
+    # A node can't renew a claim that is held by another node.
+    event_schedule.claim_duration = 60.0
+    await event_schedule.renew_event_entry_claims("node-b", [event_payload.id])
+    assert not await event_schedule.is_event_entry_claimed(event_payload.id)
+    await event_schedule.renew_event_entry_claims("node-a", [event_payload.id])
+    assert await event_schedule.is_event_entry_claimed(event_payload.id)
+
+
+async def test_memory_schedule_drops_stale_queue_items() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=60.0)
+    open_event_payload = EventPayload.from_event(SomethingHappened())
+    await event_schedule.add_claimed_event_entry(open_event_payload)
+
+    for _ in range(10_000):
+        event_payload = EventPayload.from_event(SomethingHappened())
+        await event_schedule.add_claimed_event_entry(event_payload)
+        await event_schedule.close_event_entry(event_payload.id)
+    for _ in range(10_000):
+        await event_schedule.renew_event_entry_claims("node-a", [open_event_payload.id])
+
+    assert len(event_schedule._ready_queue) <= 2
+    assert await event_schedule.is_event_entry_claimed(open_event_payload.id)
+    event_schedule.claim_duration = 0.0
+    await event_schedule.renew_event_entry_claims("node-a", [open_event_payload.id])
+    assert await every_event_payload_due_now(event_schedule) == [open_event_payload]
+
+
+async def test_memory_schedule_forgets_dead_nodes() -> None:
+    event_schedule = MemoryEventSchedule(claim_duration=60.0)
+    await event_schedule.record_node_heartbeat("node-a", 60.0)
+    await event_schedule.record_node_heartbeat("node-b", 0.0)
+
+    assert await event_schedule.every_live_node_id() == ["node-a"]
@@ -1,6 +1,33 @@
+import dataclasses
+import datetime as dt
+import decimal
+import enum
+import pickle
+import uuid
+
 import orjson
+import pytest
 
-from eventual.model import EventPayload
+from eventual import util
+from eventual.model import (
+    Event,
+    EventPayload,
+    LazyEventPayload,
+    SlottedEvent,
+    codec,
+    event_class_from_subject,
+    set_event_id_factory,
+    slotted,
+)
+from eventual.model.codec import JsonCodec, PayloadCodec
+from eventual.model.compiler import serializer_from_class
+from tests.model import (
+    Address,
+    NumberAdded,
+    NumberMultiplied,
+    PersonMoved,
+    SomethingHappened,
+)
 
 
 def test_event_payload_from_event_body(event_payload: EventPayload) -> None:
@@ -16,3 +43,244 @@ def test_event_payload_from_event_body_supports_json(
     assert event_payload.id == plain_event_payload.id
     assert event_payload.occurred_on == plain_event_payload.occurred_on
     assert event_payload.subject == plain_event_payload.subject
+
+
+def test_compiled_serializer_matches_asdict() -> None:
+    address = Address(city="Lisbon", line_seq=("Rua Augusta", "1"))
+    event_seq = [
+        SomethingHappened(),
+        NumberAdded(counter=1, number=2),
+        PersonMoved(
+            person_id=uuid.uuid4(),
+            address=address,
+            previous_address_seq=[address, Address(city="Porto", line_seq=())],
+            tag_from_name={"home": {"old", "small"}},
+        ),
+    ]
+
+    for event in event_seq:
+        body = serializer_from_class(type(event))(event)
+        assert body == dataclasses.asdict(event)
+        assert EventPayload.from_event(event).body == {
+            **dataclasses.asdict(event),
+            "_subject": EventPayload.from_event(event).subject,
+        }
+
+
+def test_compiled_serializer_copies_mutable_values() -> None:
+    event = PersonMoved(
+        person_id=uuid.uuid4(),
+        address=Address(city="Lisbon", line_seq=()),
+        previous_address_seq=[],
+        tag_from_name={"home": {"old"}},
+    )
+
+    body = serializer_from_class(PersonMoved)(event)
+    body["tag_from_name"]["home"].add("new")
+    body["previous_address_seq"].append(None)
+
+    assert event.tag_from_name == {"home": {"old"}}
+    assert event.previous_address_seq == []
+
+
+def test_payload_as_event_restores_event() -> None:
+    address = Address(city="Lisbon", line_seq=("Rua Augusta", "1"))
+    event = PersonMoved(
+        person_id=uuid.uuid4(),
+        address=address,
+        previous_address_seq=[address],
+        tag_from_name={"home": {"old", "small"}},
+    )
+    event_payload = EventPayload.from_event(event)
+    assert event_payload.as_event() == event
+
+    # Sets, tuples, ids and timestamps don't survive JSON, they are restored from annotations.
+    json_event_payload = EventPayload.from_event_body(
+        orjson.loads(orjson.dumps(event_payload.body, default=list))
+    )
+    assert json_event_payload.as_event() == event
+
+    number_added = NumberAdded(counter=1, number=2)
+    # Keys that aren't fields, like the attempt, are ignored.
+    assert EventPayload.from_event(number_added).with_attempt(
+        "consumer", 1
+    ).as_event() == (number_added)
+
+
+def test_payload_as_event_requires_known_subject(
+    event_payload: EventPayload,
+) -> None:
+    with pytest.raises(ValueError):
+        dataclasses.replace(event_payload, subject="unknown-subject").as_event()
+
+
+def test_base_event_keeps_fields_in_dictionary() -> None:
+    event = Event()
+    assert event.__dict__ == {"id": event.id, "occurred_on": event.occurred_on}
+    number_added = NumberAdded(counter=1, number=2)
+    assert set(number_added.__dict__) == {"id", "occurred_on", "counter", "number"}
+    assert "__getstate__" not in Event.__dict__
+    assert pickle.loads(pickle.dumps(number_added)) == number_added
+
+
+def test_slotted_event_keeps_fields_in_slots() -> None:
+    event = NumberMultiplied(counter=1)
+    assert not hasattr(event, "__dict__")
+    assert event.factor == 2
+    assert event_class_from_subject("number-multiplied") is NumberMultiplied
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        event.factor = 3  # type: ignore[misc]
+    assert pickle.loads(pickle.dumps(event)) == event
+
+    event_payload = EventPayload.from_event(event)
+    assert event_payload.body == {
+        **dataclasses.asdict(event),
+        "_subject": "number-multiplied",
+    }
+    assert event_payload.as_event() == event
+
+
+def test_slotted_requires_slotted_bases() -> None:
+    @dataclasses.dataclass(frozen=True)
+    class NumberSubtracted(NumberAdded):
+        pass
+
+    with pytest.raises(TypeError):
+        slotted(NumberSubtracted)
+    with pytest.raises(TypeError):
+        slotted(NumberAdded)
+
+
+def test_event_id_factory_is_configurable() -> None:
+    assert SomethingHappened().id.version == 4
+
+    set_event_id_factory(util.uuid7)
+    try:
+        assert SomethingHappened().id.version == 7
+    finally:
+        set_event_id_factory(uuid.uuid4)
+
+
+def test_event_subject_is_computed_once_per_class() -> None:
+    class OrderCancelled(Event):
+        pass
+
+    class LegacyOrderCancelled(Event):
+        __subject__ = "order-cancelled-v1"
+
+    assert OrderCancelled.__subject__ == "order-cancelled"
+    assert LegacyOrderCancelled.__subject__ == "order-cancelled-v1"
+    assert EventPayload.from_event(LegacyOrderCancelled()).subject == (
+        "order-cancelled-v1"
+    )
+    assert event_class_from_subject("order-cancelled-v1") is LegacyOrderCancelled
+    assert event_class_from_subject("unknown-subject") is None
+
+
+def test_event_subject_belongs_to_a_single_class() -> None:
+    with pytest.raises(ValueError):
+
+        class SomethingElseHappened(Event):
+            __subject__ = "something-happened"
+
+    assert event_class_from_subject("something-happened") is SomethingHappened
+
+    # The same class created anew takes over its subject.
+    @dataclasses.dataclass(frozen=True)
+    class OrderShipped(SlottedEvent):
+        address: str
+
+    slotted_order_shipped = slotted(OrderShipped)
+    assert event_class_from_subject("order-shipped") is slotted_order_shipped
+
+
+def test_lazy_event_payload_decodes_body_on_first_access(
+    event_payload: EventPayload,
+) -> None:
+    lazy_event_payload = LazyEventPayload(
+        id=event_payload.id,
+        subject=event_payload.subject,
+        encoded_body=memoryview(orjson.dumps(event_payload.body)),
+        decode_body=orjson.loads,
+    )
+    assert not lazy_event_payload.is_body_decoded
+
+    assert lazy_event_payload.occurred_on == event_payload.occurred_on
+    assert lazy_event_payload.is_body_decoded
+    assert lazy_event_payload.body["_subject"] == event_payload.subject
+    assert lazy_event_payload.with_attempt("consumer", 1).attempt_of("consumer") == 1
+
+
+def assert_codec_round_trip(
+    payload_codec: PayloadCodec, event_payload: EventPayload
+) -> None:
+    data = payload_codec.encode(event_payload)
+    decoded_event_payload = payload_codec.decode(bytearray(data))
+    assert decoded_event_payload.id == event_payload.id
+    assert decoded_event_payload.subject == event_payload.subject
+    assert decoded_event_payload.occurred_on == event_payload.occurred_on
+    assert not decoded_event_payload.is_body_decoded
+
+    assert decoded_event_payload.body["_subject"] == event_payload.subject
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+def assert_codec_encodes_plain_values(
+    payload_codec: PayloadCodec, event_payload: EventPayload
+) -> None:
+    body = dict(
+        event_payload.body,
+        price=decimal.Decimal("9.99"),
+        tag_set={"a"},
+        frozen_tag_set=frozenset({"b"}),
+        birthday=dt.date(2021, 6, 1),
+        alarm=dt.time(7, 30),
+        color=Color.RED,
+    )
+    data = payload_codec.encode(dataclasses.replace(event_payload, body=body))
+    decoded_body = payload_codec.decode(data).body
+    assert decoded_body["price"] == "9.99"
+    assert decoded_body["tag_set"] == ["a"]
+    assert decoded_body["frozen_tag_set"] == ["b"]
+    assert decoded_body["birthday"] == "2021-06-01"
+    assert decoded_body["alarm"] == "07:30:00"
+    assert decoded_body["color"] == "red"
+
+
+def test_json_codec_round_trip(event_payload: EventPayload) -> None:
+    assert_codec_round_trip(JsonCodec(), event_payload)
+
+
+def test_json_codec_round_trip_without_orjson(
+    event_payload: EventPayload, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(codec, "orjson", None)
+    assert_codec_round_trip(JsonCodec(), event_payload)
+
+
+def test_json_codec_encodes_plain_values(event_payload: EventPayload) -> None:
+    assert_codec_encodes_plain_values(JsonCodec(), event_payload)
+
+
+def test_json_codec_encodes_plain_values_without_orjson(
+    event_payload: EventPayload, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(codec, "orjson", None)
+    assert_codec_encodes_plain_values(JsonCodec(), event_payload)
+
+
+def test_msgpack_codec_round_trip(event_payload: EventPayload) -> None:
+    pytest.importorskip("msgpack")
+    assert_codec_round_trip(codec.MsgpackCodec(), event_payload)
+    assert_codec_encodes_plain_values(codec.MsgpackCodec(), event_payload)
+
+
+def test_codec_rejects_unknown_frame_version(event_payload: EventPayload) -> None:
+    data = bytearray(JsonCodec().encode(event_payload))
+    data[0] = 0
+    with pytest.raises(ValueError):
+        JsonCodec().decode(data)
@@ -1,12 +1,17 @@
-from typing import Any
+import os
+import threading
+from typing import Any, List, cast
 
 import pytest
 
 from eventual.abc.broker import Message
 from eventual.abc.guarantee import Guarantee
-from eventual.abc.registry import HandlerSpecification
+from eventual.abc.registry import HandlerSpecification, MessageHandler, Offload
 from eventual.abc.schedule import EventScheduler
+from eventual.model import EventPayload
 from eventual.registry import Registry
+from tests.memory.broker import StreamMessageBroker
+from tests.model import SomethingHappened
 
 
 async def _msg_handler(msg: Message, scheduler: EventScheduler[Any]) -> None:
@@ -84,3 +89,118 @@ def test_subscribe(registry: Registry[Any]) -> None:
 
     assert handler == xxx.message_handler
     assert registry.mapping() == dict(xxx=xxx, yyy=xxx)
+
+
+def test_subscribe_accepts_event_classes(registry: Registry[Any]) -> None:
+    registry.subscribe([SomethingHappened, "number-added"])(_msg_handler)
+
+    assert list(registry.mapping()) == ["something-happened", "number-added"]
+    # Subjects are interned, so the key is the subject of the class itself.
+    assert next(iter(registry.mapping())) is SomethingHappened.__subject__
+
+
+def test_registry_rejects_non_positive_in_flight_limit(
+    registry: Registry[Any],
+) -> None:
+    with pytest.raises(ValueError):
+        registry.register(
+            ["xxx"], _msg_handler, Guarantee.AT_LEAST_ONCE, 1.0, max_in_flight=0
+        )
+
+
+def test_subscribe_batch_handler(registry: Registry[Any]) -> None:
+    async def _batch_handler(
+        msg_seq: List[Message], scheduler: EventScheduler[Any]
+    ) -> None:
+        raise NotImplementedError
+
+    registry.subscribe(["xxx"], batch_max_size=10, batch_max_wait=0.5)(_batch_handler)
+
+    spec = registry.mapping()["xxx"]
+    assert spec.is_batch
+    assert spec.batch_max_size == 10
+    assert spec.batch_max_wait == 0.5
+
+
+def _offloaded_handler(_: EventPayload) -> None:
+    raise NotImplementedError
+
+
+def _other_offloaded_handler(_: EventPayload) -> None:
+    raise NotImplementedError
+
+
+def test_offloaded_handlers_keep_their_consumers(registry: Registry[Any]) -> None:
+    registry.subscribe(["xxx"], offload=Offload.THREAD)(_offloaded_handler)
+    registry.subscribe(["yyy"], offload=Offload.THREAD)(_other_offloaded_handler)
+
+    assert (
+        registry.mapping()["xxx"].consumer == "tests.test_registry._offloaded_handler"
+    )
+    assert (
+        registry.mapping()["yyy"].consumer
+        == "tests.test_registry._other_offloaded_handler"
+    )
+
+
+def test_registry_requires_consumer_of_unnamed_handler_with_attempt_limit(
+    registry: Registry[Any],
+) -> None:
+    async def _handler(msg: Message, scheduler: EventScheduler[Any]) -> None:
+        raise NotImplementedError
+
+    with pytest.raises(ValueError):
+        registry.register(
+            ["xxx"], _handler, Guarantee.AT_LEAST_ONCE, 1.0, max_attempts=3
+        )
+
+    registry.register(
+        ["xxx"],
+        _handler,
+        Guarantee.AT_LEAST_ONCE,
+        1.0,
+        max_attempts=3,
+        consumer="billing.charge",
+    )
+    assert registry.mapping()["xxx"].consumer == "billing.charge"
+
+
+def _raise_with_process_id(event_payload: EventPayload) -> None:
+    raise ValueError(os.getpid(), event_payload.subject)
+
+
+@pytest.mark.anyio
+async def test_subscribe_offloads_handler_to_thread(
+    registry: Registry[Any], event_payload: EventPayload
+) -> None:
+    thread_id_seq = []
+
+    def _record_thread_id(_: EventPayload) -> None:
+        thread_id_seq.append(threading.get_ident())
+
+    registry.subscribe(["xxx"], offload=Offload.THREAD)(_record_thread_id)
+    handler = cast(MessageHandler[Any], registry.mapping()["xxx"].message_handler)
+
+    broker = StreamMessageBroker()
+    msg = broker.create_msg(broker.event_payload_as_bytes(event_payload))
+    await handler(msg, cast(EventScheduler[Any], None))
+
+    assert len(thread_id_seq) == 1
+    assert thread_id_seq[0] != threading.get_ident()
+
+
+@pytest.mark.anyio
+async def test_subscribe_offloads_handler_to_process(
+    registry: Registry[Any], event_payload: EventPayload
+) -> None:
+    registry.subscribe(["xxx"], offload=Offload.PROCESS)(_raise_with_process_id)
+    handler = cast(MessageHandler[Any], registry.mapping()["xxx"].message_handler)
+
+    broker = StreamMessageBroker()
+    msg = broker.create_msg(broker.event_payload_as_bytes(event_payload))
+    with pytest.raises(ValueError) as exc_info:
+        await handler(msg, cast(EventScheduler[Any], None))
+
+    process_id, subject = exc_info.value.args
+    assert process_id != os.getpid()
+    assert subject == event_payload.subject
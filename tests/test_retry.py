@@ -0,0 +1,57 @@
+import pytest
+
+from eventual.retry import ExponentialBackoff, FixedDelay, RetryBudget
+
+
+def test_fixed_delay_does_not_grow() -> None:
+    retry_policy = FixedDelay(2.0)
+
+    assert [retry_policy.delay(attempt) for attempt in range(1, 4)] == [2.0] * 3
+
+
+def test_exponential_backoff_grows_up_to_max_delay() -> None:
+    retry_policy = ExponentialBackoff(
+        base_delay=1.0, multiplier=2.0, max_delay=5.0, jitter=0.0
+    )
+
+    assert [retry_policy.delay(attempt) for attempt in range(1, 6)] == [
+        1.0,
+        2.0,
+        4.0,
+        5.0,
+        5.0,
+    ]
+    assert retry_policy.delay(10_000) == 5.0
+
+
+def test_exponential_backoff_jitter_stays_within_delay() -> None:
+    retry_policy = ExponentialBackoff(base_delay=4.0, max_delay=4.0, jitter=0.5)
+
+    delay_seq = [retry_policy.delay(1) for _ in range(100)]
+
+    assert all(2.0 <= delay <= 4.0 for delay in delay_seq)
+    assert len(set(delay_seq)) > 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(base_delay=0.0),
+        dict(multiplier=0.5),
+        dict(base_delay=2.0, max_delay=1.0),
+        dict(jitter=1.5),
+    ],
+)
+def test_exponential_backoff_rejects_bad_arguments(kwargs: dict) -> None:
+    with pytest.raises(ValueError):
+        ExponentialBackoff(**kwargs)
+
+
+def test_retry_budget_delays_retries_that_do_not_fit() -> None:
+    retry_budget = RetryBudget(ratio=0.5, min_per_second=1.0, max_balance=10.0)
+    for _ in range(4):
+        retry_budget.deposit()
+
+    assert retry_budget.reserve(2) == 0.0
+    # The balance is spent, so the next retries have to wait for it to refill.
+    assert retry_budget.reserve(3) == pytest.approx(3.0, abs=0.1)
@@ -0,0 +1,622 @@
+import dataclasses
+import datetime as dt
+import uuid
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
+
+import anyio
+import pytest
+from anyio.streams.memory import MemoryObjectSendStream
+
+from eventual import util
+from eventual.abc.broker import Message, MessageBroker
+from eventual.abc.guarantee import Guarantee
+from eventual.abc.router import IntegrityGuard, UnhandledSubjectPolicy
+from eventual.abc.schedule import EventSchedule, EventScheduler
+from eventual.memory import MemoryEventSchedule
+from eventual.model import EventPayload, LazyEventPayload
+from eventual.registry import Registry
+from eventual.retry import ExponentialBackoff, RetryBudget
+from eventual.router import Router
+from tests.memory.broker import StreamMessage, StreamMessageBroker
+from tests.memory.integrity_guard import MemoryIntegrityGuard
+from tests.memory.scheduler import MemoryScheduler
+from tests.memory.work_unit import MemoryWorkUnit
+from tests.model import NumberAdded, SomethingHappened
+
+EVENT_COUNT = 10
+
+pytestmark = pytest.mark.anyio
+
+
+async def _send_event_payload_seq(
+    event_payload_send_stream: MemoryObjectSendStream[EventPayload],
+    event_payload_seq: Sequence[EventPayload],
+) -> None:
+    async with event_payload_send_stream:
+        for event_payload in event_payload_seq:
+            await event_payload_send_stream.send(event_payload)
+
+
+async def dispatch_every_event(
+    router_kwargs: Any,
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+    event_payload_seq: Optional[Sequence[EventPayload]] = None,
+    stream_broker: Optional[StreamMessageBroker] = None,
+) -> int:
+    if event_payload_seq is None:
+        event_payload_seq = [
+            EventPayload.from_event(SomethingHappened()) for _ in range(EVENT_COUNT)
+        ]
+    event_count = len(event_payload_seq)
+    confirmation_send_stream, _ = anyio.create_memory_object_stream(event_count)
+    event_payload_send_stream, _ = anyio.create_memory_object_stream(event_count)
+    scheduler = MemoryScheduler(event_payload_send_stream, event_schedule)
+    if stream_broker is None:
+        stream_broker = StreamMessageBroker()
+    (
+        broker_event_payload_send_stream,
+        broker_event_payload_stream,
+    ) = anyio.create_memory_object_stream()
+
+    async with anyio.create_task_group() as callback_group:
+        callback_group.start_soon(
+            _send_event_payload_seq, broker_event_payload_send_stream, event_payload_seq
+        )
+        callback_group.start_soon(
+            stream_broker.send_event_payload_stream,
+            broker_event_payload_stream,
+            confirmation_send_stream,
+        )
+        router = Router(callback_group, **router_kwargs)
+        await router.dispatch_from_broker(
+            registry, stream_broker, integrity_guard, scheduler
+        )
+    return stream_broker.unacknowledged_msg_count
+
+
+class RecordingEventSchedule(MemoryEventSchedule):
+    def __init__(self, claim_duration: float) -> None:
+        super().__init__(claim_duration)
+        self.added_entry_seq: List[Tuple[EventPayload, Optional[dt.datetime]]] = []
+
+    async def add_claimed_event_entry(
+        self, event_payload: EventPayload, due_after: Optional[dt.datetime] = None
+    ) -> None:
+        await super().add_claimed_event_entry(event_payload, due_after)
+        self.added_entry_seq.append((event_payload, due_after))
+
+
+async def fail(msg: Message, scheduler: EventScheduler[Any]) -> None:
+    raise RuntimeError("poison")
+
+
+FAIL_CONSUMER = "tests.test_router.fail"
+
+
+async def fail_batch(msg_seq: List[Message], scheduler: EventScheduler[Any]) -> None:
+    raise RuntimeError("poison")
+
+
+class ConcurrencyProbe:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.handled_msg_seq: List[Message] = []
+
+    async def __call__(self, msg: Message, scheduler: EventScheduler[Any]) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await anyio.sleep(0.01)
+        self.in_flight -= 1
+        self.handled_msg_seq.append(msg)
+
+
+async def test_router_handles_every_message(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    probe = ConcurrencyProbe()
+    registry.register(["something-happened"], probe, Guarantee.AT_LEAST_ONCE, 1.0)
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        {}, registry, integrity_guard, event_schedule
+    )
+
+    assert len(probe.handled_msg_seq) == EVENT_COUNT
+    assert unacknowledged_msg_count == 0
+
+
+async def test_router_limits_messages_in_flight(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    probe = ConcurrencyProbe()
+    registry.register(["something-happened"], probe, Guarantee.AT_LEAST_ONCE, 1.0)
+
+    await dispatch_every_event(
+        dict(max_in_flight=3), registry, integrity_guard, event_schedule
+    )
+
+    assert len(probe.handled_msg_seq) == EVENT_COUNT
+    assert probe.max_in_flight == 3
+
+
+async def test_router_limits_messages_in_flight_per_handler(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    probe = ConcurrencyProbe()
+    registry.register(
+        ["something-happened"], probe, Guarantee.AT_LEAST_ONCE, 1.0, max_in_flight=2
+    )
+
+    await dispatch_every_event(
+        dict(max_in_flight=5), registry, integrity_guard, event_schedule
+    )
+
+    assert len(probe.handled_msg_seq) == EVENT_COUNT
+    assert probe.max_in_flight == 2
+
+
+class BatchCountingIntegrityGuard(MemoryIntegrityGuard):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batch_size_seq: List[int] = []
+
+    async def which_dispatch_forbidden(
+        self, event_id_seq: Iterable[uuid.UUID]
+    ) -> Set[uuid.UUID]:
+        event_id_seq = list(event_id_seq)
+        self.batch_size_seq.append(len(event_id_seq))
+        return await super().which_dispatch_forbidden(event_id_seq)
+
+
+async def test_router_checks_messages_in_batches(
+    registry: Registry[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    integrity_guard = BatchCountingIntegrityGuard()
+    probe = ConcurrencyProbe()
+    registry.register(["something-happened"], probe, Guarantee.AT_LEAST_ONCE, 1.0)
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        dict(dedup_batch_max_size=4, dedup_batch_max_wait=0.05),
+        registry,
+        integrity_guard,
+        event_schedule,
+    )
+
+    assert len(probe.handled_msg_seq) == EVENT_COUNT
+    assert unacknowledged_msg_count == 0
+    assert sum(integrity_guard.batch_size_seq) == EVENT_COUNT
+    assert max(integrity_guard.batch_size_seq) == 4
+
+
+async def test_router_keeps_order_within_partition(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    number_seq_from_counter: Dict[int, List[int]] = {0: [], 1: []}
+    probe = ConcurrencyProbe()
+
+    async def _add_number(msg: Message, scheduler: EventScheduler[Any]) -> None:
+        body = msg.event_payload.body
+        # Later events are handled faster, so without partitions they would overtake earlier ones.
+        await anyio.sleep(0.001 * (EVENT_COUNT - body["number"]))
+        await probe(msg, scheduler)
+        number_seq_from_counter[body["counter"]].append(body["number"])
+
+    registry.register(["number-added"], _add_number, Guarantee.AT_LEAST_ONCE, 1.0)
+    event_payload_seq = [
+        EventPayload.from_event(NumberAdded(counter=number % 2, number=number))
+        for number in range(EVENT_COUNT)
+    ]
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        dict(max_in_flight=EVENT_COUNT, partition_key="counter", partition_count=2),
+        registry,
+        integrity_guard,
+        event_schedule,
+        event_payload_seq,
+    )
+
+    assert unacknowledged_msg_count == 0
+    assert number_seq_from_counter == {
+        0: list(range(0, EVENT_COUNT, 2)),
+        1: list(range(1, EVENT_COUNT, 2)),
+    }
+    assert probe.max_in_flight == 2
+
+
+async def test_router_partitions_by_unhashable_value(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    number_seq_from_counter: Dict[int, List[int]] = {0: [], 1: []}
+
+    async def _add_number(msg: Message, scheduler: EventScheduler[Any]) -> None:
+        body = msg.event_payload.body
+        await anyio.sleep(0.001 * (EVENT_COUNT - body["number"]))
+        number_seq_from_counter[body["counter"]["id"]].append(body["number"])
+
+    registry.register(["number-added"], _add_number, Guarantee.AT_LEAST_ONCE, 1.0)
+    event_payload_seq = []
+    for number in range(EVENT_COUNT):
+        event_payload = EventPayload.from_event(NumberAdded(counter=0, number=number))
+        body = dict(event_payload.body, counter={"id": number % 2, "tags": [1, 2]})
+        event_payload_seq.append(dataclasses.replace(event_payload, body=body))
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        dict(max_in_flight=EVENT_COUNT, partition_key="counter", partition_count=2),
+        registry,
+        integrity_guard,
+        event_schedule,
+        event_payload_seq,
+    )
+
+    assert unacknowledged_msg_count == 0
+    assert number_seq_from_counter == {
+        0: list(range(0, EVENT_COUNT, 2)),
+        1: list(range(1, EVENT_COUNT, 2)),
+    }
+
+
+async def test_router_dispatches_batches(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    msg_seq_seq: List[List[Message]] = []
+
+    async def _handle_batch(
+        msg_seq: List[Message], scheduler: EventScheduler[Any]
+    ) -> None:
+        msg_seq_seq.append(msg_seq)
+
+    registry.register(
+        ["something-happened"],
+        _handle_batch,
+        Guarantee.NO_MORE_THAN_ONCE,
+        1.0,
+        batch_max_size=4,
+        batch_max_wait=0.05,
+    )
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        {}, registry, integrity_guard, event_schedule
+    )
+
+    assert unacknowledged_msg_count == 0
+    assert [len(msg_seq) for msg_seq in msg_seq_seq] == [4, 4, 2]
+    for msg_seq in msg_seq_seq:
+        for msg in msg_seq:
+            assert await integrity_guard.is_dispatch_forbidden(msg.event_payload.id)
+
+
+async def test_router_lets_broker_filter_subjects(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    probe = ConcurrencyProbe()
+    registry.register(["number-added"], probe, Guarantee.AT_LEAST_ONCE, 1.0)
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        {}, registry, integrity_guard, event_schedule
+    )
+
+    # Filtered messages are never delivered, so there is nothing to acknowledge.
+    assert unacknowledged_msg_count == 0
+    assert not probe.handled_msg_seq
+
+
+@pytest.mark.parametrize(
+    "policy, unacknowledged_msg_count, forwarded_msg_count",
+    [
+        # The broker filters out messages that are dropped, so they are never delivered.
+        (UnhandledSubjectPolicy.DROP, 0, 0),
+        (UnhandledSubjectPolicy.ACKNOWLEDGE, 0, 0),
+        (UnhandledSubjectPolicy.FORWARD, 0, EVENT_COUNT),
+    ],
+)
+async def test_router_applies_unhandled_subject_policy(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+    policy: UnhandledSubjectPolicy,
+    unacknowledged_msg_count: int,
+    forwarded_msg_count: int,
+) -> None:
+    stream_broker = StreamMessageBroker()
+    probe = ConcurrencyProbe()
+    registry.register(["number-added"], probe, Guarantee.AT_LEAST_ONCE, 1.0)
+
+    assert unacknowledged_msg_count == await dispatch_every_event(
+        dict(unhandled_subject_policy=policy),
+        registry,
+        integrity_guard,
+        event_schedule,
+        stream_broker=stream_broker,
+    )
+    assert len(stream_broker.forwarded_msg_seq) == forwarded_msg_count
+
+
+class NonForwardingStreamMessageBroker(StreamMessageBroker):
+    forward_message = MessageBroker.forward_message
+
+
+async def test_router_refuses_to_forward_with_broker_that_does_not(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    stream_broker = NonForwardingStreamMessageBroker()
+
+    with pytest.raises(ValueError):
+        await dispatch_every_event(
+            dict(unhandled_subject_policy=UnhandledSubjectPolicy.FORWARD),
+            registry,
+            integrity_guard,
+            event_schedule,
+            stream_broker=stream_broker,
+        )
+    assert not stream_broker.forwarded_msg_seq
+
+
+@pytest.mark.parametrize(
+    "router_kwargs, batch_max_size",
+    [
+        ({}, None),
+        (dict(max_in_flight=2), None),
+        (dict(partition_key="_subject"), None),
+        ({}, 2),
+    ],
+)
+async def test_router_retries_failures_the_same_way_in_every_mode(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    router_kwargs: Dict[str, Any],
+    batch_max_size: Optional[int],
+) -> None:
+    event_schedule = RecordingEventSchedule(claim_duration=60.0)
+    registry.register(
+        ["something-happened"],
+        fail if batch_max_size is None else fail_batch,
+        Guarantee.AT_LEAST_ONCE,
+        1.0,
+        batch_max_size=batch_max_size,
+    )
+
+    # The router keeps going after a handler fails, every failed event is retried and acknowledged.
+    unacknowledged_msg_count = await dispatch_every_event(
+        router_kwargs, registry, integrity_guard, event_schedule
+    )
+
+    assert unacknowledged_msg_count == 0
+    assert len(event_schedule.added_entry_seq) == EVENT_COUNT
+
+
+async def test_router_retries_with_backoff(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    event_schedule = RecordingEventSchedule(claim_duration=60.0)
+    registry.register(
+        ["something-happened"],
+        fail,
+        Guarantee.AT_LEAST_ONCE,
+        1.0,
+        retry_policy=ExponentialBackoff(base_delay=1.0, multiplier=2.0, jitter=0.0),
+    )
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()).with_attempt(
+            FAIL_CONSUMER, attempt
+        )
+        for attempt in range(3)
+    ]
+
+    started_at = util.tz_aware_utcnow()
+    unacknowledged_msg_count = await dispatch_every_event(
+        {},
+        registry,
+        integrity_guard,
+        event_schedule,
+        event_payload_seq,
+    )
+
+    assert unacknowledged_msg_count == 0
+    delay_from_attempt = {
+        event_payload.attempt_of(FAIL_CONSUMER): (
+            cast(dt.datetime, due_after) - started_at
+        ).total_seconds()
+        for event_payload, due_after in event_schedule.added_entry_seq
+    }
+    assert sorted(delay_from_attempt) == [1, 2, 3]
+    for attempt, delay in delay_from_attempt.items():
+        assert 2 ** (attempt - 1) <= delay < 2 ** (attempt - 1) + 1
+
+
+async def test_router_spends_retry_budget(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    event_schedule = RecordingEventSchedule(claim_duration=60.0)
+    registry.register(["something-happened"], fail, Guarantee.AT_LEAST_ONCE, 1.0)
+    retry_budget = RetryBudget(ratio=0.0, min_per_second=1.0)
+
+    started_at = util.tz_aware_utcnow()
+    await dispatch_every_event(
+        dict(retry_budget=retry_budget),
+        registry,
+        integrity_guard,
+        event_schedule,
+    )
+
+    delay_seq = sorted(
+        (cast(dt.datetime, due_after) - started_at).total_seconds()
+        for _, due_after in event_schedule.added_entry_seq
+    )
+    # Nothing has been deposited, so every retry waits for its share of the minimal rate.
+    assert delay_seq[-1] >= EVENT_COUNT
+
+
+async def test_router_parks_events_out_of_attempts(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    event_schedule = RecordingEventSchedule(claim_duration=60.0)
+    registry.register(
+        ["something-happened"],
+        fail,
+        Guarantee.AT_LEAST_ONCE,
+        1.0,
+        max_attempts=3,
+    )
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()).with_attempt(
+            FAIL_CONSUMER, attempt
+        )
+        for attempt in range(3)
+    ]
+
+    unacknowledged_msg_count = await dispatch_every_event(
+        {},
+        registry,
+        integrity_guard,
+        event_schedule,
+        event_payload_seq,
+    )
+
+    assert unacknowledged_msg_count == 0
+    assert sorted(
+        event_payload.attempt_of(FAIL_CONSUMER)
+        for event_payload, _ in event_schedule.added_entry_seq
+    ) == [1, 2]
+    dead_letter_seq = await event_schedule.every_dead_letter_entry()
+    assert [
+        (event_payload.id, event_payload.attempt_of(FAIL_CONSUMER), reason)
+        for event_payload, reason in dead_letter_seq
+    ] == [(event_payload_seq[-1].id, 3, "RuntimeError: poison")]
+
+
+async def test_router_counts_only_own_attempts(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    event_schedule = RecordingEventSchedule(claim_duration=60.0)
+    registry.register(
+        ["something-happened"],
+        fail,
+        Guarantee.AT_LEAST_ONCE,
+        1.0,
+        max_attempts=3,
+    )
+    # Another service has failed to handle the event many times and has sent it again.
+    event_payload = EventPayload.from_event(SomethingHappened()).with_attempt(
+        "other-service.handler", 5
+    )
+
+    await dispatch_every_event(
+        {},
+        registry,
+        integrity_guard,
+        event_schedule,
+        [event_payload],
+    )
+
+    assert await event_schedule.every_dead_letter_entry() == []
+    [(retried_event_payload, _)] = event_schedule.added_entry_seq
+    assert retried_event_payload.attempt_of(FAIL_CONSUMER) == 1
+    assert retried_event_payload.attempt_of("other-service.handler") == 5
+
+
+class NoDeadLetterEventSchedule(MemoryEventSchedule):
+    add_dead_letter_entry = EventSchedule.add_dead_letter_entry
+
+
+async def test_router_requires_dead_letters_for_attempt_limit(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+) -> None:
+    registry.register(
+        ["something-happened"],
+        fail,
+        Guarantee.AT_LEAST_ONCE,
+        1.0,
+        max_attempts=3,
+    )
+    stream_broker = StreamMessageBroker()
+
+    with pytest.raises(ValueError):
+        await dispatch_every_event(
+            {},
+            registry,
+            integrity_guard,
+            NoDeadLetterEventSchedule(claim_duration=60.0),
+            stream_broker=stream_broker,
+        )
+    # The router has refused to start before it received anything.
+    assert stream_broker.unacknowledged_msg_count == 0
+
+
+class RecordingStreamMessageBroker(StreamMessageBroker):
+    def __init__(self) -> None:
+        super().__init__()
+        self.created_msg_seq: List[Message] = []
+
+    def create_msg(self, message_bytes: bytes) -> StreamMessage:
+        msg = super().create_msg(message_bytes)
+        self.created_msg_seq.append(msg)
+        return msg
+
+
+async def test_router_does_not_decode_bodies(
+    registry: Registry[MemoryWorkUnit],
+    integrity_guard: IntegrityGuard[MemoryWorkUnit],
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    stream_broker = RecordingStreamMessageBroker()
+    probe = ConcurrencyProbe()
+    registry.register(["number-added"], probe, Guarantee.AT_LEAST_ONCE, 1.0)
+    handled_payload, duplicate_payload = (
+        EventPayload.from_event(NumberAdded(counter=0, number=number))
+        for number in range(2)
+    )
+    await integrity_guard.record_completion_with_guarantee(
+        duplicate_payload, Guarantee.AT_LEAST_ONCE
+    )
+
+    await dispatch_every_event(
+        dict(unhandled_subject_policy=UnhandledSubjectPolicy.ACKNOWLEDGE),
+        registry,
+        integrity_guard,
+        event_schedule,
+        [
+            handled_payload,
+            duplicate_payload,
+            EventPayload.from_event(SomethingHappened()),
+        ],
+        stream_broker=stream_broker,
+    )
+
+    assert len(probe.handled_msg_seq) == 1
+    assert len(stream_broker.created_msg_seq) == 3
+    for msg in stream_broker.created_msg_seq:
+        assert not cast(LazyEventPayload, msg.event_payload).is_body_decoded
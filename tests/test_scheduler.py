@@ -1,12 +1,16 @@
 import contextlib
-from typing import AsyncGenerator
+import datetime as dt
+import uuid
+from typing import AsyncGenerator, Optional, Sequence
 
 import anyio
 import pytest
 from anyio.streams.memory import MemoryObjectSendStream
 
 from eventual.abc.schedule import EventSchedule
+from eventual.memory import MemoryEventSchedule
 from eventual.model import EventPayload
+from eventual.scheduler import Scheduler, enqueue_after_delay
 from tests.memory.scheduler import MemoryScheduler
 from tests.memory.work_unit import MemoryWorkUnit
 from tests.model import Person, SomethingHappened
@@ -101,3 +105,203 @@ async def test_scheduler_marks_confirmed_events_as_sent(
 
         for event_payload in event_payload_seq:
             assert await event_schedule.is_event_entry_closed(event_payload.id)
+
+
+async def test_scheduler_releases_delayed_events_when_due(
+    event_schedule: EventSchedule[MemoryWorkUnit],
+) -> None:
+    event_payload_send_stream, event_payload_stream = anyio.create_memory_object_stream(
+        EVENT_COUNT
+    )
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(EVENT_COUNT)
+    ]
+
+    # Nothing runs `release_due_event_payloads`, so the scheduler releases events in its own task group,
+    # which is left as soon as every event is sent.
+    with anyio.fail_after(1.0):
+        async with anyio.create_task_group() as task_group:
+            scheduler = Scheduler(event_payload_send_stream, event_schedule, task_group)
+            started_at = anyio.current_time()
+            # Events are scheduled in reverse order of their delays.
+            for index, event_payload in enumerate(event_payload_seq):
+                await scheduler.schedule_event(
+                    event_payload, delay=0.01 * (EVENT_COUNT - index)
+                )
+
+    released_event_payload_seq = []
+    for _ in range(EVENT_COUNT):
+        released_event_payload_seq.append(event_payload_stream.receive_nowait())
+    assert anyio.current_time() - started_at >= 0.01 * EVENT_COUNT
+    assert released_event_payload_seq == event_payload_seq[::-1]
+
+
+async def test_enqueue_after_delay_is_deprecated(event_payload: EventPayload) -> None:
+    event_payload_send_stream, event_payload_stream = anyio.create_memory_object_stream(
+        1
+    )
+    with pytest.deprecated_call():
+        await enqueue_after_delay(event_payload_send_stream, event_payload, 0.0)
+    assert event_payload_stream.receive_nowait() == event_payload
+
+
+async def test_scheduler_recovers_unclaimed_events_page_by_page() -> None:
+    # Claims expire immediately, so every entry is available for recovery.
+    event_schedule = MemoryEventSchedule(0.0)
+    for _ in range(EVENT_COUNT):
+        await event_schedule.add_claimed_event_entry(
+            EventPayload.from_event(SomethingHappened())
+        )
+
+    event_payload_send_stream, event_payload_stream = anyio.create_memory_object_stream(
+        EVENT_COUNT
+    )
+    async with anyio.create_task_group() as task_group:
+        scheduler = Scheduler(
+            event_payload_send_stream,
+            event_schedule,
+            task_group,
+            recovery_page_size=2,
+            recovery_max_rate=1000.0,
+        )
+        task_group.start_soon(scheduler.release_due_event_payloads)
+        await scheduler.schedule_every_open_unclaimed_event_entry_due_now()
+
+        event_id_set = set()
+        with anyio.fail_after(1.0):
+            for _ in range(EVENT_COUNT):
+                event_id_set.add((await event_payload_stream.receive()).id)
+        assert len(event_id_set) == EVENT_COUNT
+        task_group.cancel_scope.cancel()
+
+
+class BulkCountingEventSchedule(MemoryEventSchedule):
+    def __init__(self, claim_duration: float) -> None:
+        super().__init__(claim_duration)
+        self.bulk_add_count = 0
+        self.bulk_close_count = 0
+
+    async def add_claimed_event_entries(
+        self,
+        event_payload_seq: Sequence[EventPayload],
+        due_after: Optional[dt.datetime] = None,
+    ) -> None:
+        self.bulk_add_count += 1
+        await super().add_claimed_event_entries(event_payload_seq, due_after)
+
+    async def close_event_entries(self, event_id_seq: Sequence[uuid.UUID]) -> None:
+        self.bulk_close_count += 1
+        await super().close_event_entries(event_id_seq)
+
+
+async def test_scheduler_writes_outbox_at_once() -> None:
+    event_schedule = BulkCountingEventSchedule(1.0)
+    person, another_person = Person.create(), Person.create()
+    event_payload_send_stream, event_payload_stream = anyio.create_memory_object_stream(
+        2 * EVENT_COUNT
+    )
+
+    async with anyio.create_task_group() as task_group:
+        scheduler = Scheduler(event_payload_send_stream, event_schedule, task_group)
+        task_group.start_soon(scheduler.release_due_event_payloads)
+        async with scheduler.schedule_outbox_in_work_unit(person, another_person):
+            for _ in range(EVENT_COUNT):
+                person.new_day()
+                another_person.new_day()
+
+        with anyio.fail_after(1.0):
+            for _ in range(2 * EVENT_COUNT):
+                await event_payload_stream.receive()
+        task_group.cancel_scope.cancel()
+
+    assert event_schedule.bulk_add_count == 1
+
+
+async def test_scheduler_closes_confirmed_events_in_batches() -> None:
+    event_schedule = BulkCountingEventSchedule(1.0)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(EVENT_COUNT)
+    ]
+    await event_schedule.add_claimed_event_entries(event_payload_seq)
+    event_payload_send_stream, _ = anyio.create_memory_object_stream()
+    scheduler = MemoryScheduler(event_payload_send_stream, event_schedule)
+
+    # Every confirmation is already there by the time the scheduler gets to them.
+    async with scheduler.confirmation_send_stream:
+        for event_payload in event_payload_seq:
+            scheduler.confirmation_send_stream.send_nowait(event_payload)
+    with anyio.fail_after(1.0):
+        await scheduler.receive_confirmation_stream()
+
+    assert event_schedule.bulk_close_count == 1
+    for event_payload in event_payload_seq:
+        assert await event_schedule.is_event_entry_closed(event_payload.id)
+
+
+async def test_scheduler_redrives_dead_letters() -> None:
+    event_schedule = MemoryEventSchedule(1.0)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()).with_attempt("consumer", 5)
+        for _ in range(EVENT_COUNT)
+    ]
+    event_payload_send_stream, event_payload_stream = anyio.create_memory_object_stream(
+        EVENT_COUNT
+    )
+    scheduler = MemoryScheduler(event_payload_send_stream, event_schedule)
+    for event_payload in event_payload_seq:
+        await scheduler.park_dead_letter(event_payload, "RuntimeError")
+
+    assert await scheduler.redrive_dead_letters([event_payload_seq[0].id]) == 1
+    assert await scheduler.redrive_dead_letters() == EVENT_COUNT - 1
+    assert await scheduler.redrive_dead_letters() == 0
+
+    redriven_payload_seq = [
+        event_payload_stream.receive_nowait() for _ in range(EVENT_COUNT)
+    ]
+    assert [event_payload.id for event_payload in redriven_payload_seq] == [
+        event_payload.id for event_payload in event_payload_seq
+    ]
+    # Re-driven events get a fresh set of attempts.
+    assert all(
+        event_payload.attempt_of("consumer") == 0
+        for event_payload in redriven_payload_seq
+    )
+
+
+async def test_schedulers_recover_separate_shards() -> None:
+    event_schedule = MemoryEventSchedule(0.0)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(10 * EVENT_COUNT)
+    ]
+    await event_schedule.add_claimed_event_entries(event_payload_seq)
+    node_id_seq = ["node-a", "node-b"]
+    for node_id in node_id_seq:
+        await event_schedule.record_node_heartbeat(node_id, 60.0)
+
+    event_id_set_seq = []
+    async with anyio.create_task_group() as task_group:
+        for node_id in node_id_seq:
+            (
+                event_payload_send_stream,
+                event_payload_stream,
+            ) = anyio.create_memory_object_stream(len(event_payload_seq))
+            scheduler = Scheduler(
+                event_payload_send_stream, event_schedule, task_group, node_id=node_id
+            )
+            task_group.start_soon(scheduler.release_due_event_payloads)
+            await scheduler.schedule_every_open_unclaimed_event_entry_due_now()
+            await anyio.wait_all_tasks_blocked()
+            event_id_set = set()
+            while True:
+                try:
+                    event_id_set.add(event_payload_stream.receive_nowait().id)
+                except anyio.WouldBlock:
+                    break
+            event_id_set_seq.append(event_id_set)
+        task_group.cancel_scope.cancel()
+
+    assert all(event_id_set_seq)
+    assert not event_id_set_seq[0] & event_id_set_seq[1]
+    assert event_id_set_seq[0] | event_id_set_seq[1] == {
+        event_payload.id for event_payload in event_payload_seq
+    }
@@ -0,0 +1,259 @@
+import pathlib
+from typing import AsyncGenerator, List
+
+import anyio
+import pytest
+
+from eventual.abc.guarantee import Guarantee
+from eventual.abc.schedule import Shard
+from eventual.abc.work_unit import InterruptWork
+from eventual.model import EventPayload
+from eventual.sqlite import (
+    SqliteDatabase,
+    SqliteEventSchedule,
+    SqliteIntegrityGuard,
+    SqliteWorkUnit,
+)
+from tests.model import SomethingHappened
+
+EVENT_COUNT = 5
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def database(tmp_path: pathlib.Path) -> AsyncGenerator[SqliteDatabase, None]:
+    database = SqliteDatabase(str(tmp_path / "eventual.db"))
+    yield database
+    await database.close()
+
+
+async def every_event_payload_due_now(
+    event_schedule: SqliteEventSchedule,
+) -> List[EventPayload]:
+    return [
+        event_payload
+        async for event_payload in event_schedule.every_open_unclaimed_event_entry_due_now()
+    ]
+
+
+async def test_sqlite_work_unit_commits_and_rolls_back(
+    database: SqliteDatabase,
+) -> None:
+    integrity_guard = SqliteIntegrityGuard(database)
+    committed_payload, interrupted_payload, nested_payload = (
+        EventPayload.from_event(SomethingHappened()) for _ in range(3)
+    )
+
+    async with database.work_unit_class.create() as work_unit:
+        await integrity_guard.record_completion_with_guarantee(
+            committed_payload, Guarantee.EXACTLY_ONCE
+        )
+        # A nested work unit is a savepoint, so it can be rolled back on its own.
+        async with database.create_work_unit() as nested_work_unit:
+            await integrity_guard.record_completion_with_guarantee(
+                nested_payload, Guarantee.EXACTLY_ONCE
+            )
+            await nested_work_unit.rollback()
+    assert work_unit.committed
+    assert not nested_work_unit.committed
+
+    async with database.create_work_unit() as interrupted_work_unit:
+        await integrity_guard.record_completion_with_guarantee(
+            interrupted_payload, Guarantee.EXACTLY_ONCE
+        )
+        raise InterruptWork
+    assert not interrupted_work_unit.committed
+
+    assert await integrity_guard.which_dispatch_forbidden(
+        [committed_payload.id, interrupted_payload.id, nested_payload.id]
+    ) == {committed_payload.id}
+
+
+async def test_sqlite_work_unit_needs_a_bound_class(
+    database: SqliteDatabase,
+) -> None:
+    assert database.work_unit_class.database is database
+    assert issubclass(database.work_unit_class, SqliteWorkUnit)
+    with pytest.raises(TypeError):
+        SqliteWorkUnit.create()
+
+
+async def test_sqlite_reads_dont_wait_for_open_work_unit(
+    database: SqliteDatabase,
+) -> None:
+    integrity_guard = SqliteIntegrityGuard(database)
+    handled_payload, handling_payload = (
+        EventPayload.from_event(SomethingHappened()) for _ in range(2)
+    )
+    await integrity_guard.record_completion_with_guarantee(
+        handled_payload, Guarantee.AT_LEAST_ONCE
+    )
+    work_unit_opened = anyio.Event()
+    forbidden_event_id_set_seq = []
+
+    async def read() -> None:
+        await work_unit_opened.wait()
+        forbidden_event_id_set_seq.append(
+            await integrity_guard.which_dispatch_forbidden(
+                [handled_payload.id, handling_payload.id]
+            )
+        )
+
+    # The reading task is started before the work unit, so it doesn't join its transaction.
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(read)
+        async with database.create_work_unit():
+            await integrity_guard.record_completion_with_guarantee(
+                handling_payload, Guarantee.EXACTLY_ONCE
+            )
+            work_unit_opened.set()
+            with anyio.fail_after(5):
+                while not forbidden_event_id_set_seq:
+                    await anyio.sleep(0.01)
+
+    # The read sees only what had been committed.
+    assert forbidden_event_id_set_seq == [{handled_payload.id}]
+
+
+async def test_sqlite_integrity_guard_lists_handled_events(
+    database: SqliteDatabase,
+) -> None:
+    integrity_guard = SqliteIntegrityGuard(database)
+    # More events than fit in a single page.
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(600)
+    ]
+    await integrity_guard.record_completions_with_guarantee(
+        event_payload_seq, Guarantee.AT_LEAST_ONCE
+    )
+
+    event_id_seq = [
+        event_id async for event_id in integrity_guard.every_forbidden_event_id()
+    ]
+    assert sorted(event_id_seq) == sorted(
+        event_payload.id for event_payload in event_payload_seq
+    )
+
+
+async def test_sqlite_integrity_guard_counts_dispatch_attempts(
+    database: SqliteDatabase,
+) -> None:
+    integrity_guard = SqliteIntegrityGuard(database)
+    event_payload = EventPayload.from_event(SomethingHappened())
+
+    await integrity_guard.record_dispatch_attempts([event_payload, event_payload])
+
+    row_seq = await database.execute(
+        "SELECT attempt_count FROM dispatched_event WHERE id = ?",
+        (event_payload.id.bytes,),
+    )
+    assert row_seq == [(2,)]
+
+
+async def test_sqlite_schedule_recovers_unclaimed_entries(
+    database: SqliteDatabase,
+) -> None:
+    event_schedule = SqliteEventSchedule(database, 0.0, recovery_page_size=2)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(EVENT_COUNT)
+    ]
+    await event_schedule.add_claimed_event_entries(event_payload_seq)
+    await event_schedule.close_event_entry(event_payload_seq[0].id)
+
+    # Bodies go through JSON just like they do through a broker, so only ids are compared.
+    assert [
+        event_payload.id
+        for event_payload in await every_event_payload_due_now(event_schedule)
+    ] == [event_payload.id for event_payload in event_payload_seq[1:]]
+    assert await event_schedule.is_event_entry_closed(event_payload_seq[0].id)
+    assert not await event_schedule.is_event_entry_closed(event_payload_seq[1].id)
+    # Closed entries don't stay in the table.
+    assert await database.execute("SELECT COUNT(*) FROM event_entry") == [
+        (EVENT_COUNT - 1,)
+    ]
+
+
+async def test_sqlite_schedule_keeps_claimed_entries(
+    database: SqliteDatabase,
+) -> None:
+    event_schedule = SqliteEventSchedule(database, 60.0)
+    event_payload = EventPayload.from_event(SomethingHappened())
+    await event_schedule.add_claimed_event_entry(event_payload)
+
+    assert await event_schedule.is_event_entry_claimed(event_payload.id)
+    assert await every_event_payload_due_now(event_schedule) == []
+
+
+async def test_sqlite_schedule_keeps_dead_letters(
+    database: SqliteDatabase,
+) -> None:
+    event_schedule = SqliteEventSchedule(database, 60.0)
+    event_payload = EventPayload.from_event(SomethingHappened()).with_attempt(
+        "consumer", 3
+    )
+
+    await event_schedule.add_dead_letter_entry(event_payload, "RuntimeError")
+    assert [
+        (dead_letter.id, dead_letter.attempt_of("consumer"), reason)
+        for dead_letter, reason in await event_schedule.every_dead_letter_entry()
+    ] == [(event_payload.id, 3, "RuntimeError")]
+
+    await event_schedule.remove_dead_letter_entries([event_payload.id])
+    assert await event_schedule.every_dead_letter_entry() == []
+
+
+async def test_sqlite_schedule_claims_entries_of_shard(
+    database: SqliteDatabase,
+) -> None:
+    event_schedule = SqliteEventSchedule(database, 0.0)
+    event_payload_seq = [
+        EventPayload.from_event(SomethingHappened()) for _ in range(4 * EVENT_COUNT)
+    ]
+    await event_schedule.add_claimed_event_entries(event_payload_seq)
+    shard = Shard(number=0, total=2)
+
+    claimed_payload_seq = await event_schedule.claim_due_event_entries(
+        "node-a", limit=len(event_payload_seq), shard=shard
+    )
+
+    assert {event_payload.id for event_payload in claimed_payload_seq} == {
+        event_payload.id
+        for event_payload in event_payload_seq
+        if shard.contains(event_payload.id)
+    }
+
+
+async def test_sqlite_schedule_renews_claims_of_node(
+    database: SqliteDatabase,
+) -> None:
+    event_schedule = SqliteEventSchedule(database, 0.0)
+    event_payload = EventPayload.from_event(SomethingHappened())
+    await event_schedule.add_claimed_event_entry(event_payload)
+    assert len(await event_schedule.claim_due_event_entries("node-a", limit=1)) == 1
+
+    claim_sql = "SELECT claimed_at, claimed_by FROM event_entry WHERE id = ?"
+    [(claimed_at, claimed_by)] = await database.execute(
+        claim_sql, (event_payload.id.bytes,)
+    )
+
+    # A node can't renew a claim that is held by another node.
+    await event_schedule.renew_event_entry_claims("node-b", [event_payload.id])
+    assert await database.execute(claim_sql, (event_payload.id.bytes,)) == [
+        (claimed_at, "node-a")
+    ]
+    await event_schedule.renew_event_entry_claims("node-a", [event_payload.id])
+    [(renewed_at, claimed_by)] = await database.execute(
+        claim_sql, (event_payload.id.bytes,)
+    )
+    assert renewed_at >= claimed_at and claimed_by == "node-a"
+
+
+async def test_sqlite_schedule_forgets_dead_nodes(
+    database: SqliteDatabase,
+) -> None:
+    event_schedule = SqliteEventSchedule(database, 60.0)
+    await event_schedule.record_node_heartbeat("node-a", 60.0)
+    await event_schedule.record_node_heartbeat("node-b", 0.0)
+
+    assert await event_schedule.every_live_node_id() == ["node-a"]
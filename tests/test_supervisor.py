@@ -0,0 +1,66 @@
+import functools
+import multiprocessing
+import os
+import pathlib
+import signal
+import threading
+import time
+from typing import Any, AsyncGenerator, Callable, List, Optional
+
+from eventual.supervisor import Supervisor
+
+
+def _lifespan_factory(
+    directory: pathlib.Path, is_recovery_leader: bool
+) -> Callable[..., AsyncGenerator[None, None]]:
+    async def lifespan(_: Optional[Any] = None) -> AsyncGenerator[None, None]:
+        (directory / f"{os.getpid()}-{int(is_recovery_leader)}").touch()
+        yield
+
+    return lifespan
+
+
+def _wait_for_worker_seq(directory: pathlib.Path, count: int) -> List[str]:
+    deadline = time.monotonic() + 30.0
+    while time.monotonic() < deadline:
+        name_seq = sorted(path.name for path in directory.iterdir())
+        if len(name_seq) >= count:
+            return name_seq
+        time.sleep(0.05)
+    raise TimeoutError
+
+
+def test_supervisor_restarts_crashed_worker(tmp_path: pathlib.Path) -> None:
+    supervisor = Supervisor(
+        functools.partial(_lifespan_factory, tmp_path),
+        worker_count=2,
+        restart_delay=0.0,
+        shutdown_timeout=5.0,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    supervisor_thread = threading.Thread(target=supervisor.run)
+    supervisor_thread.start()
+    try:
+        name_seq = _wait_for_worker_seq(tmp_path, 2)
+        # Exactly one worker is responsible for recovery.
+        assert sorted(name.split("-")[1] for name in name_seq) == ["0", "1"]
+
+        crashed_pid = int(name_seq[0].split("-")[0])
+        os.kill(crashed_pid, signal.SIGKILL)
+        _wait_for_worker_seq(tmp_path, 3)
+    finally:
+        supervisor.stop()
+        supervisor_thread.join()
+
+    assert supervisor.restart_count == 1
+    for name in tmp_path.iterdir():
+        pid = int(name.name.split("-")[0])
+        assert not _is_process_alive(pid)
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
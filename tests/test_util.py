@@ -0,0 +1,79 @@
+import datetime as dt
+import random
+import threading
+import time
+import uuid
+from typing import List
+
+import anyio
+import pytest
+
+from eventual import util
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_receive_batch_respects_max_size() -> None:
+    send_stream, receive_stream = anyio.create_memory_object_stream(5)
+    for i in range(5):
+        await send_stream.send(i)
+
+    assert await util.receive_batch(receive_stream, 3, 0.0) == [0, 1, 2]
+    assert await util.receive_batch(receive_stream, 3, 0.0) == [3, 4]
+
+
+async def test_receive_batch_stops_at_end_of_stream() -> None:
+    send_stream, receive_stream = anyio.create_memory_object_stream(5)
+    async with send_stream:
+        await send_stream.send(0)
+
+    assert await util.receive_batch(receive_stream, 3, 1.0) == [0]
+    with pytest.raises(anyio.EndOfStream):
+        await util.receive_batch(receive_stream, 3, 1.0)
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom_filter = util.BloomFilter(capacity=1000, error_rate=0.01)
+    id_seq = [uuid.uuid4() for _ in range(1000)]
+    for unique_id in id_seq:
+        bloom_filter.add(unique_id)
+
+    assert all(unique_id in bloom_filter for unique_id in id_seq)
+    false_positive_count = sum(uuid.uuid4() in bloom_filter for _ in range(1000))
+    assert false_positive_count < 50
+
+
+def test_uuid7_is_ordered_by_time() -> None:
+    start = time.time_ns() // 1_000_000
+    id_seq = [util.uuid7() for _ in range(10000)]
+
+    assert id_seq == sorted(id_seq)
+    assert len(set(id_seq)) == len(id_seq)
+    assert all(event_id.version == 7 for event_id in id_seq)
+    assert all(event_id.variant == uuid.RFC_4122 for event_id in id_seq)
+    assert id_seq[0].int >> 80 >= start
+    assert uuid.UUID(str(id_seq[0])) == id_seq[0]
+
+
+def test_uuid7_is_unique_across_threads_and_seeds() -> None:
+    id_seq_seq: List[List[uuid.UUID]] = [[] for _ in range(4)]
+
+    def create_ids(id_seq: List[uuid.UUID]) -> None:
+        # Seeding the global generator doesn't make ids repeat.
+        random.seed(0)
+        id_seq.extend(util.uuid7() for _ in range(2000))
+
+    thread_seq = [
+        threading.Thread(target=create_ids, args=(id_seq,)) for id_seq in id_seq_seq
+    ]
+    for thread in thread_seq:
+        thread.start()
+    for thread in thread_seq:
+        thread.join()
+
+    assert all(id_seq == sorted(id_seq) for id_seq in id_seq_seq)
+    assert len({event_id for id_seq in id_seq_seq for event_id in id_seq}) == 8000
+
+
+def test_tz_aware_utcnow_is_utc() -> None:
+    assert util.tz_aware_utcnow().utcoffset() == dt.timedelta(0)